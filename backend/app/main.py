@@ -2,13 +2,16 @@
 Aplicação principal FastAPI para o sistema de reconhecimento de placas.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 from dotenv import load_dotenv
 
 from .routers import placas
+from .services.anpr_service import anpr_service
+from .services.database import db_service
+from .services.metricas import REQUISICOES_EM_ANDAMENTO, gerar_metricas
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -35,6 +38,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def contar_requisicoes(request: Request, call_next):
+    """Mantém o gauge de requisições em andamento."""
+    with REQUISICOES_EM_ANDAMENTO.track_inprogress():
+        return await call_next(request)
+
+
 # Inclui os routers
 app.include_router(placas.router, prefix="/api/v1")
 
@@ -43,6 +53,21 @@ if os.path.exists(upload_folder):
     app.mount("/uploads", StaticFiles(directory=upload_folder), name="uploads")
 
 
+@app.on_event("startup")
+def carregar_watchlist():
+    """Carrega as listas de alerta em memória e passa a acompanhar as mudanças."""
+    placas.watchlist.iniciar()
+
+
+@app.on_event("shutdown")
+def salvar_estado():
+    """Persiste o estado aprendido (ou fecha a conexão com o servidor de inferência) antes de encerrar."""
+    anpr_service.encerrar()
+    placas.watchlist.encerrar()
+    # Grava os registros ainda no buffer da escrita adiada
+    db_service.close_connection()
+
+
 @app.get("/")
 async def root():
     """Endpoint raiz da API."""
@@ -54,6 +79,7 @@ async def root():
         "endpoints": {
             "placas": "/api/v1/placas",
             "health": "/api/v1/health",
+            "metrics": "/metrics",
             "clean": "/api/v1/placas/admin/clean"
         }
     }
@@ -65,6 +91,13 @@ async def health_check():
     return {"status": "healthy", "message": "API funcionando corretamente"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato do Prometheus."""
+    conteudo, content_type = gerar_metricas()
+    return Response(content=conteudo, media_type=content_type)
+
+
 
 
 if __name__ == "__main__":
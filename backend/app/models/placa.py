@@ -3,10 +3,34 @@ Modelos Pydantic para o sistema de reconhecimento de placas.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
+class BoundingBox(BaseModel):
+    """Retângulo da placa, em pixels da imagem original."""
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+class AlertaWatchlist(BaseModel):
+    """Correspondência da placa lida com uma lista de alerta."""
+    placa: str = Field(..., description="Placa cadastrada na lista")
+    lista: str = Field(..., description="Lista de alerta (ex.: roubado, bloqueado)")
+    motivo: Optional[str] = Field(None, description="Motivo do cadastro")
+    placa_lida: str = Field(..., description="Placa lida, normalizada")
+    exata: bool = Field(..., description="False quando só corresponde por caracteres que o OCR confunde")
+
+
+class WatchlistItem(BaseModel):
+    """Placa cadastrada em uma lista de alerta."""
+    placa: str = Field(..., description="Número da placa")
+    lista: str = Field("padrao", description="Lista de alerta (ex.: roubado, bloqueado)")
+    motivo: Optional[str] = Field(None, description="Motivo do cadastro")
+
+
 class PlacaBase(BaseModel):
     """Modelo base para placa."""
     placa: Optional[str] = Field(None, description="Número da placa do veículo")
@@ -14,6 +38,13 @@ class PlacaBase(BaseModel):
     image_base64: Optional[str] = Field(None, description="Imagem em base64")
     hora_entrada: Optional[str] = Field(None, description="Horário de entrada")
     hora_saida: Optional[str] = Field(None, description="Horário de saída")
+    nivel_qualidade: Optional[str] = Field(None, description="Nível de qualidade usado no reconhecimento")
+    camera_id: Optional[str] = Field(None, description="Identificador da câmera de origem")
+    espelhada: Optional[bool] = Field(None, description="Indica se o reconhecimento usou a imagem original espelhada")
+    confianca: Optional[float] = Field(None, description="Confiança do OCR (reconhecimento de múltiplas placas)")
+    bbox: Optional[BoundingBox] = Field(None, description="Posição da placa na imagem original (reconhecimento de múltiplas placas)")
+    image_url: Optional[str] = Field(None, description="URL para acessar a imagem original")
+    miniatura_url: Optional[str] = Field(None, description="URL da miniatura da imagem original")
 
 
 class PlacaCreate(BaseModel):
@@ -53,6 +84,31 @@ class ImageUploadResponse(BaseModel):
     success: bool = Field(True, description="Indica se o processamento foi bem-sucedido")
     message: Optional[str] = Field(None, description="Mensagem adicional")
     image_url: Optional[str] = Field(None, description="URL para acessar a imagem original")
+    nivel_qualidade: Optional[str] = Field(None, description="Nível de qualidade usado no reconhecimento")
+    alertas: List[AlertaWatchlist] = Field(default_factory=list, description="Listas de alerta em que a placa está")
+
+    class Config:
+        populate_by_name = True
+
+
+class PlacaDetectada(BaseModel):
+    """Placa encontrada no reconhecimento de múltiplas placas."""
+    id: Optional[str] = Field(None, alias="_id", description="ID único do registro")
+    placa: str = Field(..., description="Placa reconhecida")
+    confianca: float = Field(..., description="Confiança do OCR")
+    confianca_deteccao: float = Field(..., description="Confiança do detector")
+    bbox: BoundingBox = Field(..., description="Posição da placa na imagem original")
+    alertas: List[AlertaWatchlist] = Field(default_factory=list, description="Listas de alerta em que a placa está")
 
     class Config:
         populate_by_name = True
+
+
+class MultiplasPlacasResponse(BaseModel):
+    """Modelo de resposta para o reconhecimento de múltiplas placas."""
+    placas: List[PlacaDetectada] = Field(default_factory=list, description="Placas reconhecidas")
+    image_base64: Optional[str] = Field(None, description="Imagem anotada em base64")
+    success: bool = Field(True, description="Indica se alguma placa foi reconhecida")
+    message: Optional[str] = Field(None, description="Mensagem adicional")
+    image_url: Optional[str] = Field(None, description="URL para acessar a imagem original")
+    nivel_qualidade: Optional[str] = Field(None, description="Nível de qualidade usado no reconhecimento")
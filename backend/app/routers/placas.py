@@ -2,94 +2,240 @@
 Router para operações relacionadas a placas.
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 import cv2
-import numpy as np
 import base64
 from datetime import datetime
+import math
 import os
-import uuid
 
 from ..models.placa import (
+    AlertaWatchlist,
     PlacaResponse, 
     PlacaUpdate, 
     PlacaSearchRequest, 
-    ImageUploadResponse
+    ImageUploadResponse,
+    MultiplasPlacasResponse,
+    PlacaDetectada,
+    WatchlistItem
 )
 from ..services.database import db_service
+from ..services.eventos import hub_eventos
 from ..services.anpr_service import anpr_service
+from ..services.imagem import ImagemEntrada, extensao_imagem
+from ..services.ingestao import ANONIMO, EscalonadorIngestao, IngestaoRecusada
+from ..services.armazenamento import ArmazenamentoOriginais
+from ..services.cameras import RegistroCameras
+from ..services.exportacao import LOTE_MAXIMO, TIPOS_CONTEUDO, exportar
+from ..services.metricas import medir_etapa
+from ..services.miniaturas import Miniaturas, etag_arquivo, tipo_midia
+from ..services.serializacao import RespostaJSON, campos_modelo, projetar
+from ..services.watchlist import Watchlist
 
 router = APIRouter(prefix="/placas", tags=["placas"])
 
+MENSAGEM_SEM_MOVIMENTO = "Quadro ignorado: nenhum movimento na região de interesse da câmera"
+
+# Os arquivos servidos nunca mudam (nomes únicos por upload)
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+armazenamento = ArmazenamentoOriginais.from_env()
+miniaturas = Miniaturas.from_env()
+watchlist = Watchlist.from_env(db_service.db)
+ingestao = EscalonadorIngestao.from_env(RegistroCameras.from_env())
+
+# Campos de `PlacaResponse` no JSON, para as rotas de leitura que dispensam a revalidação
+CAMPOS_PLACA = campos_modelo(PlacaResponse)
+
+
+def _salvar_original(entrada: ImagemEntrada, extensao: str) -> tuple[str, str, Optional[int]]:
+    """
+    Salva a imagem original com os bytes recebidos, sem recodificar.
+    Um reenvio do mesmo arquivo reaproveita o original já salvo.
+    
+    Returns:
+        tuple: (nome do arquivo, caminho completo, marca da gravação ou None se
+            o arquivo já existia)
+    """
+    return armazenamento.salvar(entrada.dados, extensao)
+
+
+def _extensao_upload(dados: bytes, nome_arquivo: Optional[str]) -> str:
+    """Extensão do original: pelo conteúdo (JPEG/PNG) ou, nos demais formatos, pelo nome enviado."""
+    return extensao_imagem(dados, padrao=os.path.splitext(nome_arquivo or '')[1] or '.png')
+
+
+def _publicar_evento(tipo: str, placa: dict, **extras) -> None:
+    """Publica no fluxo de eventos um resumo do registro (sem a imagem em base64)."""
+    placa = _com_urls(dict(placa))
+    evento = {
+        campo: placa.get(campo)
+        for campo in ('placa', 'hora_entrada', 'hora_saida', 'camera_id', 'image_url', 'miniatura_url')
+    }
+    hub_eventos.publicar(tipo, {'_id': str(placa['_id']), **evento, **extras})
+
+
+def _alertas_watchlist(placa_data: dict) -> List[AlertaWatchlist]:
+    """Verifica a placa do registro nas listas de alerta (em memória) e publica as ocorrências."""
+    ocorrencias = watchlist.verificar(placa_data['placa'])
+    if not ocorrencias:
+        return []
+    watchlist.emitir(ocorrencias, placa_data)
+    return [AlertaWatchlist(**ocorrencia.para_dict()) for ocorrencia in ocorrencias]
+
+
+def _descartar_original(original_path: str, marca: int) -> None:
+    """
+    Remove a imagem original de um quadro que não gerou registro, a menos que
+    outra requisição com os mesmos bytes a tenha reaproveitado.
+    """
+    try:
+        armazenamento.descartar(original_path, marca)
+    except OSError as e:
+        print(f"Erro ao remover imagem original {original_path}: {e}")
+
+
+def _com_urls(placa: dict) -> dict:
+    """Acrescenta ao registro as URLs da imagem original e da sua miniatura."""
+    if placa.get('original_path'):
+        image_url = f"/api/v1/placas/images/{os.path.basename(placa['original_path'])}"
+        placa['image_url'] = image_url
+        placa['miniatura_url'] = f"{image_url}?size={miniaturas.tamanho_padrao}"
+    return placa
+
+
+def _resposta_placa(placa: dict) -> dict:
+    """Registro lido do banco no formato de `PlacaResponse`, sem revalidar o documento."""
+    return projetar(_com_urls(placa), CAMPOS_PLACA)
+
+
+def _identificar_dispositivo(request: Request, camera_id: Optional[str]) -> tuple[str, Optional[str]]:
+    """
+    Dispositivo de ingestão do envio e o `camera_id` a registrar (o da câmera
+    autenticada, se houver).
+    """
+    try:
+        dispositivo = ingestao.identificar(request.headers.get(ingestao.cabecalho), camera_id)
+    except IngestaoRecusada as e:
+        raise _recusa_ingestao(e)
+    return dispositivo, camera_id if dispositivo == ANONIMO else dispositivo
+
+
+def _recusa_ingestao(e: IngestaoRecusada) -> HTTPException:
+    headers = {'Retry-After': str(math.ceil(e.espera))} if e.espera else None
+    return HTTPException(status_code=e.status, detail=str(e), headers=headers)
+
+
+async def _reconhecer_e_registrar(
+    entrada: ImagemEntrada,
+    extensao: str,
+    filename: str,
+    camera_id: Optional[str]
+) -> ImageUploadResponse:
+    """
+    Salva a imagem original, reconhece a placa e persiste o registro.
+    """
+    # Salva a imagem original ANTES do reconhecimento
+    original_filename, original_path, marca_original = _salvar_original(entrada, extensao)
+    
+    # Reconhece a placa (fora do event loop, para não bloquear outras requisições)
+    resultado = await run_in_threadpool(
+        anpr_service.reconhecer_placa_detalhado, entrada, camera_id=camera_id
+    )
+    texto_placa, imagem_resultado = resultado.texto, resultado.imagem
+    
+    if resultado.sem_movimento:
+        # Quadro igual ao último processado da câmera: nada a registrar
+        if marca_original is not None:
+            _descartar_original(original_path, marca_original)
+        return ImageUploadResponse(
+            placa="",
+            image_base64="",
+            success=False,
+            message=MENSAGEM_SEM_MOVIMENTO,
+            nivel_qualidade=resultado.nivel_qualidade
+        )
+    
+    if not texto_placa or imagem_resultado is None:
+        raise HTTPException(status_code=400, detail="Não foi possível reconhecer uma placa na imagem")
+    
+    # Converte imagem resultado para base64
+    with medir_etapa("codificacao_png"):
+        _, buffer = cv2.imencode('.png', imagem_resultado)
+        img_base64 = base64.b64encode(buffer).decode('utf-8')
+    
+    # Salva no banco de dados
+    placa_data = {
+        'placa': texto_placa,
+        'filename': filename,
+        'original_path': original_path,
+        'image_base64': img_base64,
+        'hora_entrada': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'hora_saida': None,
+        'nivel_qualidade': resultado.nivel_qualidade,
+        'camera_id': camera_id,
+        'espelhada': entrada.espelhar
+    }
+    
+    placa_id = db_service.create_placa(placa_data)
+    alertas = _alertas_watchlist(placa_data)
+    _publicar_evento('placa_criada', placa_data, alertas=[alerta.model_dump() for alerta in alertas])
+    
+    return ImageUploadResponse(
+        id=placa_id,
+        placa=texto_placa,
+        image_base64=img_base64,
+        success=True,
+        message="Placa reconhecida com sucesso",
+        image_url=f"/api/v1/placas/images/{original_filename}",
+        nivel_qualidade=resultado.nivel_qualidade,
+        alertas=alertas
+    )
+
 
 @router.post("/upload_image", response_model=ImageUploadResponse)
 async def upload_image(
+    request: Request,
     image: UploadFile = File(...),
-    image_base64: str = Form(None)
+    image_base64: str = Form(None),
+    camera_id: Optional[str] = Form(None)
 ):
     """
     Upload de imagem para reconhecimento de placa.
     Suporta tanto upload de arquivo quanto imagem em base64 (captura de câmera).
+    O `camera_id` opcional identifica a câmera de origem. O quadro espera a vez
+    na fila do seu dispositivo de ingestão.
     """
+    dispositivo, camera_id = _identificar_dispositivo(request, camera_id)
+    try:
+        async with ingestao.vez(dispositivo):
+            return await _processar_upload(image, image_base64, camera_id)
+    except IngestaoRecusada as e:
+        raise _recusa_ingestao(e)
+
+
+async def _processar_upload(
+    image: UploadFile,
+    image_base64: Optional[str],
+    camera_id: Optional[str]
+) -> ImageUploadResponse:
     try:
         # Processa imagem da câmera (base64)
         if image_base64:
             try:
                 header, encoded = image_base64.split(",", 1)
                 image_data = base64.b64decode(encoded)
-                nparr = np.frombuffer(image_data, np.uint8)
-                imagem = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
                 
-                if imagem is None:
+                try:
+                    entrada = await run_in_threadpool(ImagemEntrada, image_data)
+                except ValueError:
                     raise HTTPException(status_code=400, detail="Erro ao processar imagem da câmera")
                 
-                # Gera nomes únicos para os arquivos
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                
-                # Nome do arquivo original
-                original_filename = f"{timestamp}_{unique_id}_webcam_original.png"
-                
-                # Caminhos dos arquivos
-                upload_folder = os.getenv('UPLOAD_FOLDER', 'uploads')
-                os.makedirs(upload_folder, exist_ok=True)
-                
-                original_path = os.path.join(upload_folder, original_filename)
-                
-                # Salva a imagem original ANTES do reconhecimento
-                cv2.imwrite(original_path, imagem)
-                
-                # Reconhece a placa
-                texto_placa, imagem_resultado = anpr_service.reconhecer_placa_robusto(imagem)
-                
-                if not texto_placa or imagem_resultado is None:
-                    raise HTTPException(status_code=400, detail="Não foi possível reconhecer uma placa na imagem")
-                
-                # Converte imagem resultado para base64
-                _, buffer = cv2.imencode('.png', imagem_resultado)
-                img_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # Salva no banco de dados
-                placa_data = {
-                    'placa': texto_placa,
-                    'filename': 'capturada_webcam.png',
-                    'original_path': original_path,
-                    'image_base64': img_base64,
-                    'hora_entrada': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'hora_saida': None
-                }
-                
-                placa_id = db_service.create_placa(placa_data)
-                
-                return ImageUploadResponse(
-                    id=placa_id,
-                    placa=texto_placa,
-                    image_base64=img_base64,
-                    success=True,
-                    message="Placa reconhecida com sucesso",
-                    image_url=f"/api/v1/placas/images/{original_filename}"
+                return await _reconhecer_e_registrar(
+                    entrada, extensao_imagem(image_data), 'capturada_webcam.png', camera_id
                 )
                 
             except Exception as e:
@@ -108,62 +254,145 @@ async def upload_image(
             
             # Lê o arquivo
             contents = await image.read()
-            nparr = np.frombuffer(contents, np.uint8)
-            imagem = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
-            if imagem is None:
+            # Decodifica em escala reduzida e espelha a imagem horizontalmente
+            try:
+                entrada = await run_in_threadpool(ImagemEntrada, contents, True)
+            except ValueError:
                 raise HTTPException(status_code=400, detail="Erro ao processar a imagem enviada")
             
-            # Espelha a imagem horizontalmente
-            imagem = cv2.flip(imagem, 1)
-            
-            # Gera nomes únicos para os arquivos
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_id = str(uuid.uuid4())[:8]
-            
-            # Nome do arquivo original
-            original_filename = f"{timestamp}_{unique_id}_original_{image.filename}"
-            
-            # Caminhos dos arquivos
-            upload_folder = os.getenv('UPLOAD_FOLDER', 'uploads')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            original_path = os.path.join(upload_folder, original_filename)
-            
-            # Salva a imagem original ANTES do reconhecimento
-            cv2.imwrite(original_path, imagem)
-            
-            print(f"Original path: {original_path}")
-            # Reconhece a placa
-            texto_placa, imagem_resultado = anpr_service.reconhecer_placa_robusto(imagem)
-            
-            if not texto_placa or imagem_resultado is None:
-                raise HTTPException(status_code=400, detail="Não foi possível reconhecer uma placa na imagem")
-            
-            # Converte imagem resultado para base64
-            _, buffer = cv2.imencode('.png', imagem_resultado)
+            return await _reconhecer_e_registrar(
+                entrada, _extensao_upload(contents, image.filename), image.filename, camera_id
+            )
+    
+    except HTTPException as e:
+        print(f"Erro HTTPException: {e}")
+        raise
+    except Exception as e:
+        print(f"Erro ao processar imagem: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
+
+
+@router.post("/upload_image/multiplas", response_model=MultiplasPlacasResponse)
+async def upload_image_multiplas(
+    request: Request,
+    image: UploadFile = File(None),
+    image_base64: str = Form(None),
+    camera_id: Optional[str] = Form(None)
+):
+    """
+    Upload de imagem para reconhecimento de todas as placas do quadro.
+    Pensado para câmeras de visão geral (ex.: estacionamento), com vários veículos
+    por quadro. Grava um registro por placa, em uma única escrita no banco.
+    A imagem não é espelhada e o `bbox` de cada placa está em pixels da imagem enviada.
+    """
+    dispositivo, camera_id = _identificar_dispositivo(request, camera_id)
+    try:
+        async with ingestao.vez(dispositivo):
+            return await _processar_upload_multiplas(image, image_base64, camera_id)
+    except IngestaoRecusada as e:
+        raise _recusa_ingestao(e)
+
+
+async def _processar_upload_multiplas(
+    image: Optional[UploadFile],
+    image_base64: Optional[str],
+    camera_id: Optional[str]
+) -> MultiplasPlacasResponse:
+    try:
+        if image_base64:
+            try:
+                header, encoded = image_base64.split(",", 1)
+                image_data = base64.b64decode(encoded)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Erro ao processar imagem da câmera: {str(e)}")
+            filename = 'capturada_webcam.png'
+            extensao = extensao_imagem(image_data)
+        else:
+            if not image:
+                raise HTTPException(status_code=400, detail="Nenhuma imagem foi enviada")
+            if not image.content_type.startswith('image/'):
+                raise HTTPException(status_code=400, detail="Arquivo deve ser uma imagem")
+            image_data = await image.read()
+            filename = image.filename
+            extensao = _extensao_upload(image_data, image.filename)
+        
+        try:
+            entrada = await run_in_threadpool(ImagemEntrada, image_data)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Erro ao processar a imagem enviada")
+        
+        original_filename, original_path, marca_original = _salvar_original(entrada, extensao)
+        
+        resultado = await run_in_threadpool(
+            anpr_service.reconhecer_multiplas_placas_detalhado, entrada, camera_id
+        )
+        image_url = f"/api/v1/placas/images/{original_filename}"
+        
+        if resultado.sem_movimento:
+            if marca_original is not None:
+                _descartar_original(original_path, marca_original)
+            return MultiplasPlacasResponse(
+                success=False,
+                message=MENSAGEM_SEM_MOVIMENTO,
+                nivel_qualidade=resultado.nivel_qualidade
+            )
+        
+        if not resultado.placas:
+            return MultiplasPlacasResponse(
+                success=False,
+                message="Nenhuma placa reconhecida na imagem",
+                image_url=image_url,
+                nivel_qualidade=resultado.nivel_qualidade
+            )
+        
+        with medir_etapa("codificacao_png"):
+            _, buffer = cv2.imencode('.png', resultado.imagem)
             img_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            # Salva no banco de dados
-            placa_data = {
-                'placa': texto_placa,
-                'filename': image.filename,
+        
+        # Um registro por placa, todos gravados de uma vez
+        hora_entrada = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        placas_data = [
+            {
+                'placa': placa['texto'],
+                'filename': filename,
                 'original_path': original_path,
                 'image_base64': img_base64,
-                'hora_entrada': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'hora_saida': None
+                'hora_entrada': hora_entrada,
+                'hora_saida': None,
+                'nivel_qualidade': resultado.nivel_qualidade,
+                'camera_id': camera_id,
+                'espelhada': entrada.espelhar,
+                'confianca': placa['confianca'],
+                'bbox': placa['bbox']
             }
-            
-            placa_id = db_service.create_placa(placa_data)
-            
-            return ImageUploadResponse(
+            for placa in resultado.placas
+        ]
+        placa_ids = db_service.create_placas(placas_data)
+        
+        detectadas = [
+            PlacaDetectada(
                 id=placa_id,
-                placa=texto_placa,
-                image_base64=img_base64,
-                success=True,
-                message="Placa reconhecida com sucesso",
-                image_url=f"/api/v1/placas/images/{original_filename}"
+                placa=placa['texto'],
+                confianca=placa['confianca'],
+                confianca_deteccao=placa['area_deteccao'],
+                bbox=placa['bbox'],
+                alertas=_alertas_watchlist(placa_data)
             )
+            for placa_id, placa, placa_data in zip(placa_ids, resultado.placas, placas_data)
+        ]
+        for detectada, placa_data in zip(detectadas, placas_data):
+            _publicar_evento('placa_criada', placa_data,
+                             alertas=[alerta.model_dump() for alerta in detectada.alertas])
+        
+        return MultiplasPlacasResponse(
+            placas=detectadas,
+            image_base64=img_base64,
+            success=True,
+            message=f"{len(placa_ids)} placa(s) reconhecida(s)",
+            image_url=image_url,
+            nivel_qualidade=resultado.nivel_qualidade
+        )
     
     except HTTPException as e:
         print(f"Erro HTTPException: {e}")
@@ -183,9 +412,11 @@ async def clear(placa_id: str):
         if not placa:
             raise HTTPException(status_code=404, detail="Placa não encontrada")
 
-        success = db_service.update_placa(placa_id, {"hora_saida": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+        hora_saida = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        success = db_service.update_placa(placa_id, {"hora_saida": hora_saida})
         if not success:
             raise HTTPException(status_code=500, detail="Erro ao atualizar placa")
+        _publicar_evento('placa_saida', {**placa, 'hora_saida': hora_saida})
 
         return {"message": "Saída registrada com sucesso", "_id": placa_id}
     except HTTPException as e:
@@ -202,11 +433,95 @@ async def get_all_placas(limit: int = 100):
     """
     try:
         placas = db_service.get_all_placas(limit)
-        return [PlacaResponse(**placa) for placa in placas]
+        return RespostaJSON([_resposta_placa(placa) for placa in placas])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar placas: {str(e)}")
 
 
+@router.get("/export")
+async def export_placas(
+    inicio: str,
+    fim: str,
+    formato: str = "csv",
+    incluir_imagens: bool = False,
+    batch_size: Optional[int] = Query(None, ge=1, le=LOTE_MAXIMO)
+):
+    """
+    Exporta os registros com `hora_entrada` em [inicio, fim) como CSV ou Parquet.
+    As datas são ISO (`2026-09-01` ou `2026-09-01T12:00:00`). O arquivo é gerado
+    em blocos a partir de um cursor do banco, com memória constante; a imagem
+    em base64 só é incluída com `incluir_imagens=true`.
+    """
+    try:
+        blocos = exportar(db_service, inicio, fim, formato, incluir_imagens, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    nome = f"placas_{inicio[:10]}_{fim[:10]}.{formato}"
+    return StreamingResponse(
+        blocos,
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'}
+    )
+
+
+@router.get("/eventos")
+async def eventos(request: Request):
+    """
+    Fluxo de Server-Sent Events com as mudanças nos registros: `placa_criada`,
+    `placa_saida`, `placa_atualizada` e `placa_removida`. Cada evento traz um
+    resumo do registro (id, placa, horários, câmera e URLs da imagem e da
+    miniatura), sem a imagem em base64. Ao reconectar com `Last-Event-ID`, os
+    eventos perdidos são reenviados; se não for possível, chega `recarregar`.
+    """
+    cliente = hub_eventos.conectar(request.headers.get('last-event-id'))
+    return StreamingResponse(
+        hub_eventos.transmitir(cliente),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/watchlist", response_model=List[WatchlistItem])
+async def listar_watchlist():
+    """
+    Lista as placas cadastradas nas listas de alerta.
+    """
+    try:
+        return [WatchlistItem(**item) for item in watchlist.listar()]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar watchlist: {str(e)}")
+
+
+@router.post("/watchlist", response_model=WatchlistItem)
+async def adicionar_watchlist(item: WatchlistItem):
+    """
+    Cadastra uma placa em uma lista de alerta. As leituras passam a ser verificadas
+    contra ela imediatamente neste worker e, nos demais, na próxima recarga.
+    """
+    try:
+        await run_in_threadpool(watchlist.adicionar, item.placa, item.lista, item.motivo)
+        return item
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao cadastrar na watchlist: {str(e)}")
+
+
+@router.delete("/watchlist/{placa}")
+async def remover_watchlist(placa: str, lista: Optional[str] = None):
+    """
+    Remove uma placa de uma lista de alerta (ou de todas, sem `lista`).
+    """
+    try:
+        removidos = await run_in_threadpool(watchlist.remover, placa, lista)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao remover da watchlist: {str(e)}")
+    if not removidos:
+        raise HTTPException(status_code=404, detail="Placa não encontrada na watchlist")
+    return {"message": f"{removidos} item(ns) removido(s) da watchlist"}
+
+
 @router.get("/admin/test")
 async def test_endpoint():
     """
@@ -216,26 +531,86 @@ async def test_endpoint():
 
 
 @router.get("/images/{filename}")
-async def get_image(filename: str):
+async def get_image(filename: str, request: Request, size: Optional[int] = None):
     """
     Serve uma imagem salva pelo sistema.
+    Com `size`, serve uma miniatura JPEG com esse lado maior (gerada na primeira vez).
+    Responde com ETag e cache imutável, `304 Not Modified` para `If-None-Match`
+    e `206 Partial Content` para um `Range` de bytes.
     """
     try:
-        upload_folder = os.getenv('UPLOAD_FOLDER', 'uploads')
-        image_path = os.path.join(upload_folder, filename)
-        
-        if not os.path.exists(image_path):
+        image_path = armazenamento.localizar(filename)
+        if image_path is None:
             raise HTTPException(status_code=404, detail="Imagem não encontrada")
         
-        return FileResponse(
-            path=image_path,
-            media_type="image/png",
-            filename=filename
-        )
+        if size is not None:
+            try:
+                image_path = await run_in_threadpool(miniaturas.obter, image_path, size)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        etag = await run_in_threadpool(etag_arquivo, image_path)
+        headers = {"ETag": etag, "Cache-Control": CACHE_IMUTAVEL, "Accept-Ranges": "bytes"}
+        
+        if _etag_corresponde(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        media_type = tipo_midia(image_path)
+        intervalo = request.headers.get("range")
+        # Com If-Range de outra versão, o arquivo inteiro é enviado
+        if intervalo and request.headers.get("if-range", etag) == etag:
+            return await run_in_threadpool(_resposta_parcial, image_path, intervalo, media_type, headers)
+        
+        return FileResponse(path=image_path, media_type=media_type, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao carregar imagem: {str(e)}")
 
 
+def _etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o cabeçalho If-None-Match (lista de ETags ou `*`) com o ETag atual."""
+    if not if_none_match:
+        return False
+    candidatos = [candidato.strip() for candidato in if_none_match.split(",")]
+    # Comparação fraca, como pede a RFC 9110 para If-None-Match
+    return "*" in candidatos or etag in (candidato.removeprefix("W/") for candidato in candidatos)
+
+
+def _resposta_parcial(caminho: str, intervalo: str, media_type: str, headers: dict) -> Response:
+    """Responde a um Range de um único intervalo de bytes (`bytes=inicio-fim`)."""
+    tamanho = os.path.getsize(caminho)
+    unidade, _, especificacao = intervalo.partition("=")
+    inicio_texto, separador, fim_texto = especificacao.strip().partition("-")
+    
+    try:
+        if unidade.strip() != "bytes" or not separador or "," in especificacao:
+            raise ValueError(intervalo)
+        if inicio_texto:
+            inicio = int(inicio_texto)
+            fim = min(int(fim_texto), tamanho - 1) if fim_texto else tamanho - 1
+        else:
+            # Sufixo: os últimos N bytes
+            inicio = max(0, tamanho - int(fim_texto))
+            fim = tamanho - 1
+    except ValueError:
+        # Intervalo em formato não suportado: ignora e envia o arquivo inteiro
+        return FileResponse(path=caminho, media_type=media_type, headers=headers)
+    
+    if inicio > fim or inicio >= tamanho:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{tamanho}"})
+    
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        conteudo = arquivo.read(fim - inicio + 1)
+    return Response(
+        content=conteudo,
+        status_code=206,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {inicio}-{fim}/{tamanho}"}
+    )
+
+
 @router.get("/admin/clean")
 async def clean_invalid_records():
     """
@@ -260,7 +635,7 @@ async def search_placa(search_request: PlacaSearchRequest):
         placa = db_service.get_placa_by_number(search_request.placa)
         if not placa:
             raise HTTPException(status_code=404, detail=f"A placa {search_request.placa} não foi encontrada no sistema")
-        return PlacaResponse(**placa)
+        return RespostaJSON(_resposta_placa(placa))
     except HTTPException:
         raise
     except Exception as e:
@@ -291,7 +666,8 @@ async def update_placa(placa_id: str, update_data: PlacaUpdate):
         
         # Retorna a placa atualizada
         placa_atualizada = db_service.get_placa_by_id(placa_id)
-        return PlacaResponse(**placa_atualizada)
+        _publicar_evento('placa_atualizada', placa_atualizada)
+        return PlacaResponse(**_com_urls(placa_atualizada))
         
     except HTTPException:
         raise
@@ -314,6 +690,7 @@ async def delete_placa(placa_id: str):
         success = db_service.delete_placa(placa_id)
         if not success:
             raise HTTPException(status_code=500, detail="Erro ao deletar placa")
+        hub_eventos.publicar('placa_removida', {'_id': placa_id})
         
         return {"message": "Registro excluído com sucesso"}
         
@@ -332,7 +709,7 @@ async def get_placa_by_id(placa_id: str):
         placa = db_service.get_placa_by_id(placa_id)
         if not placa:
             raise HTTPException(status_code=404, detail="Placa não encontrada")
-        return PlacaResponse(**placa)
+        return RespostaJSON(_resposta_placa(placa))
     except HTTPException:
         raise
     except Exception as e:
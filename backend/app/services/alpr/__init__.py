@@ -4,5 +4,14 @@ FastALPR package.
 
 from .alpr import ALPR, ALPRResult
 from .base import BaseDetector, BaseOCR, DetectionResult, OcrResult
+from .cascade_detector import CascadeDetector
 
-__all__ = ["ALPR", "ALPRResult", "BaseDetector", "BaseOCR", "DetectionResult", "OcrResult"]
+__all__ = [
+    "ALPR",
+    "ALPRResult",
+    "BaseDetector",
+    "BaseOCR",
+    "CascadeDetector",
+    "DetectionResult",
+    "OcrResult",
+]
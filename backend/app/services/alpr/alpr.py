@@ -4,7 +4,7 @@ ALPR module.
 
 import os
 import statistics
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from typing import Literal
 
@@ -14,9 +14,13 @@ import onnxruntime as ort
 from fast_plate_ocr.inference.hub import OcrModel
 from open_image_models.detection.core.hub import PlateDetectorModel
 
+from ..metricas import BLOCOS_DETECCAO, medir_etapa
 from .base import BaseDetector, BaseOCR, DetectionResult, OcrResult
 from .default_detector import DefaultDetector
 from .default_ocr import DefaultOCR
+from .tiling import make_tiles, merge_detections, shift_detections, tiles_with_edges
+
+DEFAULT_TILE_SIZE = 384
 
 # pylint: disable=too-many-arguments, too-many-locals
 # ruff: noqa: PLR0913
@@ -47,6 +51,7 @@ class ALPR:
         detector_conf_thresh: float = 0.4,
         detector_providers: Sequence[str | tuple[str, dict]] | None = None,
         detector_sess_options: ort.SessionOptions = None,
+        detector_model_path: str | os.PathLike | None = None,
         ocr_model: OcrModel | None = "cct-xs-v1-global-model",
         ocr_device: Literal["cuda", "cpu", "auto"] = "auto",
         ocr_providers: Sequence[str | tuple[str, dict]] | None = None,
@@ -54,6 +59,9 @@ class ALPR:
         ocr_model_path: str | os.PathLike | None = None,
         ocr_config_path: str | os.PathLike | None = None,
         ocr_force_download: bool = False,
+        tiling: bool = False,
+        tile_overlap: float = 0.2,
+        tile_min_edge_density: float = 0.002,
     ) -> None:
         """
         Initialize the ALPR system.
@@ -66,6 +74,8 @@ class ALPR:
             detector_conf_thresh: Confidence threshold for the detector.
             detector_providers: Execution providers for the detector.
             detector_sess_options: Session options for the detector.
+            detector_model_path: Custom model path for the detector (e.g. a quantized version of
+                `detector_model`). If None, the model is downloaded from the hub or cache.
             ocr_model: The name of the OCR model from the model hub. This can be none and
                 `ocr_model_path` and `ocr_config_path` parameters are expected to pass them to
                 `fast-plate-ocr` library.
@@ -78,6 +88,12 @@ class ALPR:
             ocr_config_path: Custom config path for the OCR. If None, the default configuration is
                 used.
             ocr_force_download: Whether to force download the OCR model.
+            tiling: Whether to detect on overlapping tiles at the detector input resolution, so
+                that small plates in high resolution frames are not lost when the frame is
+                letterboxed down. Can be overridden per call in `predict`.
+            tile_overlap: Fraction of each tile shared with its neighbours.
+            tile_min_edge_density: Tiles with a smaller fraction of edge pixels are considered
+                empty and skipped. Use 0 to run the detector on every tile.
         """
         # Initialize the detector
         self.detector = detector or DefaultDetector(
@@ -85,6 +101,7 @@ class ALPR:
             conf_thresh=detector_conf_thresh,
             providers=detector_providers,
             sess_options=detector_sess_options,
+            model_path=detector_model_path,
         )
 
         # Initialize the OCR
@@ -98,15 +115,57 @@ class ALPR:
             force_download=ocr_force_download,
         )
 
-    def predict(self, frame: np.ndarray | str) -> list[ALPRResult]:
+        self.tiling = tiling
+        self.tile_overlap = tile_overlap
+        self.tile_min_edge_density = tile_min_edge_density
+
+    def _detect_tiled(self, img: np.ndarray) -> list[DetectionResult]:
+        """
+        Detects on the whole frame and on its overlapping tiles in a single batch, then merges the
+        boxes with NMS across tiles. The whole frame keeps large plates that do not fit in a tile.
+        """
+        tile_size = self.detector.input_size or DEFAULT_TILE_SIZE
+        tiles = make_tiles(img.shape, tile_size, self.tile_overlap)
+        if len(tiles) == 1:
+            return self.detector.predict(img)
+
+        if self.tile_min_edge_density > 0:
+            flags = tiles_with_edges(img, tiles, self.tile_min_edge_density)
+            skipped = flags.count(False)
+            tiles = [tile for tile, keep in zip(tiles, flags) if keep]
+            if skipped:
+                BLOCOS_DETECCAO.labels(resultado="ignorado").inc(skipped)
+        BLOCOS_DETECCAO.labels(resultado="processado").inc(len(tiles))
+
+        batch = [img] + [img[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        results = self.detector.predict_batch(batch)
+
+        detections = list(results[0])
+        for (x1, y1, _, _), tile_detections in zip(tiles, results[1:]):
+            detections.extend(shift_detections(tile_detections, x1, y1))
+        return merge_detections(detections)
+
+    def predict(
+        self,
+        frame: np.ndarray | str,
+        ocr_frame: np.ndarray | Callable[[], np.ndarray] | None = None,
+        ocr_preprocess: Callable[[np.ndarray], np.ndarray] | None = None,
+        tiled: bool | None = None,
+    ) -> list[ALPRResult]:
         """
         Returns all recognized license plates from a frame.
 
         Parameters:
             frame: Unprocessed frame (Colors in order: BGR) or image path.
+            ocr_frame: Optional higher resolution version of `frame` to crop the plates from for
+                OCR. Bounding boxes are scaled from `frame` to `ocr_frame` coordinates. It can also
+                be a zero-argument callable, so that loading it is deferred until a plate is found.
+            ocr_preprocess: Optional function applied to each cropped plate before OCR.
+            tiled: Whether to use tiled detection for this frame. If None, uses `self.tiling`.
 
         Returns:
-            A list of ALPRResult objects containing detection and OCR results.
+            A list of ALPRResult objects containing detection and OCR results. Bounding boxes are
+            always in `frame` coordinates.
         """
         if isinstance(frame, str):
             img_path = frame
@@ -116,17 +175,43 @@ class ALPR:
         else:
             img = frame
 
-        plate_detections = self.detector.predict(img)
-        alpr_results: list[ALPRResult] = []
+        with medir_etapa("detector"):
+            if self.tiling if tiled is None else tiled:
+                plate_detections = self._detect_tiled(img)
+            else:
+                plate_detections = self.detector.predict(img)
+
+        crop_source = img
+        scale_x = scale_y = 1.0
+        if plate_detections and ocr_frame is not None:
+            crop_source = ocr_frame() if callable(ocr_frame) else ocr_frame
+            scale_x = crop_source.shape[1] / img.shape[1]
+            scale_y = crop_source.shape[0] / img.shape[0]
+
+        cropped_plates: list[np.ndarray | None] = []
         for detection in plate_detections:
             bbox = detection.bounding_box
-            x1, y1 = max(bbox.x1, 0), max(bbox.y1, 0)
-            x2, y2 = min(bbox.x2, img.shape[1]), min(bbox.y2, img.shape[0])
-            cropped_plate = img[y1:y2, x1:x2]
-            ocr_result = self.ocr.predict(cropped_plate)
-            alpr_result = ALPRResult(detection=detection, ocr=ocr_result)
-            alpr_results.append(alpr_result)
-        return alpr_results
+            x1, y1 = max(int(bbox.x1 * scale_x), 0), max(int(bbox.y1 * scale_y), 0)
+            x2 = min(int(round(bbox.x2 * scale_x)), crop_source.shape[1])
+            y2 = min(int(round(bbox.y2 * scale_y)), crop_source.shape[0])
+            cropped_plate = crop_source[y1:y2, x1:x2]
+            if not cropped_plate.size:
+                cropped_plates.append(None)
+                continue
+            if ocr_preprocess is not None:
+                cropped_plate = ocr_preprocess(cropped_plate)
+            cropped_plates.append(cropped_plate)
+
+        # All the plates of the frame go through the OCR in a single batched call
+        ocr_results: list[OcrResult | None] = []
+        if plate_detections:
+            with medir_etapa("ocr"):
+                ocr_results = self.ocr.predict_batch(cropped_plates)
+
+        return [
+            ALPRResult(detection=detection, ocr=ocr_result)
+            for detection, ocr_result in zip(plate_detections, ocr_results)
+        ]
 
     def draw_predictions(self, frame: np.ndarray | str) -> np.ndarray:
         """
@@ -149,7 +234,19 @@ class ALPR:
 
         # Get ALPR results using the ndarray
         alpr_results = self.predict(img)
+        return self.draw_results(img, alpr_results)
+
+    def draw_results(self, img: np.ndarray, alpr_results: Sequence[ALPRResult]) -> np.ndarray:
+        """
+        Draws already computed ALPR results on the frame, without running the models again.
 
+        Parameters:
+            img: The frame the results were computed on. It is modified in place.
+            alpr_results: Results returned by `predict` for this frame.
+
+        Returns:
+            The frame with detections and OCR results drawn.
+        """
         for result in alpr_results:
             detection = result.detection
             ocr_result = result.ocr
@@ -3,7 +3,7 @@ Base module.
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import numpy as np
 
@@ -27,6 +27,9 @@ class DetectionResult:
 class OcrResult:
     text: str
     confidence: float | list[float]
+    # Per-slot character probabilities, shape (max_plate_slots, len(alphabet))
+    probabilities: np.ndarray | None = field(default=None, compare=False, repr=False)
+    alphabet: str | None = None
 
 
 class BaseDetector(ABC):
@@ -34,9 +37,29 @@ class BaseDetector(ABC):
     def predict(self, frame: np.ndarray) -> list[DetectionResult]:
         """Perform detection on the input frame and return a list of detections."""
 
+    def predict_batch(self, frames: list[np.ndarray]) -> list[list[DetectionResult]]:
+        """Perform detection on several frames (e.g. the tiles of a large frame). Subclasses can
+        override it to run a single batched inference; the default calls `predict` for each
+        frame."""
+        return [self.predict(frame) for frame in frames]
+
+    @property
+    def input_size(self) -> int | None:
+        """Side of the square input of the model, in pixels, if known."""
+        return None
+
 
 class BaseOCR(ABC):
     @abstractmethod
     def predict(self, cropped_plate: np.ndarray) -> OcrResult | None:
         """Perform OCR on the cropped plate image and return the recognized text and character
         probabilities."""
+
+    def predict_batch(self, cropped_plates: list[np.ndarray | None]) -> list[OcrResult | None]:
+        """Perform OCR on several cropped plates. Subclasses can override it to run a single
+        batched inference; the default calls `predict` for each plate. `None` entries (empty
+        crops) give `None` results."""
+        return [
+            self.predict(cropped_plate) if cropped_plate is not None else None
+            for cropped_plate in cropped_plates
+        ]
@@ -0,0 +1,130 @@
+"""
+Cascade Detector module.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from ..metricas import CASCATA_DETECTOR, medir_etapa
+from .base import BaseDetector, BoundingBox, DetectionResult
+from .tiling import box_iou, shift_detections
+
+
+def _merge_regions(regions: list[tuple[int, int, int, int]]) -> list[tuple[int, int, int, int]]:
+    """Merges overlapping regions so that each pixel goes through the second stage once."""
+    merged: list[tuple[int, int, int, int]] = []
+    for region in sorted(regions):
+        x1, y1, x2, y2 = region
+        for i, (mx1, my1, mx2, my2) in enumerate(merged):
+            if x1 < mx2 and mx1 < x2 and y1 < my2 and my1 < y2:
+                merged[i] = (min(x1, mx1), min(y1, my1), max(x2, mx2), max(y2, my2))
+                break
+        else:
+            merged.append(region)
+    # A merge can make two regions overlap, repeat until stable
+    return merged if len(merged) == len(regions) else _merge_regions(merged)
+
+
+class CascadeDetector(BaseDetector):
+    """
+    Two-stage detector. A fast (usually low resolution) detector runs on every frame and a larger
+    or higher resolution detector runs only when the first one is in doubt:
+
+    - no detections: the second stage runs on the whole frame;
+    - detections below `doubt_thresh`: the second stage runs only on the regions around them, so
+      the plate covers a larger part of its input, and its detections replace the doubtful ones
+      they overlap. Doubtful detections that no second stage detection overlaps are kept, so the
+      cascade never returns fewer plates than the first stage alone.
+
+    Confident detections of the first stage are kept as they are. The average cost stays close to
+    the first stage, since most frames with a plate are resolved by it.
+    """
+
+    def __init__(
+        self,
+        first: BaseDetector,
+        second: BaseDetector,
+        doubt_thresh: float = 0.6,
+        region_scale: float = 3.0,
+        min_region_size: int = 96,
+        iou_thresh: float = 0.5,
+    ) -> None:
+        """
+        Initialize the CascadeDetector.
+
+        Parameters:
+            first: Detector that runs on every frame.
+            second: Detector that runs when the first one finds nothing or only low confidence
+                boxes.
+            doubt_thresh: First stage detections below this confidence are sent to the second
+                stage.
+            region_scale: Side of the region around a doubtful box, as a multiple of the box's
+                largest side.
+            min_region_size: Minimum side of a region, in pixels.
+            iou_thresh: Second stage detections overlapping a confident first stage detection by
+                more than this IoU are treated as duplicates.
+        """
+        self.first = first
+        self.second = second
+        self.doubt_thresh = doubt_thresh
+        self.region_scale = region_scale
+        self.min_region_size = min_region_size
+        self.iou_thresh = iou_thresh
+
+    @property
+    def input_size(self) -> int | None:
+        return self.first.input_size
+
+    def _region(self, bbox: BoundingBox, shape: Sequence[int]) -> tuple[int, int, int, int]:
+        height, width = shape[:2]
+        side = max(bbox.x2 - bbox.x1, bbox.y2 - bbox.y1) * self.region_scale
+        half = max(side, self.min_region_size) / 2
+        cx, cy = (bbox.x1 + bbox.x2) / 2, (bbox.y1 + bbox.y2) / 2
+        return (
+            max(int(cx - half), 0),
+            max(int(cy - half), 0),
+            min(int(round(cx + half)), width),
+            min(int(round(cy + half)), height),
+        )
+
+    def predict(self, frame: np.ndarray) -> list[DetectionResult]:
+        """
+        Perform detection on the input frame and return a list of detections.
+
+        Parameters:
+            frame: The input image/frame in which to detect license plates.
+
+        Returns:
+            A list of detection results in `frame` coordinates.
+        """
+        detections = self.first.predict(frame)
+        if not detections:
+            CASCATA_DETECTOR.labels(estagio="segundo_quadro").inc()
+            with medir_etapa("detector_cascata"):
+                return self.second.predict(frame)
+
+        confident = [d for d in detections if d.confidence >= self.doubt_thresh]
+        doubtful = [d for d in detections if d.confidence < self.doubt_thresh]
+        if not doubtful:
+            CASCATA_DETECTOR.labels(estagio="primeiro").inc()
+            return detections
+
+        CASCATA_DETECTOR.labels(estagio="segundo_regioes").inc()
+        refined: list[DetectionResult] = []
+        with medir_etapa("detector_cascata"):
+            regions = _merge_regions([self._region(d.bounding_box, frame.shape) for d in doubtful])
+            for x1, y1, x2, y2 in regions:
+                refined.extend(shift_detections(self.second.predict(frame[y1:y2, x1:x2]), x1, y1))
+
+        # Regions can include plates already found with confidence by the first stage
+        refined = [
+            r for r in refined
+            if all(box_iou(r.bounding_box, c.bounding_box) <= self.iou_thresh for c in confident)
+        ]
+        # Only replace where the second stage found something: a doubtful plate it missed stays
+        kept = [
+            d for d in doubtful
+            if all(box_iou(d.bounding_box, r.bounding_box) == 0 for r in refined)
+        ]
+        return confident + refined + kept
@@ -2,15 +2,22 @@
 Default Detector module.
 """
 
+import logging
+import os
 from collections.abc import Sequence
 
 import numpy as np
 import onnxruntime as ort
 from open_image_models import LicensePlateDetector
 from open_image_models.detection.core.hub import PlateDetectorModel
+from open_image_models.detection.core.yolo_v9.inference import YoloV9ObjectDetector
+from open_image_models.detection.core.yolo_v9.postprocess import convert_to_detection_result
+from open_image_models.detection.core.yolo_v9.preprocess import preprocess
 
 from .base import BaseDetector, BoundingBox, DetectionResult
 
+LOGGER = logging.getLogger(__name__)
+
 
 class DefaultDetector(BaseDetector):
     """
@@ -26,6 +33,7 @@ class DefaultDetector(BaseDetector):
         conf_thresh: float = 0.4,
         providers: Sequence[str | tuple[str, dict]] | None = None,
         sess_options: ort.SessionOptions = None,
+        model_path: str | os.PathLike | None = None,
     ) -> None:
         """
         Initialize the DefaultDetector with the specified parameters. Uses `open-image-models`'s
@@ -39,27 +47,36 @@ class DefaultDetector(BaseDetector):
                 providers are used.
             sess_options: Custom session options for ONNX Runtime. If None, default session options
                 are used.
+            model_path: Path to a custom ONNX detector (e.g. an INT8 quantized version of
+                `model_name`). It must have the same inputs and outputs as the hub models. If None,
+                the model is downloaded from the hub or cache.
         """
-        self.detector = LicensePlateDetector(
-            detection_model=model_name,
-            conf_thresh=conf_thresh,
-            providers=providers,
-            sess_options=sess_options,
-        )
-
-    def predict(self, frame: np.ndarray) -> list[DetectionResult]:
-        """
-        Perform detection on the input frame and return a list of detections.
+        if model_path is not None:
+            self.detector = YoloV9ObjectDetector(
+                model_path=model_path,
+                class_labels=["License Plate"],
+                conf_thresh=conf_thresh,
+                providers=providers,
+                sess_options=sess_options,
+            )
+        else:
+            self.detector = LicensePlateDetector(
+                detection_model=model_name,
+                conf_thresh=conf_thresh,
+                providers=providers,
+                sess_options=sess_options,
+            )
+        # The hub models are exported with a fixed batch size of 1
+        batch_dim = self.detector.model.get_inputs()[0].shape[0]
+        self.dynamic_batch = not isinstance(batch_dim, int)
 
-        Parameters:
-            frame: The input image/frame in which to detect license plates.
+    @property
+    def input_size(self) -> int:
+        return self.detector.img_size[0]
 
-        Returns:
-            A list of detection results, each containing the label,
-            confidence, and bounding box of a detected license plate.
-        """
-        detections = self.detector.predict(frame)
-        detection_results = [
+    @staticmethod
+    def _convert(detections) -> list[DetectionResult]:
+        return [
             DetectionResult(
                 label=detection.label,
                 confidence=detection.confidence,
@@ -72,4 +89,55 @@ class DefaultDetector(BaseDetector):
             )
             for detection in detections
         ]
-        return detection_results
+
+    def predict(self, frame: np.ndarray) -> list[DetectionResult]:
+        """
+        Perform detection on the input frame and return a list of detections.
+
+        Parameters:
+            frame: The input image/frame in which to detect license plates.
+
+        Returns:
+            A list of detection results, each containing the label,
+            confidence, and bounding box of a detected license plate.
+        """
+        return self._convert(self.detector.predict(frame))
+
+    def predict_batch(self, frames: list[np.ndarray]) -> list[list[DetectionResult]]:
+        """
+        Perform detection on several frames. If the model has a dynamic batch dimension, all the
+        frames go through a single ONNX Runtime call; otherwise they run one at a time.
+
+        Parameters:
+            frames: The input images/frames.
+
+        Returns:
+            A list of detection results for each frame, in the coordinates of that frame.
+        """
+        if len(frames) < 2 or not self.dynamic_batch:
+            return super().predict_batch(frames)
+
+        detector = self.detector
+        prepared = [preprocess(frame, detector.img_size) for frame in frames]
+        inputs = np.concatenate([inputs for inputs, _, _ in prepared])
+        try:
+            predictions = detector.model.run([detector.output_name], {detector.input_name: inputs})[0]
+        # pylint: disable=broad-except
+        except Exception as e:
+            LOGGER.warning("Batched detection failed, running frames one at a time: %s", e)
+            return super().predict_batch(frames)
+
+        # The end-to-end models output [batch index, x1, y1, x2, y2, class, score] rows
+        batch_index = predictions[:, 0].astype(int)
+        return [
+            self._convert(
+                convert_to_detection_result(
+                    predictions=predictions[batch_index == i],
+                    class_labels=detector.class_labels,
+                    ratio=ratio,
+                    padding=padding,
+                    score_threshold=detector.conf_thresh,
+                )
+            )
+            for i, (_, ratio, padding) in enumerate(prepared)
+        ]
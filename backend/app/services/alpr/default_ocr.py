@@ -10,6 +10,8 @@ import cv2
 import numpy as np
 import onnxruntime as ort
 from fast_plate_ocr import LicensePlateRecognizer
+from fast_plate_ocr.core.process import preprocess_image, resize_image
+from fast_plate_ocr.inference import hub
 from fast_plate_ocr.inference.hub import OcrModel
 
 from .base import BaseOCR, OcrResult
@@ -48,10 +50,13 @@ class DefaultOCR(BaseOCR):
             model_path: Path to a custom OCR model file. If None, the model is downloaded from the
              hub or cache.
             config_path: Path to a custom configuration file. If None, the default configuration is
-             used.
+             used. When only `model_path` is given (e.g. an INT8 quantized version of
+             `hub_ocr_model`), the configuration of `hub_ocr_model` is used.
             force_download: If True, forces the download of the model and overwrites any existing
              files.
         """
+        if model_path and not config_path and hub_ocr_model:
+            _, config_path = hub.download_model(model_name=hub_ocr_model, force_download=force_download)
         self.ocr_model = LicensePlateRecognizer(
             hub_ocr_model=hub_ocr_model,
             device=device,
@@ -70,19 +75,66 @@ class DefaultOCR(BaseOCR):
             cropped_plate: The cropped image of the license plate in BGR format.
 
         Returns:
-            OcrResult: An object containing the recognized text and per-character confidence.
+            OcrResult: An object containing the recognized text, its mean confidence and the full
+                per-slot character probability matrix.
         """
         if cropped_plate is None:
             return None
-        if self.ocr_model.config.image_color_mode == "grayscale":
-            cropped_plate = cv2.cvtColor(cropped_plate, cv2.COLOR_BGR2GRAY)
-        plate_text, probabilities = self.ocr_model.run(cropped_plate, return_confidence=True)
-        if not isinstance(plate_text, list):
-            raise TypeError(f"Expected plate_text to be a list, got {type(plate_text).__name__}")
-        if not isinstance(probabilities, np.ndarray):
-            raise TypeError(
-                f"Expected probabilities to be a numpy ndarray, got {type(probabilities).__name__}"
+        return self.predict_batch([cropped_plate])[0]
+
+    def predict_batch(self, cropped_plates: list[np.ndarray | None]) -> list[OcrResult | None]:
+        """
+        Perform OCR on several cropped license plates with a single model call.
+
+        Parameters:
+            cropped_plates: Cropped images of the license plates in BGR format.
+
+        Returns:
+            One OcrResult per plate, in the same order (None for `None` inputs).
+        """
+        config = self.ocr_model.config
+        resized = []
+        for cropped_plate in cropped_plates:
+            if cropped_plate is None:
+                continue
+            if config.image_color_mode == "grayscale":
+                cropped_plate = cv2.cvtColor(cropped_plate, cv2.COLOR_BGR2GRAY)
+            resized.append(
+                resize_image(
+                    cropped_plate,
+                    config.img_height,
+                    config.img_width,
+                    image_color_mode=config.image_color_mode,
+                    keep_aspect_ratio=config.keep_aspect_ratio,
+                    interpolation_method=config.interpolation,
+                    padding_color=config.padding_color,
+                )
+            )
+        if not resized:
+            return [None] * len(cropped_plates)
+
+        # Same preprocessing as `LicensePlateRecognizer.run`, but the model is called directly so
+        # the full (slots, alphabet) probability matrix is kept instead of only the max per slot
+        model_input = preprocess_image(np.stack(resized))
+        model_output = self.ocr_model.model.run(None, {"input": model_input})[0]
+        probabilities = model_output.reshape((-1, config.max_plate_slots, len(config.alphabet)))
+        alphabet = np.array(list(config.alphabet))
+        plate_texts = ["".join(chars) for chars in alphabet[np.argmax(probabilities, axis=-1)]]
+        confidences = np.mean(np.max(probabilities, axis=-1), axis=-1)
+
+        results: list[OcrResult | None] = []
+        index = 0
+        for cropped_plate in cropped_plates:
+            if cropped_plate is None:
+                results.append(None)
+                continue
+            results.append(
+                OcrResult(
+                    text=plate_texts[index].replace(config.pad_char, ""),
+                    confidence=float(confidences[index]),
+                    probabilities=probabilities[index],
+                    alphabet=config.alphabet,
+                )
             )
-        # fast_plate_ocr uses '_' padding symbol
-        plate_text = plate_text.pop().replace("_", "")
-        return OcrResult(text=plate_text, confidence=float(np.mean(probabilities)))
+            index += 1
+        return results
@@ -0,0 +1,148 @@
+"""
+Tiling module.
+
+Helpers for detecting small plates in high resolution frames: the frame is split into overlapping
+tiles at the detector input resolution, tiles without any structure are skipped, and the
+detections of all tiles are merged back in frame coordinates.
+"""
+
+from collections.abc import Sequence
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from .base import BoundingBox, DetectionResult
+
+Tile = tuple[int, int, int, int]
+
+
+def box_iou(a: BoundingBox, b: BoundingBox) -> float:
+    """Intersection over union of two boxes."""
+    inter = _intersection(a, b)
+    if not inter:
+        return 0.0
+    union = _area(a) + _area(b) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _area(box: BoundingBox) -> int:
+    return max(box.x2 - box.x1, 0) * max(box.y2 - box.y1, 0)
+
+
+def _intersection(a: BoundingBox, b: BoundingBox) -> int:
+    inter_w = min(a.x2, b.x2) - max(a.x1, b.x1)
+    inter_h = min(a.y2, b.y2) - max(a.y1, b.y1)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0
+    return inter_w * inter_h
+
+
+def _origins(length: int, tile_size: int, stride: int) -> list[int]:
+    if length <= tile_size:
+        return [0]
+    # The last tile is aligned with the border, so every tile has the full size
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def make_tiles(shape: Sequence[int], tile_size: int, overlap: float) -> list[Tile]:
+    """
+    Splits a frame into overlapping tiles.
+
+    Parameters:
+        shape: Frame shape (height, width, ...).
+        tile_size: Side of each tile, in pixels (usually the detector input size).
+        overlap: Fraction of the tile shared with its neighbours, so that a plate cut by one tile
+            border is whole in the next tile.
+
+    Returns:
+        A list of tiles (x1, y1, x2, y2) in frame coordinates.
+    """
+    height, width = shape[:2]
+    stride = max(int(tile_size * (1 - overlap)), 1)
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in _origins(height, tile_size, stride)
+        for x in _origins(width, tile_size, stride)
+    ]
+
+
+def tiles_with_edges(
+    frame: np.ndarray,
+    tiles: Sequence[Tile],
+    min_edge_density: float,
+    scale: int = 4,
+    edge_thresh: int = 40,
+) -> list[bool]:
+    """
+    Cheap check of which tiles can contain a plate. Plate characters produce strong horizontal
+    gradients; tiles where almost no pixel has one (sky, walls, empty asphalt) are skipped.
+
+    Parameters:
+        frame: The frame the tiles were made for.
+        tiles: Tiles returned by `make_tiles`.
+        min_edge_density: Minimum fraction of edge pixels for a tile to be kept.
+        scale: Downscale factor applied to the frame before computing gradients.
+        edge_thresh: Minimum gradient magnitude (0-255) of an edge pixel.
+
+    Returns:
+        One flag per tile, True if the tile must go through the detector.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height, width = gray.shape[:2]
+    small = cv2.resize(
+        gray, (max(width // scale, 1), max(height // scale, 1)), interpolation=cv2.INTER_AREA
+    )
+    gradient = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0, ksize=3))
+    edges = (gradient > edge_thresh).astype(np.uint8)
+    integral = cv2.integral(edges)
+
+    flags = []
+    for x1, y1, x2, y2 in tiles:
+        sx1, sy1 = x1 // scale, y1 // scale
+        sx2, sy2 = max(x2 // scale, sx1 + 1), max(y2 // scale, sy1 + 1)
+        count = integral[sy2, sx2] - integral[sy1, sx2] - integral[sy2, sx1] + integral[sy1, sx1]
+        flags.append(count >= min_edge_density * (sx2 - sx1) * (sy2 - sy1))
+    return flags
+
+
+def shift_detections(detections: Sequence[DetectionResult], dx: int, dy: int) -> list[DetectionResult]:
+    """Moves detections made on a tile to frame coordinates."""
+    shifted = []
+    for detection in detections:
+        bbox = detection.bounding_box
+        bbox = replace(bbox, x1=bbox.x1 + dx, y1=bbox.y1 + dy, x2=bbox.x2 + dx, y2=bbox.y2 + dy)
+        shifted.append(replace(detection, bounding_box=bbox))
+    return shifted
+
+
+def merge_detections(
+    detections: Sequence[DetectionResult],
+    iou_thresh: float = 0.5,
+    containment_thresh: float = 0.7,
+) -> list[DetectionResult]:
+    """
+    Non-maximum suppression across tiles. Besides the usual IoU criterion, a box mostly contained
+    in a more confident one is dropped, since a plate cut by a tile border gives a partial box that
+    has a low IoU with the whole plate found in the neighbouring tile.
+
+    Parameters:
+        detections: Detections of all tiles, in frame coordinates.
+        iou_thresh: IoU above which the less confident box is dropped.
+        containment_thresh: Fraction of a box's area inside a more confident box above which it is
+            dropped.
+
+    Returns:
+        The kept detections, ordered by decreasing confidence.
+    """
+    kept: list[DetectionResult] = []
+    for detection in sorted(detections, key=lambda d: d.confidence, reverse=True):
+        box = detection.bounding_box
+        area = _area(box)
+        if all(
+            box_iou(box, other.bounding_box) <= iou_thresh
+            and (not area or _intersection(box, other.bounding_box) / area <= containment_thresh)
+            for other in kept
+        ):
+            kept.append(detection)
+    return kept
@@ -6,38 +6,166 @@ Versão otimizada com detecção especializada e OCR de alta performance.
 
 import cv2
 import numpy as np
+import os
 import re
-from typing import Tuple, Optional
+import threading
+from dataclasses import dataclass, replace
+from typing import Iterator, Tuple, Optional, Sequence
 import logging
 
-from .alpr import ALPR, ALPRResult
+from .alpr import ALPR, ALPRResult, CascadeDetector
+from .alpr.default_detector import DefaultDetector
+from .buffers import BuffersVariantes, PoolBuffers
+from .cameras import RegistroCameras, escalar_retangulo, mapear_para_quadro
+from .decodificador_placa import decodificar_placa
+from .imagem import ImagemEntrada
+from .movimento import FiltroMovimento
+from .metricas import (
+    DURACAO_RECONHECIMENTO,
+    FILA_RECONHECIMENTO,
+    RECONHECIMENTOS,
+    ESTRATEGIAS_TENTADAS,
+    VITORIAS_ESTRATEGIA,
+    medir_etapa,
+)
+from .qualidade import ControladorQualidade, NIVEL_COMPLETO, NIVEL_REDUZIDO, NIVEL_MINIMO
+from .selecao_estrategias import SeletorEstrategias
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Modelos do FastALPR
+MODELO_DETECTOR = "yolo-v9-t-384-license-plate-end2end"
+MODELO_OCR = "cct-xs-v1-global-model"
+# Threshold reduzido de 0.4 para 0.25 para detectar mais placas
+LIMIAR_DETECTOR = 0.25
+
+# Variantes de pré-processamento, na ordem em que são tentadas
+ESTRATEGIAS = ("original", "clahe", "nitidez", "contraste", "clahe_nitidez")
+
+# Variantes tentadas em cada nível de qualidade
+ESTRATEGIAS_POR_NIVEL = {
+    NIVEL_COMPLETO: ESTRATEGIAS,
+    NIVEL_REDUZIDO: ("original", "clahe"),
+    NIVEL_MINIMO: ("original",),
+}
+
+# Kernel de nitidez (sharpening)
+KERNEL_NITIDEZ = np.array([[-1, -1, -1],
+                           [-1,  9, -1],
+                           [-1, -1, -1]])
+
+# Padrões de placa, compilados uma única vez
+PADRAO_MERCOSUL = re.compile(r'[A-Z]{3}[0-9][A-Z][0-9]{2}')
+PADRAO_ANTIGO = re.compile(r'[A-Z]{3}[0-9]{4}')
+PADRAO_ANTIGO_HIFEN = re.compile(r'[A-Z]{3}-[0-9]{4}')
+PADRAO_GENERICO = re.compile(r'[A-Z0-9]{7}')
+
+# Correções de caracteres frequentemente confundidos pelo OCR
+LETRA_PARA_NUMERO = {'O': '0', 'I': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'}
+NUMERO_PARA_LETRA = {'0': 'O', '1': 'I', '2': 'Z', '5': 'S', '6': 'G', '8': 'B'}
+
+
+@dataclass
+class ResultadoReconhecimento:
+    """Resultado detalhado de um reconhecimento."""
+    texto: Optional[str]
+    imagem: Optional[np.ndarray]
+    confianca: float = 0.0
+    nivel_qualidade: str = NIVEL_COMPLETO
+    estrategia: Optional[str] = None
+    # Quadro ignorado pelo filtro de movimento (nada mudou na ROI)
+    sem_movimento: bool = False
+
+
+@dataclass
+class ResultadoMultiplasPlacas:
+    """Resultado do reconhecimento de todas as placas de uma imagem."""
+    placas: list[dict]
+    imagem: Optional[np.ndarray]
+    nivel_qualidade: str = NIVEL_COMPLETO
+    # Quadro ignorado pelo filtro de movimento (nada mudou na ROI)
+    sem_movimento: bool = False
+
 
 class ANPRService:
     """Serviço para reconhecimento automático de placas usando FastALPR."""
     
     def __init__(self):
         """Inicializa o serviço ANPR com FastALPR."""
+        self.modelo_detector = os.getenv('ANPR_MODELO_DETECTOR') or MODELO_DETECTOR
+        self.modelo_cascata = os.getenv('ANPR_DETECTOR_CASCATA') or None
         try:
             logger.info("Inicializando FastALPR...")
+            # "auto" usa GPU se disponível, senão CPU
+            dispositivo = os.getenv('ANPR_DISPOSITIVO', 'auto')
+            providers = ["CPUExecutionProvider"] if dispositivo == "cpu" else None
             # Inicializa o sistema ALPR com configurações otimizadas
-            # Threshold reduzido de 0.4 para 0.25 para detectar mais placas
             self.alpr = ALPR(
-                detector_model="yolo-v9-t-384-license-plate-end2end",
-                detector_conf_thresh=0.25,  # Reduzido para detectar mais placas
-                ocr_model="cct-xs-v1-global-model",
-                ocr_device="auto",  # Usa GPU se disponível, senão CPU
-                ocr_force_download=False  # Usa cache se disponível
+                detector=self._criar_cascata(providers),
+                detector_model=self.modelo_detector,
+                detector_conf_thresh=LIMIAR_DETECTOR,
+                detector_providers=providers,
+                ocr_model=MODELO_OCR,
+                ocr_device=dispositivo,
+                # Modelos alternativos (ex.: INT8 gerados por benchmarks.quantizacao)
+                detector_model_path=os.getenv('ANPR_CAMINHO_DETECTOR') or None,
+                ocr_model_path=os.getenv('ANPR_CAMINHO_OCR') or None,
+                ocr_config_path=os.getenv('ANPR_CAMINHO_OCR_CONFIG') or None,
+                ocr_force_download=False,  # Usa cache se disponível
+                # Detecção em blocos para quadros de alta resolução (câmeras de visão geral)
+                tiling=os.getenv('ANPR_DETECCAO_BLOCOS', '0').lower() in ('1', 'true', 'sim'),
+                tile_overlap=float(os.getenv('ANPR_BLOCOS_SOBREPOSICAO', '0.2')),
+                tile_min_edge_density=float(os.getenv('ANPR_BLOCOS_DENSIDADE_BORDAS', '0.002')),
             )
             logger.info("FastALPR inicializado com sucesso!")
         except Exception as e:
             logger.error(f"Erro ao inicializar FastALPR: {e}")
             self.alpr = None
 
+        # Escolhe o nível de qualidade conforme a carga
+        self.controlador_qualidade = ControladorQualidade.from_env()
+        # Aprende a ordem das estratégias de pré-processamento por câmera/hora
+        self.seletor_estrategias = SeletorEstrategias.from_env()
+        # Regiões de interesse e máscaras por câmera
+        self.registro_cameras = RegistroCameras.from_env()
+        # Ignora quadros de câmeras fixas em que nada mudou desde o último processado
+        self.filtro_movimento = FiltroMovimento.from_env()
+        # Buffers do pré-processamento reaproveitados entre requisições
+        self.pool_buffers = PoolBuffers.from_env()
+        # Objetos CLAHE por thread (não são thread-safe)
+        self._locais = threading.local()
+
+    def _criar_cascata(self, providers) -> Optional[CascadeDetector]:
+        """
+        Cascata de detectores, se `ANPR_DETECTOR_CASCATA` estiver definido.
+        
+        O detector principal roda em todos os quadros; o modelo da cascata (maior
+        ou de resolução mais alta) só roda quando o principal não encontra nada
+        ou só encontra caixas abaixo de `ANPR_CASCATA_LIMIAR_DUVIDA`, e nesse
+        caso apenas na região em volta delas.
+        """
+        if self.modelo_cascata is None:
+            return None
+        
+        logger.info(f"Cascata de detectores: {self.modelo_detector} -> {self.modelo_cascata}")
+        return CascadeDetector(
+            first=DefaultDetector(
+                model_name=self.modelo_detector,
+                conf_thresh=LIMIAR_DETECTOR,
+                providers=providers,
+                model_path=os.getenv('ANPR_CAMINHO_DETECTOR') or None,
+            ),
+            second=DefaultDetector(
+                model_name=self.modelo_cascata,
+                conf_thresh=LIMIAR_DETECTOR,
+                providers=providers,
+                model_path=os.getenv('ANPR_CAMINHO_DETECTOR_CASCATA') or None,
+            ),
+            doubt_thresh=float(os.getenv('ANPR_CASCATA_LIMIAR_DUVIDA', '0.6')),
+        )
+
     def corrigir_caracteres_similares(self, texto: str) -> str:
         """
         Corrige caracteres frequentemente confundidos pelo OCR em placas.
@@ -52,21 +180,15 @@ class ANPRService:
         if not texto:
             return texto
             
-        # Mapeamento de correções comuns em placas brasileiras
-        correcoes = {
-            'O': '0', 'I': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'
-        }
-        
         texto_corrigido = ""
         for i, char in enumerate(texto):
             if len(texto) == 7:  # Placas brasileiras têm 7 caracteres
                 if i < 3:  # Primeiras 3 posições são letras
                     if char.isdigit():
-                        inv_map = {'0': 'O', '1': 'I', '2': 'Z', '5': 'S', '6': 'G', '8': 'B'}
-                        char = inv_map.get(char, char)
+                        char = NUMERO_PARA_LETRA.get(char, char)
                 elif i == 3 or i >= 5:  # Posições de números
                     if char.isalpha():
-                        char = correcoes.get(char, char)
+                        char = LETRA_PARA_NUMERO.get(char, char)
             
             texto_corrigido += char
         
@@ -83,86 +205,162 @@ class ANPRService:
         texto_limpo = "".join(texto_bruto.split()).upper()
         
         # Padrão Mercosul (AAA1B23)
-        match_mercosul = re.search(r'[A-Z]{3}[0-9][A-Z][0-9]{2}', texto_limpo)
+        match_mercosul = PADRAO_MERCOSUL.search(texto_limpo)
         if match_mercosul:
             return self.corrigir_caracteres_similares(match_mercosul.group(0))
         
         # Padrão antigo (AAA1234)
         texto_sem_hifen = texto_limpo.replace('-', '')
-        match_antigo = re.search(r'[A-Z]{3}[0-9]{4}', texto_sem_hifen)
+        match_antigo = PADRAO_ANTIGO.search(texto_sem_hifen)
         if match_antigo:
             return self.corrigir_caracteres_similares(match_antigo.group(0))
         
         # Padrão antigo com hífen (AAA-1234)
-        match_antigo_hifen = re.search(r'[A-Z]{3}-[0-9]{4}', texto_limpo)
+        match_antigo_hifen = PADRAO_ANTIGO_HIFEN.search(texto_limpo)
         if match_antigo_hifen:
             return match_antigo_hifen.group(0)
             
         # Fallback genérico
-        match_generico = re.search(r'[A-Z0-9]{7}', texto_limpo)
+        match_generico = PADRAO_GENERICO.search(texto_limpo)
         if match_generico and len(texto_limpo) < 15:
             return self.corrigir_caracteres_similares(match_generico.group(0))
 
         return None
 
-    def preprocessar_imagem(self, imagem: np.ndarray) -> list[np.ndarray]:
+    def preprocessar_imagem(self, imagem: np.ndarray,
+                            estrategias: Optional[Sequence[str]] = None) -> list[np.ndarray]:
         """
         Pré-processa a imagem com diferentes técnicas para melhorar a detecção.
         
         Args:
             imagem: Imagem original
+            estrategias: Variantes a gerar (ver `ESTRATEGIAS`). Se None, gera todas.
             
         Returns:
-            Lista de imagens pré-processadas
+            Lista de imagens pré-processadas, na ordem de `estrategias`
         """
-        imagens_processadas = [imagem]  # Sempre inclui a original
-        
-        # 1. Ajuste de brilho e contraste (CLAHE)
-        lab = cv2.cvtColor(imagem, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l = clahe.apply(l)
-        imagem_clahe = cv2.merge([l, a, b])
-        imagem_clahe = cv2.cvtColor(imagem_clahe, cv2.COLOR_LAB2BGR)
-        imagens_processadas.append(imagem_clahe)
-        
-        # 2. Sharpening (nitidez)
-        kernel_sharpen = np.array([[-1, -1, -1],
-                                   [-1,  9, -1],
-                                   [-1, -1, -1]])
-        imagem_sharp = cv2.filter2D(imagem, -1, kernel_sharpen)
-        imagens_processadas.append(imagem_sharp)
-        
-        # 3. Aumento de contraste
-        alpha = 1.5  # Contraste
-        beta = 10    # Brilho
-        imagem_contraste = cv2.convertScaleAbs(imagem, alpha=alpha, beta=beta)
-        imagens_processadas.append(imagem_contraste)
-        
-        # 4. Combinação CLAHE + Sharpening
-        lab_sharp = cv2.cvtColor(imagem_sharp, cv2.COLOR_BGR2LAB)
-        l_sharp, a_sharp, b_sharp = cv2.split(lab_sharp)
-        l_sharp = clahe.apply(l_sharp)
-        imagem_combinada = cv2.merge([l_sharp, a_sharp, b_sharp])
-        imagem_combinada = cv2.cvtColor(imagem_combinada, cv2.COLOR_LAB2BGR)
-        imagens_processadas.append(imagem_combinada)
-        
-        return imagens_processadas
+        # Cada variante precisa do próprio array, já que a lista guarda todas
+        return [
+            variante if variante is imagem else variante.copy()
+            for _, variante in self.gerar_variantes(imagem, estrategias)
+        ]
     
-    def validar_tamanho_placa(self, bbox, imagem_shape: tuple) -> bool:
+    def gerar_variantes(self, imagem: np.ndarray,
+                        estrategias: Optional[Sequence[str]] = None,
+                        buffers: Optional[BuffersVariantes] = None) -> Iterator[Tuple[str, np.ndarray]]:
+        """
+        Gera as variantes pré-processadas sob demanda, uma de cada vez.
+        
+        Variantes que não chegam a ser consumidas não são calculadas. As
+        variantes são escritas em `buffers` (operações com `dst=`), então cada
+        variante entregue só é válida até a próxima ser gerada: quem precisar
+        guardá-la deve copiá-la.
+        
+        Args:
+            imagem: Imagem original
+            estrategias: Variantes a gerar (ver `ESTRATEGIAS`). Se None, gera todas.
+            buffers: Buffers de trabalho do tamanho de `imagem` (ex.: emprestados
+                de `pool_buffers`). Se None, são alocados para esta chamada.
+            
+        Yields:
+            tuple: (nome da estratégia, imagem pré-processada)
+        """
+        if estrategias is None:
+            estrategias = ESTRATEGIAS
+        if buffers is None or buffers.forma != imagem.shape:
+            buffers = BuffersVariantes(imagem.shape)
+        
+        imagem_sharp = None
+        
+        for estrategia in estrategias:
+            with medir_etapa("preprocessamento"):
+                if estrategia == "original":
+                    variante = imagem
+                
+                elif estrategia == "clahe":
+                    # Ajuste de brilho e contraste (CLAHE)
+                    variante = self._aplicar_clahe(imagem, buffers, buffers.variante)
+                
+                elif estrategia in ("nitidez", "clahe_nitidez"):
+                    # Sharpening (nitidez), calculado uma vez para as duas estratégias
+                    if imagem_sharp is None:
+                        imagem_sharp = cv2.filter2D(imagem, -1, KERNEL_NITIDEZ, dst=buffers.nitidez)
+                    if estrategia == "nitidez":
+                        variante = imagem_sharp
+                    else:
+                        # Combinação CLAHE + Sharpening
+                        variante = self._aplicar_clahe(imagem_sharp, buffers, buffers.variante)
+                
+                elif estrategia == "contraste":
+                    # Aumento de contraste
+                    alpha = 1.5  # Contraste
+                    beta = 10    # Brilho
+                    variante = cv2.convertScaleAbs(imagem, buffers.variante, alpha, beta)
+                
+                else:
+                    raise ValueError(f"Estratégia de pré-processamento desconhecida: {estrategia}")
+            
+            yield estrategia, variante
+    
+    def aplicar_estrategia(self, imagem: np.ndarray, estrategia: str) -> np.ndarray:
+        """Aplica uma única estratégia de pré-processamento (ex.: no recorte da placa)."""
+        return next(self.gerar_variantes(imagem, (estrategia,)))[1]
+    
+    def _clahe(self):
+        """Objeto CLAHE da thread atual, criado uma vez por thread."""
+        clahe = getattr(self._locais, 'clahe', None)
+        if clahe is None:
+            clahe = self._locais.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        return clahe
+    
+    def _aplicar_clahe(self, imagem: np.ndarray, buffers: BuffersVariantes,
+                       destino: np.ndarray) -> np.ndarray:
+        """Aplica CLAHE no canal de luminância (LAB) da imagem, escrevendo em `destino`."""
+        lab = cv2.cvtColor(imagem, cv2.COLOR_BGR2LAB, dst=buffers.lab)
+        luminancia = cv2.extractChannel(lab, 0, dst=buffers.luminancia)
+        self._clahe().apply(luminancia, luminancia)
+        cv2.insertChannel(luminancia, lab, 0)
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=destino)
+    
+    def aplicar_gramatica(self, resultado: ALPRResult) -> ALPRResult:
+        """
+        Redecodifica a leitura do OCR restrita aos formatos de placa brasileiros.
+        
+        Usa a matriz de probabilidades por posição do OCR para escolher a
+        sequência mais provável no formato antigo ou Mercosul. Sem a matriz
+        (OCR que não a fornece), o resultado é devolvido como está.
+        
+        Args:
+            resultado: Resultado do FastALPR
+            
+        Returns:
+            ALPRResult com texto e confiança da leitura restrita
+        """
+        ocr = resultado.ocr
+        if ocr is None or ocr.probabilities is None or not ocr.alphabet:
+            return resultado
+        
+        leitura = decodificar_placa(ocr.probabilities, ocr.alphabet)
+        if leitura is None:
+            return resultado
+        return replace(resultado, ocr=replace(ocr, text=leitura.texto, confidence=leitura.confianca))
+    
+    def validar_tamanho_placa(self, bbox, imagem_shape: tuple, escala: float = 1.0) -> bool:
         """
         Valida se a placa detectada tem tamanho mínimo razoável.
         
         Args:
             bbox: Bounding box da placa
             imagem_shape: Dimensões da imagem (altura, largura)
+            escala: Fator entre a resolução original e a da imagem em que a placa foi
+                detectada (os limites em pixels valem para a resolução original)
             
         Returns:
             bool: True se o tamanho é válido
         """
-        altura_img, largura_img = imagem_shape[:2]
-        largura_placa = bbox.x2 - bbox.x1
-        altura_placa = bbox.y2 - bbox.y1
+        altura_img, largura_img = imagem_shape[0] * escala, imagem_shape[1] * escala
+        largura_placa = (bbox.x2 - bbox.x1) * escala
+        altura_placa = (bbox.y2 - bbox.y1) * escala
         
         # Placa deve ter pelo menos 2% da largura e 1% da altura da imagem
         largura_min = largura_img * 0.02
@@ -221,69 +419,186 @@ class ANPRService:
         Returns:
             tuple: (texto_placa, imagem_resultado)
         """
+        resultado = self.reconhecer_placa_detalhado(imagem)
+        return resultado.texto, resultado.imagem
+
+    def _sem_movimento(self, imagem: np.ndarray | ImagemEntrada, camera_id: Optional[str]) -> bool:
+        """Indica se o filtro de movimento descarta o quadro (só para quadros com `camera_id`)."""
+        if not self.filtro_movimento.ativo or not camera_id:
+            return False
+        if isinstance(imagem, ImagemEntrada):
+            imagem = imagem.reduzida
+        with medir_etapa("filtro_movimento"):
+            return not self.filtro_movimento.tem_movimento(
+                camera_id, imagem, self.registro_cameras.obter(camera_id)
+            )
+
+    def reconhecer_placa_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                   nivel_qualidade: Optional[str] = None,
+                                   camera_id: Optional[str] = None) -> ResultadoReconhecimento:
+        """
+        Executa o pipeline robusto no nível de qualidade adequado à carga atual.
+        
+        Args:
+            imagem: Imagem de entrada (numpy array) ou `ImagemEntrada`. Com
+                `ImagemEntrada`, pré-processamento e detecção usam a imagem
+                reduzida e o OCR usa recortes da imagem em resolução cheia.
+            nivel_qualidade: Força um nível de qualidade. Se None, o nível é
+                escolhido pelo controlador de qualidade.
+            camera_id: Câmera de origem, usada para escolher a ordem das estratégias
+                e para aplicar a região de interesse configurada para ela
+            
+        Returns:
+            ResultadoReconhecimento com texto, imagem resultado e nível usado
+        """
         if self.alpr is None:
             logger.error("FastALPR não inicializado.")
-            return None, None
+            return ResultadoReconhecimento(texto=None, imagem=None)
+        
+        # Quadros sem movimento não entram na fila nem na latência do controlador
+        if self._sem_movimento(imagem, camera_id):
+            return ResultadoReconhecimento(texto=None, imagem=None, sem_movimento=True)
+        
+        with FILA_RECONHECIMENTO.track_inprogress(), \
+                self.controlador_qualidade.requisicao() as nivel_atual:
+            nivel = nivel_qualidade or nivel_atual
+            with DURACAO_RECONHECIMENTO.labels(nivel=nivel).time():
+                resultado = self._reconhecer(imagem, nivel, camera_id)
+            resultado.nivel_qualidade = nivel
+        
+        RECONHECIMENTOS.labels(
+            resultado='reconhecida' if resultado.texto else 'nao_reconhecida',
+            nivel=nivel,
+        ).inc()
+        if resultado.estrategia:
+            VITORIAS_ESTRATEGIA.labels(estrategia=resultado.estrategia).inc()
+        return resultado
+
+    def _reconhecer(self, imagem: np.ndarray | ImagemEntrada, nivel: str,
+                    camera_id: Optional[str] = None) -> ResultadoReconhecimento:
+        """Executa o pipeline de reconhecimento com as estratégias do nível informado."""
+        entrada = None
+        escala = 1.0
+        if isinstance(imagem, ImagemEntrada):
+            entrada, imagem = imagem, imagem.reduzida
+            escala = entrada.escala
+        
+        # Com ROI configurada, pré-processamento e detecção usam só o recorte
+        quadro = imagem
+        regiao = None
+        configuracao_camera = self.registro_cameras.obter(camera_id)
+        if configuracao_camera is not None and configuracao_camera.tem_roi:
+            imagem, regiao = configuracao_camera.recortar(quadro)
+        
+        ocr_frame = None
+        if entrada is not None and entrada.reduzida_em_escala:
+            if regiao is None:
+                ocr_frame = entrada.completa
+            else:
+                def ocr_frame():
+                    # Mesma região, na resolução cheia
+                    completa = entrada.completa()
+                    x0, y0, x1, y1 = escalar_retangulo(regiao, escala, completa.shape)
+                    return completa[y0:y1, x0:x1]
         
         try:
-            logger.info("Processando imagem com FastALPR (múltiplas estratégias)...")
-            
-            # Gera diferentes versões pré-processadas da imagem
-            imagens_processadas = self.preprocessar_imagem(imagem)
+            contexto = self.seletor_estrategias.contexto(camera_id)
+            estrategias, completo = self.seletor_estrategias.planejar(
+                contexto, ESTRATEGIAS_POR_NIVEL[nivel]
+            )
+            logger.info(f"Processando imagem com FastALPR (nível {nivel}, estratégias {estrategias})...")
             
             melhor_resultado_global = None
             melhor_confianca = 0.0
             melhor_imagem = imagem
+            melhor_estrategia = None
+            melhores_resultados = []
+            confiancas = {}
+            copia_melhor = None
             
-            # Tenta detectar em cada versão pré-processada
-            for idx, img_processada in enumerate(imagens_processadas):
-                try:
-                    logger.debug(f"Tentativa {idx + 1}/{len(imagens_processadas)}: processando imagem...")
+            # As variantes são escritas em buffers reaproveitados entre requisições
+            with self.pool_buffers.emprestar(imagem.shape) as buffers:
+                # Tenta detectar em cada versão pré-processada, geradas sob demanda
+                for idx, (estrategia, img_processada) in enumerate(
+                        self.gerar_variantes(imagem, estrategias, buffers)):
+                    confiancas[estrategia] = 0.0
+                    try:
+                        logger.debug(f"Tentativa {idx + 1}/{len(estrategias)} ({estrategia}): processando imagem...")
                     
-                    # Usa FastALPR para detectar e reconhecer placas
-                    alpr_results = self.alpr.predict(img_processada)
-                    
-                    if not alpr_results:
-                        continue
+                        # Usa FastALPR para detectar e reconhecer placas
+                        if ocr_frame is not None:
+                            # OCR no recorte em resolução cheia, com a mesma estratégia
+                            alpr_results = self.alpr.predict(
+                                img_processada,
+                                ocr_frame=ocr_frame,
+                                ocr_preprocess=lambda recorte, e=estrategia: self.aplicar_estrategia(recorte, e),
+                            )
+                        else:
+                            alpr_results = self.alpr.predict(img_processada)
                     
-                    # Filtra resultados válidos
-                    resultados_validos = []
-                    for result in alpr_results:
-                        # Valida tamanho da placa
-                        if not self.validar_tamanho_placa(result.detection.bounding_box, img_processada.shape):
-                            logger.debug(f"Placa descartada: tamanho inválido")
+                        if not alpr_results:
                             continue
+                    
+                        # Leitura restrita à gramática das placas
+                        alpr_results = [self.aplicar_gramatica(result) for result in alpr_results]
+                    
+                        # Filtra resultados válidos
+                        resultados_validos = []
+                        for result in alpr_results:
+                            # Valida tamanho da placa
+                            # Os limites relativos valem para o quadro inteiro, não para a ROI
+                            if not self.validar_tamanho_placa(result.detection.bounding_box, quadro.shape, escala):
+                                logger.debug(f"Placa descartada: tamanho inválido")
+                                continue
                         
-                        # Valida confiança do OCR (mínimo 0.3)
-                        if result.ocr and result.ocr.confidence and result.ocr.confidence >= 0.3:
-                            resultados_validos.append(result)
+                            # Valida confiança do OCR (mínimo 0.3)
+                            if result.ocr and result.ocr.confidence and result.ocr.confidence >= 0.3:
+                                resultados_validos.append(result)
                     
-                    if not resultados_validos:
-                        continue
+                        if not resultados_validos:
+                            continue
                     
-                    # Pega o resultado com maior confiança
-                    melhor_resultado = max(resultados_validos, 
-                                          key=lambda x: x.ocr.confidence if x.ocr else 0)
+                        # Pega o resultado com maior confiança
+                        melhor_resultado = max(resultados_validos, 
+                                              key=lambda x: x.ocr.confidence if x.ocr else 0)
                     
-                    if melhor_resultado.ocr is None or not melhor_resultado.ocr.text:
-                        continue
+                        if melhor_resultado.ocr is None or not melhor_resultado.ocr.text:
+                            continue
+                    
+                        # Atualiza melhor resultado global
+                        confianca_atual = melhor_resultado.ocr.confidence
+                        confiancas[estrategia] = confianca_atual
+                        if confianca_atual > melhor_confianca:
+                            melhor_confianca = confianca_atual
+                            melhor_resultado_global = melhor_resultado
+                            if img_processada is imagem:
+                                melhor_imagem = imagem
+                            else:
+                                # O buffer da variante é reescrito pela próxima estratégia
+                                # e volta para o pool no fim do laço
+                                if copia_melhor is None:
+                                    copia_melhor = np.empty_like(img_processada)
+                                np.copyto(copia_melhor, img_processada)
+                                melhor_imagem = copia_melhor
+                            melhor_estrategia = estrategia
+                            melhores_resultados = alpr_results
+                            logger.debug(f"Nova melhor detecção encontrada (confiança: {confianca_atual:.2f})")
                     
-                    # Atualiza melhor resultado global
-                    confianca_atual = melhor_resultado.ocr.confidence
-                    if confianca_atual > melhor_confianca:
-                        melhor_confianca = confianca_atual
-                        melhor_resultado_global = melhor_resultado
-                        melhor_imagem = img_processada
-                        logger.debug(f"Nova melhor detecção encontrada (confiança: {confianca_atual:.2f})")
+                        # Leitura confiável: as demais estratégias são puladas
+                        if self.seletor_estrategias.deve_parar(melhor_confianca, completo):
+                            break
                 
-                except Exception as e:
-                    logger.warning(f"Erro ao processar imagem {idx + 1}: {e}")
-                    continue
+                    except Exception as e:
+                        logger.warning(f"Erro ao processar imagem {idx + 1}: {e}")
+                        continue
+            
+            ESTRATEGIAS_TENTADAS.observe(len(confiancas))
+            self.seletor_estrategias.registrar(contexto, confiancas, melhor_estrategia)
             
             # Se não encontrou nenhuma placa válida
             if melhor_resultado_global is None:
                 logger.info("Nenhuma placa válida detectada após todas as tentativas.")
-                return None, imagem
+                return ResultadoReconhecimento(texto=None, imagem=quadro)
             
             # Extrai o texto da placa
             texto_placa = melhor_resultado_global.ocr.text.strip()
@@ -299,56 +614,155 @@ class ANPRService:
             # Valida se o texto formatado é válido (deve ter 7 caracteres)
             if len(texto_placa_formatado.replace('-', '')) < 6:
                 logger.warning(f"Texto da placa muito curto: {texto_placa_formatado}")
-                return None, imagem
+                return ResultadoReconhecimento(texto=None, imagem=quadro)
             
             logger.info(f"Placa reconhecida: {texto_placa_formatado} (confiança: {melhor_confianca:.2f})")
             
-            # Gera imagem com anotações usando a melhor imagem processada
-            imagem_resultado = self.alpr.draw_predictions(melhor_imagem)
+            if regiao is not None:
+                # Caixas em coordenadas do quadro; a variante processada volta para o
+                # lugar da ROI para que a imagem resultado mostre o quadro inteiro
+                melhores_resultados = mapear_para_quadro(melhores_resultados, regiao)
+                x0, y0, x1, y1 = regiao
+                melhor_imagem_quadro = quadro.copy()
+                melhor_imagem_quadro[y0:y1, x0:x1] = melhor_imagem
+                melhor_imagem = melhor_imagem_quadro
+            
+            # No nível mínimo não gera a imagem anotada
+            if nivel == NIVEL_MINIMO:
+                imagem_resultado = melhor_imagem
+            else:
+                # Anota a melhor imagem processada com os resultados já obtidos
+                with medir_etapa("anotacao"):
+                    imagem_resultado = self.alpr.draw_results(melhor_imagem, melhores_resultados)
             
-            return texto_placa_formatado, imagem_resultado
+            return ResultadoReconhecimento(
+                texto=texto_placa_formatado,
+                imagem=imagem_resultado,
+                confianca=melhor_confianca,
+                estrategia=melhor_estrategia,
+            )
             
         except Exception as e:
             logger.error(f"Erro durante reconhecimento: {e}", exc_info=True)
-            return None, imagem
+            return ResultadoReconhecimento(texto=None, imagem=quadro)
 
-    def reconhecer_multiplas_placas(self, imagem: np.ndarray) -> list[dict]:
+    def reconhecer_multiplas_placas(self, imagem: np.ndarray | ImagemEntrada,
+                                    camera_id: Optional[str] = None) -> list[dict]:
         """
         Reconhece múltiplas placas na imagem (funcionalidade adicional do FastALPR).
         
         Args:
-            imagem: Imagem de entrada (numpy array)
+            imagem: Imagem de entrada (numpy array) ou `ImagemEntrada`
+            camera_id: Câmera de origem, usada para aplicar a região de interesse
             
         Returns:
             list: Lista de dicionários com informações das placas detectadas
         """
-        if self.alpr is None:
-            return []
+        return self.reconhecer_multiplas_placas_detalhado(imagem, camera_id).placas
+
+    def reconhecer_multiplas_placas_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                              camera_id: Optional[str] = None,
+                                              nivel_qualidade: Optional[str] = None) -> ResultadoMultiplasPlacas:
+        """
+        Reconhece todas as placas da imagem em uma única passada.
         
-        try:
-            alpr_results = self.alpr.predict(imagem)
-            placas = []
+        Quadros de estacionamento têm muitos veículos: em vez de repetir a
+        detecção para cada estratégia de pré-processamento, a imagem original é
+        detectada uma vez e todos os recortes vão para o OCR em um único lote.
+        
+        Args:
+            imagem: Imagem de entrada (numpy array) ou `ImagemEntrada`
+            camera_id: Câmera de origem, usada para aplicar a região de interesse
+            nivel_qualidade: Força um nível de qualidade. Se None, o nível é
+                escolhido pelo controlador de qualidade. No nível mínimo a
+                imagem anotada não é gerada.
             
-            for result in alpr_results:
-                if result.ocr and result.ocr.text:
-                    placa_info = {
-                        'texto': self.formatar_placa(result.ocr.text),
+        Returns:
+            ResultadoMultiplasPlacas com as placas (bbox em pixels da imagem
+            original) e a imagem anotada
+        """
+        entrada = None
+        escala = 1.0
+        if isinstance(imagem, ImagemEntrada):
+            entrada, imagem = imagem, imagem.reduzida
+            escala = entrada.escala
+        
+        if self.alpr is None:
+            logger.error("FastALPR não inicializado.")
+            return ResultadoMultiplasPlacas(placas=[], imagem=imagem)
+        
+        if self._sem_movimento(imagem, camera_id):
+            return ResultadoMultiplasPlacas(placas=[], imagem=None, sem_movimento=True)
+        
+        quadro = imagem
+        regiao = None
+        configuracao_camera = self.registro_cameras.obter(camera_id)
+        if configuracao_camera is not None and configuracao_camera.tem_roi:
+            imagem, regiao = configuracao_camera.recortar(quadro)
+        
+        ocr_frame = None
+        if entrada is not None and entrada.reduzida_em_escala:
+            def _ocr_completo():
+                completa = entrada.completa()
+                if regiao is None:
+                    return completa
+                x0, y0, x1, y1 = escalar_retangulo(regiao, escala, completa.shape)
+                return completa[y0:y1, x0:x1]
+            ocr_frame = _ocr_completo
+        
+        with FILA_RECONHECIMENTO.track_inprogress(), \
+                self.controlador_qualidade.requisicao() as nivel_atual:
+            nivel = nivel_qualidade or nivel_atual
+            try:
+                alpr_results = self.alpr.predict(imagem, ocr_frame=ocr_frame)
+                if regiao is not None:
+                    alpr_results = mapear_para_quadro(alpr_results, regiao)
+                
+                resultados_validos = []
+                placas = []
+                for result in alpr_results:
+                    result = self.aplicar_gramatica(result)
+                    if not self.validar_tamanho_placa(result.detection.bounding_box, quadro.shape, escala):
+                        continue
+                    if not result.ocr or not result.ocr.text or result.ocr.confidence < 0.3:
+                        continue
+                    
+                    texto_placa = self.filtrar_texto_placa(result.ocr.text.strip()) or result.ocr.text.strip()
+                    texto_placa = self.formatar_placa(texto_placa)
+                    if len(texto_placa.replace('-', '')) < 6:
+                        continue
+                    
+                    bbox = result.detection.bounding_box
+                    resultados_validos.append(result)
+                    placas.append({
+                        'texto': texto_placa,
                         'confianca': result.ocr.confidence,
                         'bbox': {
-                            'x1': result.detection.bounding_box.x1,
-                            'y1': result.detection.bounding_box.y1,
-                            'x2': result.detection.bounding_box.x2,
-                            'y2': result.detection.bounding_box.y2
+                            'x1': int(bbox.x1 * escala),
+                            'y1': int(bbox.y1 * escala),
+                            'x2': int(round(bbox.x2 * escala)),
+                            'y2': int(round(bbox.y2 * escala))
                         },
                         'area_deteccao': result.detection.confidence
-                    }
-                    placas.append(placa_info)
-            
-            return placas
-            
-        except Exception as e:
-            logger.error(f"Erro ao reconhecer múltiplas placas: {e}")
-            return []
+                    })
+                
+                logger.info(f"{len(placas)} placa(s) reconhecida(s) de {len(alpr_results)} detecção(ões)")
+                
+                if not placas or nivel == NIVEL_MINIMO:
+                    imagem_resultado = quadro
+                else:
+                    with medir_etapa("anotacao"):
+                        imagem_resultado = self.alpr.draw_results(quadro.copy(), resultados_validos)
+                
+                return ResultadoMultiplasPlacas(placas=placas, imagem=imagem_resultado, nivel_qualidade=nivel)
+                
+            except Exception as e:
+                logger.error(f"Erro ao reconhecer múltiplas placas: {e}")
+                return ResultadoMultiplasPlacas(placas=[], imagem=quadro, nivel_qualidade=nivel)
+
+    def encerrar(self) -> None:
+        """Persiste o estado aprendido antes de encerrar o processo."""
+        self.seletor_estrategias.salvar()
 
     def obter_estatisticas(self) -> dict:
         """
@@ -359,12 +773,40 @@ class ANPRService:
         """
         return {
             'sistema': 'FastALPR',
-            'detector': 'YOLO v9 (384px)',
+            'detector': self.modelo_detector,
+            'detector_cascata': self.modelo_cascata,
+            'deteccao_blocos': self.alpr.tiling if self.alpr is not None else False,
             'ocr': 'fast-plate-ocr (CCT-XS-v1)',
             'status': 'ativo' if self.alpr is not None else 'inativo',
-            'dispositivo': 'auto'  # GPU se disponível, senão CPU
+            'dispositivo': os.getenv('ANPR_DISPOSITIVO', 'auto'),  # GPU se disponível, senão CPU
+            'modelo_detector': os.getenv('ANPR_CAMINHO_DETECTOR') or 'padrao',
+            'modelo_ocr': os.getenv('ANPR_CAMINHO_OCR') or 'padrao',
+            'nivel_qualidade': self.controlador_qualidade.nivel_atual,
+            'em_andamento': self.controlador_qualidade.em_andamento,
+            'latencia_media': self.controlador_qualidade.latencia_media(),
+            'estrategias': self.seletor_estrategias.estatisticas(),
+            'filtro_movimento': self.filtro_movimento.estatisticas(),
+            'pool_buffers': self.pool_buffers.estatisticas()
         }
 
 
+def criar_servico():
+    """
+    Cria o serviço de reconhecimento do processo.
+    
+    Com `ANPR_SERVIDOR_INFERENCIA` definido, os modelos ficam no servidor de
+    inferência compartilhado e este processo usa apenas um cliente leve. Com
+    `ANPR_FILA_TRABALHOS=1`, os pedidos vão para a fila de trabalhos no MongoDB,
+    atendida por trabalhadores em qualquer nó.
+    """
+    if os.getenv('ANPR_FILA_TRABALHOS', '0') == '1':
+        from .fila_trabalhos import ClienteFilaTrabalhos
+        return ClienteFilaTrabalhos.from_env()
+    if os.getenv('ANPR_SERVIDOR_INFERENCIA'):
+        from .servidor_inferencia import ClienteInferencia
+        return ClienteInferencia.from_env()
+    return ANPRService()
+
+
 # Instância global do serviço
-anpr_service = ANPRService()
\ No newline at end of file
+anpr_service = criar_servico()
\ No newline at end of file
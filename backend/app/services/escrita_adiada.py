@@ -0,0 +1,165 @@
+"""
+Escrita adiada (write-behind) dos registros de reconhecimento.
+
+Com a escrita adiada ativa, `create_placa`/`create_placas` não esperam o
+MongoDB: os documentos recebem um `ObjectId` gerado no processo (o id volta na
+resposta na hora), entram em um buffer e uma thread os grava com
+`insert_many(ordered=False)` quando o buffer chega a `tamanho_lote` documentos
+ou quando o mais antigo espera há `intervalo` segundos. O buffer é descarregado
+ao encerrar a API.
+
+Um registro só aparece nas consultas depois da gravação do seu lote (até
+`intervalo` segundos). Se o banco estiver fora, os documentos voltam para o
+buffer e a gravação é tentada de novo. Com `maximo_pendentes` documentos no
+buffer, os novos são gravados de forma síncrona (e o erro do banco chega a
+quem chamou, como sem a escrita adiada), o que limita a memória.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .metricas import DURACAO_ESCRITA_ADIADA, DOCUMENTOS_ESCRITA_ADIADA, PENDENTES_ESCRITA_ADIADA
+
+logger = logging.getLogger(__name__)
+
+# Código de chave duplicada: o documento já foi gravado (ex.: repetição após timeout)
+CHAVE_DUPLICADA = 11000
+
+
+class EscritaAdiada:
+    """Buffer de inserções descarregado em lote por uma thread."""
+
+    def __init__(self, collection, tamanho_lote: int = 200, intervalo: float = 0.5,
+                 maximo_pendentes: int = 10000):
+        """
+        Args:
+            collection: Coleção do MongoDB
+            tamanho_lote: Documentos pendentes que disparam uma gravação
+            intervalo: Espera máxima (segundos) de um documento no buffer
+            maximo_pendentes: Documentos pendentes a partir dos quais a gravação é síncrona
+        """
+        self.collection = collection
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.maximo_pendentes = maximo_pendentes
+        self._condicao = threading.Condition()
+        # Serializa as gravações, para que um lote devolvido ao buffer não passe outro na frente
+        self._trava_gravacao = threading.Lock()
+        self._pendentes: List[Dict[str, Any]] = []
+        self._mais_antigo = 0.0
+        self._encerrado = False
+        self._thread = threading.Thread(target=self._executar, name="escrita-adiada", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, collection) -> "EscritaAdiada":
+        return cls(
+            collection,
+            tamanho_lote=int(os.getenv('DB_ESCRITA_ADIADA_LOTE', '200')),
+            intervalo=float(os.getenv('DB_ESCRITA_ADIADA_INTERVALO', '0.5')),
+            maximo_pendentes=int(os.getenv('DB_ESCRITA_ADIADA_MAXIMO', '10000')),
+        )
+
+    def adicionar(self, documentos: List[Dict[str, Any]]) -> List[str]:
+        """
+        Atribui ids aos documentos e os coloca no buffer.
+
+        Returns:
+            IDs dos documentos, na mesma ordem
+        """
+        for documento in documentos:
+            documento.setdefault('_id', ObjectId())
+
+        with self._condicao:
+            cheio = len(self._pendentes) >= self.maximo_pendentes
+        if cheio:
+            # Banco lento ou fora: quem produz espera, em vez de o buffer crescer sem limite
+            with DURACAO_ESCRITA_ADIADA.time():
+                self.collection.insert_many(documentos, ordered=False)
+            DOCUMENTOS_ESCRITA_ADIADA.labels(resultado='gravado').inc(len(documentos))
+            return [str(documento['_id']) for documento in documentos]
+
+        with self._condicao:
+            primeiro = not self._pendentes
+            if primeiro:
+                self._mais_antigo = time.monotonic()
+            self._pendentes.extend(documentos)
+            PENDENTES_ESCRITA_ADIADA.set(len(self._pendentes))
+            # Acorda a thread para iniciar a contagem do intervalo ou gravar o lote cheio
+            if primeiro or len(self._pendentes) >= self.tamanho_lote:
+                self._condicao.notify()
+        return [str(documento['_id']) for documento in documentos]
+
+    def _executar(self) -> None:
+        while True:
+            with self._condicao:
+                while not self._encerrado:
+                    if len(self._pendentes) >= self.tamanho_lote:
+                        break
+                    if self._pendentes:
+                        espera = self._mais_antigo + self.intervalo - time.monotonic()
+                        if espera <= 0:
+                            break
+                    else:
+                        espera = None
+                    self._condicao.wait(espera)
+                if self._encerrado:
+                    return
+            if not self.descarregar():
+                # Banco indisponível: espera um intervalo antes de tentar de novo
+                time.sleep(self.intervalo)
+
+    def descarregar(self) -> bool:
+        """
+        Grava todos os documentos pendentes.
+
+        Returns:
+            False se o banco falhou e os documentos voltaram para o buffer
+        """
+        with self._trava_gravacao:
+            with self._condicao:
+                lote, self._pendentes = self._pendentes, []
+            if not lote:
+                return True
+
+            sucesso = True
+            with DURACAO_ESCRITA_ADIADA.time():
+                try:
+                    self.collection.insert_many(lote, ordered=False)
+                    DOCUMENTOS_ESCRITA_ADIADA.labels(resultado='gravado').inc(len(lote))
+                except BulkWriteError as e:
+                    # Com ordered=False os demais documentos do lote já foram gravados
+                    erros = e.details.get('writeErrors', [])
+                    duplicados = sum(1 for erro in erros if erro.get('code') == CHAVE_DUPLICADA)
+                    DOCUMENTOS_ESCRITA_ADIADA.labels(resultado='gravado').inc(len(lote) - len(erros) + duplicados)
+                    DOCUMENTOS_ESCRITA_ADIADA.labels(resultado='descartado').inc(len(erros) - duplicados)
+                    if len(erros) > duplicados:
+                        logger.error(f"Escrita adiada: {len(erros) - duplicados} documento(s) rejeitado(s): "
+                                     f"{erros[0].get('errmsg')}")
+                except PyMongoError as e:
+                    logger.warning(f"Escrita adiada: falha ao gravar {len(lote)} documento(s), nova tentativa: {e}")
+                    sucesso = False
+                    with self._condicao:
+                        self._pendentes[:0] = lote
+                        self._mais_antigo = time.monotonic()
+
+            with self._condicao:
+                PENDENTES_ESCRITA_ADIADA.set(len(self._pendentes))
+            return sucesso
+
+    def encerrar(self) -> None:
+        """Para a thread e grava o que estiver pendente."""
+        with self._condicao:
+            self._encerrado = True
+            self._condicao.notify()
+        self._thread.join(timeout=5)
+        if not self.descarregar():
+            with self._condicao:
+                perdidos = len(self._pendentes)
+            logger.error(f"Escrita adiada: {perdidos} documento(s) não gravado(s) ao encerrar")
@@ -0,0 +1,173 @@
+"""
+Distribuição em tempo real das mudanças nos registros (Server-Sent Events).
+
+O `HubEventos` entrega cada evento publicado a todos os clientes conectados
+ao `GET /placas/eventos` deste processo. Cada cliente tem uma fila limitada;
+um cliente lento que deixa a fila encher é desconectado (a conexão SSE é
+encerrada e o navegador reconecta sozinho), em vez de segurar memória ou
+atrasar os demais.
+
+Os últimos `tamanho_historico` eventos ficam guardados. Ao reconectar, o
+navegador envia o `Last-Event-ID` e recebe de novo os eventos que perdeu. Se
+eles já saíram do histórico, ou se o id é de outro processo (reinício ou outro
+worker), o cliente recebe o evento `recarregar` e busca a lista inteira. Ao
+conectar, o cliente recebe o id atual, para que uma queda antes do primeiro
+evento também seja recuperada.
+
+A publicação pode vir de qualquer thread (as rotas chamam o banco no
+threadpool): a entrega é agendada no event loop de cada cliente.
+
+Com vários workers do uvicorn, cada worker só distribui as mudanças que ele
+mesmo processou.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from .metricas import CLIENTES_EVENTOS, EVENTOS_DESCARTADOS
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (s) dos comentários SSE que mantêm a conexão aberta em proxies
+INTERVALO_HEARTBEAT = 15.0
+
+# Evento enviado quando os eventos perdidos não podem ser reenviados
+EVENTO_RECARREGAR = 'recarregar'
+
+
+@dataclass(eq=False)
+class ClienteEventos:
+    """Fila de eventos de uma conexão."""
+    fila: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    desconectado: bool = False
+    # Eventos perdidos desde o `Last-Event-ID`, enviados antes da fila
+    atrasados: list = field(default_factory=list)
+    # Id atual no momento da primeira conexão (sem `Last-Event-ID`)
+    posicao: str = ''
+
+
+class HubEventos:
+    """Fan-out dos eventos para os clientes conectados, com fila limitada por cliente."""
+
+    def __init__(self, tamanho_fila: int = 100, tamanho_historico: int = 1000):
+        self.tamanho_fila = tamanho_fila
+        self._lock = threading.Lock()
+        self._clientes: set[ClienteEventos] = set()
+        self._sequencia = itertools.count(1)
+        self._ultimo = 0
+        self._historico: deque = deque(maxlen=tamanho_historico)
+        # Distingue os ids deste processo dos de outro worker ou de antes de um reinício
+        self._instancia = uuid.uuid4().hex[:12]
+
+    def _id(self, sequencia: int) -> str:
+        return f"{self._instancia}-{sequencia}"
+
+    def _perdidos(self, ultimo_id: str) -> Optional[list]:
+        """Eventos publicados depois de `ultimo_id`, ou None se não der para saber quais."""
+        instancia, _, sequencia = ultimo_id.rpartition('-')
+        if instancia != self._instancia or not sequencia.isdigit() or int(sequencia) > self._ultimo:
+            return None
+        sequencia = int(sequencia)
+        primeiro = self._historico[0][0] if self._historico else self._ultimo + 1
+        if sequencia + 1 < primeiro:
+            # Parte dos eventos perdidos já saiu do histórico
+            return None
+        return [evento for evento in self._historico if evento[0] > sequencia]
+
+    def conectar(self, ultimo_id: Optional[str] = None) -> ClienteEventos:
+        """
+        Registra um cliente (chamado de dentro do event loop).
+
+        Args:
+            ultimo_id: `Last-Event-ID` enviado pelo navegador ao reconectar
+        """
+        cliente = ClienteEventos(asyncio.Queue(self.tamanho_fila), asyncio.get_running_loop())
+        # Sob o lock, cada evento cai no histórico lido aqui ou na fila do cliente, nunca nos dois
+        with self._lock:
+            if not ultimo_id:
+                cliente.posicao = self._id(self._ultimo)
+            else:
+                perdidos = self._perdidos(ultimo_id)
+                if perdidos is None:
+                    cliente.atrasados = [(self._ultimo, EVENTO_RECARREGAR, '{}')]
+                else:
+                    cliente.atrasados = perdidos
+            self._clientes.add(cliente)
+            CLIENTES_EVENTOS.set(len(self._clientes))
+        return cliente
+
+    def desconectar(self, cliente: ClienteEventos) -> None:
+        with self._lock:
+            self._clientes.discard(cliente)
+            CLIENTES_EVENTOS.set(len(self._clientes))
+
+    def publicar(self, tipo: str, dados: dict) -> None:
+        """Envia um evento a todos os clientes conectados. Não bloqueia."""
+        dados = json.dumps(dados, default=str)
+        with self._lock:
+            evento = (next(self._sequencia), tipo, dados)
+            self._ultimo = evento[0]
+            self._historico.append(evento)
+            clientes = list(self._clientes)
+        for cliente in clientes:
+            try:
+                cliente.loop.call_soon_threadsafe(self._entregar, cliente, evento)
+            except RuntimeError:
+                # Event loop do cliente já foi encerrado
+                self.desconectar(cliente)
+
+    def _entregar(self, cliente: ClienteEventos, evento: tuple) -> None:
+        if cliente.desconectado:
+            return
+        try:
+            cliente.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta a fila e encerra a conexão
+            logger.warning("Cliente de eventos lento desconectado (fila cheia)")
+            EVENTOS_DESCARTADOS.inc()
+            cliente.desconectado = True
+            self.desconectar(cliente)
+            while not cliente.fila.empty():
+                cliente.fila.get_nowait()
+            cliente.fila.put_nowait(None)
+
+    async def transmitir(self, cliente: ClienteEventos,
+                         heartbeat: float = INTERVALO_HEARTBEAT) -> AsyncIterator[str]:
+        """Gera o fluxo SSE de um cliente até ele ser desconectado."""
+        try:
+            # Espera antes de reconectar, se a conexão cair. Na primeira conexão,
+            # também a posição atual do fluxo (na reconexão, os eventos reenviados a avançam)
+            yield f"retry: 3000\nid: {cliente.posicao}\n\n" if cliente.posicao else "retry: 3000\n\n"
+            for evento in cliente.atrasados:
+                yield self._formatar(evento)
+            cliente.atrasados = []
+            while True:
+                try:
+                    evento: Optional[tuple] = await asyncio.wait_for(cliente.fila.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if evento is None:
+                    return
+                yield self._formatar(evento)
+        finally:
+            self.desconectar(cliente)
+
+    def _formatar(self, evento: tuple) -> str:
+        sequencia, tipo, dados = evento
+        return f"id: {self._id(sequencia)}\nevent: {tipo}\ndata: {dados}\n\n"
+
+
+hub_eventos = HubEventos(
+    int(os.getenv('EVENTOS_TAMANHO_FILA', '100')),
+    int(os.getenv('EVENTOS_HISTORICO', '1000')),
+)
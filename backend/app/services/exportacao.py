@@ -0,0 +1,231 @@
+"""
+Exportação em massa dos registros de placas (CSV ou Parquet).
+
+Os registros de um intervalo de `hora_entrada` são lidos de um cursor do
+MongoDB no servidor, em lotes de `batch_size`, e convertidos em blocos de
+bytes à medida que chegam. Nenhuma etapa guarda o intervalo inteiro, então a
+memória usada não depende do tamanho do intervalo: no CSV, um bloco a cada
+`linhas_por_bloco` linhas; no Parquet, um row group a cada `linhas_por_bloco`
+linhas. A imagem anotada em base64 fica de fora, a menos que pedida.
+
+Uso (de `backend/`):
+
+    python -m app.services.exportacao --inicio 2026-09-01 --fim 2026-10-01 --saida setembro.csv
+    python -m app.services.exportacao --inicio 2026-09-01 --fim 2026-10-01 --formato parquet --saida setembro.parquet
+"""
+
+import argparse
+import csv
+import io
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+FORMATOS = ("csv", "parquet")
+
+# Limite de documentos por lote do cursor (cada lote fica inteiro na memória)
+LOTE_MAXIMO = 10000
+
+TIPOS_CONTEUDO = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Coluna -> tipo no Parquet. `bbox` é achatado em x1/y1/x2/y2
+COLUNAS = {
+    '_id': 'string',
+    'placa': 'string',
+    'hora_entrada': 'string',
+    'hora_saida': 'string',
+    'camera_id': 'string',
+    'filename': 'string',
+    'original_path': 'string',
+    'nivel_qualidade': 'string',
+    'espelhada': 'bool',
+    'confianca': 'float64',
+    'bbox_x1': 'int32',
+    'bbox_y1': 'int32',
+    'bbox_x2': 'int32',
+    'bbox_y2': 'int32',
+}
+COLUNAS_IMAGEM = {'image_base64': 'string'}
+
+FORMATO_HORA = '%Y-%m-%d %H:%M:%S'
+
+
+def normalizar_hora(valor: str) -> str:
+    """
+    Converte uma data ou data e hora ISO para o formato de `hora_entrada`.
+
+    Raises:
+        ValueError: Se o valor não for uma data válida
+    """
+    return datetime.fromisoformat(valor).strftime(FORMATO_HORA)
+
+
+def colunas_exportadas(incluir_imagens: bool = False) -> dict:
+    return {**COLUNAS, **COLUNAS_IMAGEM} if incluir_imagens else dict(COLUNAS)
+
+
+def projecao(incluir_imagens: bool = False) -> dict:
+    """Campos lidos do MongoDB (a imagem só é trafegada quando exportada)."""
+    campos = [coluna for coluna in colunas_exportadas(incluir_imagens) if not coluna.startswith('bbox_')]
+    return {**{campo: 1 for campo in campos}, 'bbox': 1}
+
+
+def _linha(documento: dict, colunas: dict) -> dict:
+    bbox = documento.get('bbox') or {}
+    linha = {}
+    for coluna in colunas:
+        if coluna.startswith('bbox_'):
+            linha[coluna] = bbox.get(coluna[5:])
+        elif coluna == '_id':
+            linha[coluna] = str(documento['_id'])
+        else:
+            linha[coluna] = documento.get(coluna)
+    return linha
+
+
+def exportar_csv(documentos: Iterable[dict], incluir_imagens: bool = False,
+                 linhas_por_bloco: int = 1000) -> Iterator[bytes]:
+    """Gera o CSV em blocos de bytes, com cabeçalho no primeiro bloco."""
+    colunas = colunas_exportadas(incluir_imagens)
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=list(colunas))
+    escritor.writeheader()
+    linhas = 0
+    for documento in documentos:
+        escritor.writerow(_linha(documento, colunas))
+        linhas += 1
+        if linhas % linhas_por_bloco == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _SaidaIncremental(io.RawIOBase):
+    """Arquivo só de escrita cujo conteúdo é retirado em pedaços (`retirar`)."""
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def retirar(self) -> bytes:
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def exportar_parquet(documentos: Iterable[dict], incluir_imagens: bool = False,
+                     linhas_por_bloco: int = 10000) -> Iterator[bytes]:
+    """
+    Gera o Parquet em blocos de bytes, um row group a cada `linhas_por_bloco` linhas.
+
+    A dependência é verificada já na chamada, antes do primeiro bloco.
+
+    Raises:
+        RuntimeError: Se o pyarrow não estiver instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("A exportação em Parquet requer o pacote pyarrow (pip install pyarrow)") from e
+
+    return _gerar_parquet(pa, pq, documentos, colunas_exportadas(incluir_imagens), linhas_por_bloco)
+
+
+def _gerar_parquet(pa, pq, documentos: Iterable[dict], colunas: dict,
+                   linhas_por_bloco: int) -> Iterator[bytes]:
+    esquema = pa.schema([(coluna, pa.type_for_alias(tipo)) for coluna, tipo in colunas.items()])
+    saida = _SaidaIncremental()
+    escritor = pq.ParquetWriter(saida, esquema, compression='zstd')
+
+    def gravar(linhas: list) -> bytes:
+        escritor.write_table(pa.Table.from_pylist(linhas, schema=esquema))
+        return saida.retirar()
+
+    linhas = []
+    for documento in documentos:
+        linhas.append(_linha(documento, colunas))
+        if len(linhas) == linhas_por_bloco:
+            yield gravar(linhas)
+            linhas = []
+    if linhas:
+        yield gravar(linhas)
+    escritor.close()
+    yield saida.retirar()
+
+
+def exportar(db, inicio: str, fim: str, formato: str = "csv", incluir_imagens: bool = False,
+             batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Exporta os registros com `hora_entrada` em [inicio, fim).
+
+    Args:
+        db: `DatabaseService`
+        inicio, fim: Datas ou datas e horas ISO
+        formato: "csv" ou "parquet"
+        incluir_imagens: Inclui a imagem anotada (`image_base64`)
+        batch_size: Documentos por lote do cursor (padrão `ANPR_EXPORTACAO_LOTE`)
+
+    Raises:
+        ValueError: Datas, formato ou `batch_size` inválidos
+        RuntimeError: Parquet sem pyarrow instalado
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    inicio, fim = normalizar_hora(inicio), normalizar_hora(fim)
+    if batch_size is None:
+        batch_size = int(os.getenv('ANPR_EXPORTACAO_LOTE', '1000'))
+    # Validado aqui: o cursor só é aberto quando a resposta já começou a ser enviada
+    if not 1 <= batch_size <= LOTE_MAXIMO:
+        raise ValueError(f"batch_size deve estar entre 1 e {LOTE_MAXIMO}")
+
+    documentos = db.iterar_placas(inicio, fim, projecao(incluir_imagens), batch_size)
+    if formato == "parquet":
+        return exportar_parquet(documentos, incluir_imagens)
+    return exportar_csv(documentos, incluir_imagens)
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Exporta os registros de placas de um intervalo")
+    parser.add_argument("--inicio", required=True, help="Data ou data e hora ISO (inclusiva)")
+    parser.add_argument("--fim", required=True, help="Data ou data e hora ISO (exclusiva)")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--saida", required=True, help="Arquivo de saída")
+    parser.add_argument("--incluir-imagens", action="store_true", help="Inclui a imagem anotada em base64")
+    parser.add_argument("--batch-size", type=int, default=None, help="Documentos por lote do cursor")
+    args = parser.parse_args()
+
+    from .database import db_service
+
+    try:
+        blocos = exportar(db_service, args.inicio, args.fim, args.formato, args.incluir_imagens, args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(args.saida, 'wb') as arquivo:
+        for bloco in blocos:
+            arquivo.write(bloco)
+    print(f"Exportação gravada em {args.saida}")
+    db_service.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+Fila de trabalhos de reconhecimento no MongoDB, para escalar a inferência entre nós.
+
+Com `ANPR_FILA_TRABALHOS=1`, os nós da API não carregam os modelos. Eles usam
+um `ClienteFilaTrabalhos`, que tem os mesmos métodos de reconhecimento do
+`ANPRService`: cada pedido vira um documento na coleção `ANPR_FILA_COLLECTION`
+(com os bytes da imagem) e o cliente espera o resultado no mesmo documento.
+Qualquer quantidade de trabalhadores (`python -m app.services.fila_trabalhos`),
+em qualquer máquina que alcance o MongoDB, reserva os trabalhos, executa o
+`ANPRService` e grava o resultado. Nenhum balanceador precisa saber qual nó
+atende qual pedido.
+
+- Reserva: um `find_one_and_update` atômico leva o trabalho mais antigo
+  disponível para `em_andamento`, com prazo de `visibilidade` segundos, um
+  token de reserva novo e `tentativas + 1`. Se o trabalhador morrer, o trabalho
+  volta a ser reservável quando o prazo vence; só quem tem o token vigente
+  consegue concluí-lo.
+- Falhas devolvem o trabalho à fila com espera crescente, até `max_tentativas`.
+  Depois disso (ou se a imagem não puder ser decodificada) ele fica `falhou` e
+  o erro chega à API.
+- A API grava o registro na coleção de placas com o resultado, como nos demais
+  modos, então watchlist, eventos e escrita adiada continuam valendo.
+
+Os trabalhos terminados perdem a imagem e são apagados pelo índice TTL após
+`retencao` segundos. Os prazos usam o relógio de cada nó: mantenha os relógios
+sincronizados (NTP).
+
+Uso (de `backend/`, em cada nó de inferência):
+
+    python -m app.services.fila_trabalhos --threads 4
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import cv2
+import numpy as np
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from .anpr_service import ANPRService, ResultadoMultiplasPlacas, ResultadoReconhecimento
+from .imagem import ImagemEntrada
+from .metricas import ESPERA_FILA_TRABALHOS, TRABALHOS_FILA
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = 'pendente'
+EM_ANDAMENTO = 'em_andamento'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+CANCELADO = 'cancelado'
+
+# Métodos do ANPRService que podem ser enfileirados e o tipo do seu resultado
+METODOS = {
+    'reconhecer_placa_detalhado': ResultadoReconhecimento,
+    'reconhecer_multiplas_placas_detalhado': ResultadoMultiplasPlacas,
+}
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _em_utc(momento: datetime) -> datetime:
+    """Datas lidas do MongoDB vêm sem fuso (UTC), a menos que o cliente use `tz_aware`."""
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def _para_bson(valor):
+    """Converte escalares e arrays do numpy (confianças, caixas) em tipos do BSON."""
+    if isinstance(valor, dict):
+        return {chave: _para_bson(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_bson(item) for item in valor]
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return valor
+
+
+def empacotar_resultado(resultado) -> dict:
+    """Resultado do `ANPRService` como documento, com a imagem resultado em PNG."""
+    campos = {
+        campo.name: _para_bson(getattr(resultado, campo.name))
+        for campo in fields(resultado) if campo.name != 'imagem'
+    }
+    if resultado.imagem is not None:
+        # Compressão mínima: o PNG só atravessa o banco e é decodificado na API
+        _, png = cv2.imencode('.png', resultado.imagem, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        campos['imagem_png'] = Binary(png.tobytes())
+    return campos
+
+
+def desempacotar_resultado(metodo: str, campos: dict):
+    """Reconstrói o resultado gravado por `empacotar_resultado`."""
+    campos = dict(campos)
+    png = campos.pop('imagem_png', None)
+    imagem = None
+    if png is not None:
+        imagem = cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_UNCHANGED)
+    return METODOS[metodo](imagem=imagem, **campos)
+
+
+class FilaTrabalhos:
+    """Operações da fila: enfileirar, reservar, concluir, falhar e aguardar."""
+
+    def __init__(self, collection, visibilidade: float = 60.0, max_tentativas: int = 3,
+                 atraso_repeticao: float = 1.0, retencao: int = 3600):
+        """
+        Args:
+            collection: Coleção dos trabalhos
+            visibilidade: Segundos de reserva de um trabalho antes de ele voltar à fila
+            max_tentativas: Reservas de um trabalho antes de ele ser dado como falho
+            atraso_repeticao: Espera (s) antes da segunda tentativa; dobra a cada nova falha
+            retencao: Segundos que os trabalhos terminados ficam na coleção
+        """
+        self.collection = collection
+        self.visibilidade = visibilidade
+        self.max_tentativas = max_tentativas
+        self.atraso_repeticao = atraso_repeticao
+        self.retencao = retencao
+
+    @classmethod
+    def from_env(cls, collection=None) -> "FilaTrabalhos":
+        if collection is None:
+            cliente = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+            banco = cliente[os.getenv('DATABASE_NAME', 'ocr_db')]
+            collection = banco[os.getenv('ANPR_FILA_COLLECTION', 'trabalhos')]
+        return cls(
+            collection,
+            visibilidade=float(os.getenv('ANPR_FILA_VISIBILIDADE', '60')),
+            max_tentativas=int(os.getenv('ANPR_FILA_TENTATIVAS', '3')),
+            retencao=int(os.getenv('ANPR_FILA_RETENCAO', '3600')),
+        )
+
+    def criar_indices(self) -> None:
+        self.collection.create_index([('estado', ASCENDING), ('disponivel_em', ASCENDING)])
+        self.collection.create_index('finalizado_em', expireAfterSeconds=self.retencao)
+
+    def enfileirar(self, metodo: str, dados: bytes, espelhar: bool = False,
+                   kwargs: Optional[dict] = None) -> ObjectId:
+        """Grava um trabalho pendente e devolve o seu id."""
+        agora = _agora()
+        return self.collection.insert_one({
+            'metodo': metodo,
+            'estado': PENDENTE,
+            'tentativas': 0,
+            'criado_em': agora,
+            'disponivel_em': agora,
+            'imagem': Binary(bytes(dados)),
+            'espelhar': espelhar,
+            'kwargs': kwargs or {},
+        }).inserted_id
+
+    def reservar(self, trabalhador: str) -> Optional[dict]:
+        """Reserva o trabalho disponível mais antigo (pendente ou com reserva vencida)."""
+        agora = _agora()
+        return self.collection.find_one_and_update(
+            {
+                'estado': {'$in': [PENDENTE, EM_ANDAMENTO]},
+                'disponivel_em': {'$lte': agora},
+                'tentativas': {'$lt': self.max_tentativas},
+            },
+            {
+                '$set': {
+                    'estado': EM_ANDAMENTO,
+                    'disponivel_em': agora + timedelta(seconds=self.visibilidade),
+                    'reserva': ObjectId(),
+                    'trabalhador': trabalhador,
+                },
+                '$inc': {'tentativas': 1},
+            },
+            sort=[('disponivel_em', ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @staticmethod
+    def _da_reserva(trabalho: dict) -> dict:
+        """Filtro que só casa enquanto a reserva do trabalho for a vigente."""
+        return {'_id': trabalho['_id'], 'reserva': trabalho['reserva']}
+
+    def concluir(self, trabalho: dict, resultado: dict) -> bool:
+        """
+        Grava o resultado de um trabalho reservado.
+
+        Returns:
+            False se a reserva já não era válida (prazo vencido ou cancelado)
+        """
+        atualizacao = self.collection.update_one(self._da_reserva(trabalho), {
+            '$set': {'estado': CONCLUIDO, 'resultado': resultado, 'finalizado_em': _agora()},
+            '$unset': {'imagem': '', 'reserva': ''},
+        })
+        return atualizacao.modified_count == 1
+
+    def falhar(self, trabalho: dict, erro: str, repetir: bool = True) -> bool:
+        """
+        Registra a falha de um trabalho reservado.
+
+        Returns:
+            True se o trabalho voltou para a fila
+        """
+        if repetir and trabalho['tentativas'] < self.max_tentativas:
+            espera = self.atraso_repeticao * 2 ** (trabalho['tentativas'] - 1)
+            self.collection.update_one(self._da_reserva(trabalho), {
+                '$set': {'estado': PENDENTE, 'disponivel_em': _agora() + timedelta(seconds=espera), 'erro': erro},
+                '$unset': {'reserva': ''},
+            })
+            return True
+        self.collection.update_one(self._da_reserva(trabalho), {
+            '$set': {'estado': FALHOU, 'erro': erro, 'finalizado_em': _agora()},
+            '$unset': {'imagem': '', 'reserva': ''},
+        })
+        return False
+
+    def recolher_esgotados(self) -> int:
+        """Dá como falhos os trabalhos cuja última tentativa venceu sem conclusão."""
+        agora = _agora()
+        return self.collection.update_many(
+            {'estado': EM_ANDAMENTO, 'disponivel_em': {'$lte': agora},
+             'tentativas': {'$gte': self.max_tentativas}},
+            {'$set': {'estado': FALHOU, 'erro': 'Prazo de processamento vencido em todas as tentativas',
+                      'finalizado_em': agora},
+             '$unset': {'imagem': '', 'reserva': ''}},
+        ).modified_count
+
+    def aguardar(self, trabalho_id: ObjectId, timeout: float) -> dict:
+        """
+        Espera o trabalho terminar e devolve `estado`, `resultado` e `erro`.
+
+        Raises:
+            TimeoutError: Se o trabalho não terminar em `timeout` segundos. O
+                trabalho é cancelado, para que nenhum trabalhador o processe à toa.
+        """
+        limite = time.monotonic() + timeout
+        intervalo = 0.01
+        while True:
+            documento = self.collection.find_one(
+                {'_id': trabalho_id, 'estado': {'$in': [CONCLUIDO, FALHOU]}},
+                {'estado': 1, 'resultado': 1, 'erro': 1}
+            )
+            if documento is not None:
+                return documento
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            time.sleep(min(intervalo, restante))
+            intervalo = min(intervalo * 2, 0.2)
+
+        cancelamento = self.collection.update_one(
+            {'_id': trabalho_id, 'estado': {'$in': [PENDENTE, EM_ANDAMENTO]}},
+            {'$set': {'estado': CANCELADO, 'finalizado_em': _agora()}, '$unset': {'imagem': '', 'reserva': ''}},
+        )
+        if cancelamento.modified_count == 0:
+            # Terminou entre a última consulta e o cancelamento: o resultado vale
+            documento = self.collection.find_one(
+                {'_id': trabalho_id, 'estado': {'$in': [CONCLUIDO, FALHOU]}},
+                {'estado': 1, 'resultado': 1, 'erro': 1}
+            )
+            if documento is not None:
+                return documento
+        raise TimeoutError(f"Trabalho de reconhecimento não concluído em {timeout}s")
+
+    def contar(self) -> dict:
+        """Quantidade de trabalhos por estado."""
+        return {
+            grupo['_id']: grupo['quantidade']
+            for grupo in self.collection.aggregate([{'$group': {'_id': '$estado', 'quantidade': {'$sum': 1}}}])
+        }
+
+
+class TrabalhadorFila:
+    """Reserva e executa trabalhos da fila com o `ANPRService` local, em várias threads."""
+
+    def __init__(self, fila: FilaTrabalhos, servico: ANPRService, threads: Optional[int] = None,
+                 intervalo: float = 0.2):
+        """
+        Args:
+            fila: Fila de trabalhos
+            servico: ANPRService com os modelos carregados
+            threads: Trabalhos executados em paralelo (padrão: núcleos da CPU)
+            intervalo: Espera (s) entre consultas quando a fila está vazia
+        """
+        self.fila = fila
+        self.servico = servico
+        self.threads = threads or os.cpu_count() or 4
+        self.intervalo = intervalo
+        self.nome = f"{socket.gethostname()}:{os.getpid()}"
+        self._parar = threading.Event()
+
+    def executar(self) -> None:
+        """Atende a fila até `encerrar` ser chamado."""
+        self.fila.criar_indices()
+        threads = [
+            threading.Thread(target=self._atender, name=f"trabalhador-{indice}", daemon=True)
+            for indice in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info(f"Trabalhador {self.nome} atendendo a fila com {self.threads} thread(s)")
+
+        while not self._parar.wait(self.fila.visibilidade / 2):
+            try:
+                esgotados = self.fila.recolher_esgotados()
+                if esgotados:
+                    logger.warning(f"{esgotados} trabalho(s) falharam por prazo vencido")
+                    TRABALHOS_FILA.labels(resultado='falhou').inc(esgotados)
+            except PyMongoError as e:
+                logger.error(f"Erro ao recolher trabalhos vencidos: {e}")
+        for thread in threads:
+            thread.join(timeout=self.fila.visibilidade)
+
+    def encerrar(self) -> None:
+        """Para de reservar trabalhos; os que estão em execução terminam."""
+        self._parar.set()
+
+    def _atender(self) -> None:
+        while not self._parar.is_set():
+            try:
+                trabalho = self.fila.reservar(self.nome)
+                if trabalho is None:
+                    self._parar.wait(self.intervalo)
+                    continue
+                self._processar(trabalho)
+            except PyMongoError as e:
+                logger.error(f"Erro de banco na fila de trabalhos: {e}")
+                self._parar.wait(self.intervalo * 10)
+
+    def _processar(self, trabalho: dict) -> None:
+        if trabalho['tentativas'] == 1:
+            ESPERA_FILA_TRABALHOS.observe((_agora() - _em_utc(trabalho['criado_em'])).total_seconds())
+
+        metodo = trabalho['metodo']
+        try:
+            if metodo not in METODOS:
+                raise ValueError(f"Método desconhecido: {metodo}")
+            entrada = ImagemEntrada(trabalho['imagem'], trabalho.get('espelhar', False))
+        except ValueError as e:
+            # Repetir não adianta: imagem ou pedido inválido
+            self.fila.falhar(trabalho, str(e), repetir=False)
+            TRABALHOS_FILA.labels(resultado='falhou').inc()
+            return
+
+        try:
+            resultado = empacotar_resultado(getattr(self.servico, metodo)(entrada, **trabalho.get('kwargs', {})))
+        except Exception as e:
+            logger.error(f"Erro ao processar o trabalho {trabalho['_id']}: {e}", exc_info=True)
+            repetido = self.fila.falhar(trabalho, repr(e))
+            TRABALHOS_FILA.labels(resultado='repetido' if repetido else 'falhou').inc()
+            return
+
+        if self.fila.concluir(trabalho, resultado):
+            TRABALHOS_FILA.labels(resultado='concluido').inc()
+        else:
+            logger.warning(f"Reserva do trabalho {trabalho['_id']} perdida (prazo vencido ou cancelado)")
+
+
+class ClienteFilaTrabalhos:
+    """
+    Cliente da fila de trabalhos, com a mesma interface de reconhecimento do
+    `ANPRService`. Usado pelos nós da API no lugar do serviço local.
+    """
+
+    def __init__(self, fila: FilaTrabalhos, timeout: float = 30.0):
+        """
+        Args:
+            fila: Fila de trabalhos
+            timeout: Tempo máximo de espera por um resultado, em segundos
+        """
+        self.fila = fila
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls) -> "ClienteFilaTrabalhos":
+        """Cria o cliente a partir das variáveis de ambiente."""
+        return cls(FilaTrabalhos.from_env(), timeout=float(os.getenv('ANPR_FILA_TIMEOUT', '30')))
+
+    def _chamar(self, metodo: str, imagem, **kwargs):
+        if isinstance(imagem, ImagemEntrada):
+            dados, espelhar = imagem.dados, imagem.espelhar
+        else:
+            _, png = cv2.imencode('.png', imagem)
+            dados, espelhar = png.tobytes(), False
+
+        trabalho_id = self.fila.enfileirar(metodo, dados, espelhar, kwargs)
+        documento = self.fila.aguardar(trabalho_id, self.timeout)
+        if documento['estado'] == FALHOU:
+            raise RuntimeError(f"Erro na fila de trabalhos: {documento.get('erro')}")
+        return desempacotar_resultado(metodo, documento['resultado'])
+
+    def reconhecer_placa_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                   nivel_qualidade: Optional[str] = None,
+                                   camera_id: Optional[str] = None) -> ResultadoReconhecimento:
+        """Mesmo que `ANPRService.reconhecer_placa_detalhado`, executado por um trabalhador."""
+        return self._chamar('reconhecer_placa_detalhado', imagem,
+                            nivel_qualidade=nivel_qualidade, camera_id=camera_id)
+
+    def reconhecer_placa_robusto(self, imagem: np.ndarray):
+        """Mesmo que `ANPRService.reconhecer_placa_robusto`, executado por um trabalhador."""
+        resultado = self.reconhecer_placa_detalhado(imagem)
+        return resultado.texto, resultado.imagem
+
+    def reconhecer_multiplas_placas_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                              camera_id: Optional[str] = None,
+                                              nivel_qualidade: Optional[str] = None) -> ResultadoMultiplasPlacas:
+        """Mesmo que `ANPRService.reconhecer_multiplas_placas_detalhado`, executado por um trabalhador."""
+        return self._chamar('reconhecer_multiplas_placas_detalhado', imagem,
+                            camera_id=camera_id, nivel_qualidade=nivel_qualidade)
+
+    def reconhecer_multiplas_placas(self, imagem: np.ndarray | ImagemEntrada,
+                                    camera_id: Optional[str] = None) -> list[dict]:
+        """Mesmo que `ANPRService.reconhecer_multiplas_placas`, executado por um trabalhador."""
+        return self.reconhecer_multiplas_placas_detalhado(imagem, camera_id).placas
+
+    def obter_estatisticas(self) -> dict:
+        """Trabalhos na fila por estado (os modelos ficam nos trabalhadores)."""
+        return {'sistema': 'FastALPR (fila de trabalhos)', 'fila_trabalhos': self.fila.contar()}
+
+    def encerrar(self) -> None:
+        pass
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Trabalhador da fila de reconhecimento no MongoDB")
+    parser.add_argument("--threads", type=int, default=int(os.getenv('ANPR_FILA_THREADS') or 0) or None,
+                        help="Trabalhos em paralelo (padrão: núcleos da CPU)")
+    args = parser.parse_args()
+
+    # Reaproveita a instância global se ela já for o serviço local, para não
+    # carregar os modelos duas vezes
+    from . import anpr_service as modulo_servico
+    servico = modulo_servico.anpr_service
+    if not isinstance(servico, ANPRService):
+        servico = ANPRService()
+    if servico.alpr is None:
+        sys.exit("FastALPR não inicializado; trabalhador não iniciado")
+
+    trabalhador = TrabalhadorFila(FilaTrabalhos.from_env(), servico, args.threads)
+    signal.signal(signal.SIGTERM, lambda *_: trabalhador.encerrar())
+    try:
+        trabalhador.executar()
+    except KeyboardInterrupt:
+        trabalhador.encerrar()
+    finally:
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
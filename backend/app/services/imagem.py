@@ -0,0 +1,183 @@
+"""
+Decodificação das imagens recebidas pela API.
+
+O detector trabalha em 384 px, então decodificar quadros de câmeras de muitos
+megapixels em resolução cheia só para detectar é desperdício. `ImagemEntrada`
+decodifica o quadro em escala reduzida (escala DCT do JPEG via
+`IMREAD_REDUCED_*`) para pré-processamento e detecção, e só decodifica a
+resolução cheia, sob demanda, quando uma placa precisa ser recortada para o OCR.
+"""
+
+import os
+import struct
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .metricas import medir_etapa
+
+# Lado maior mínimo da imagem usada na detecção (2,5x a entrada do detector)
+LADO_MINIMO_DETECCAO = int(os.getenv('ANPR_LADO_MINIMO_DETECCAO', '960'))
+
+_FLAGS_REDUCAO = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Marcadores SOF do JPEG (exceto DHT 0xC4, JPG 0xC8 e DAC 0xCC)
+_MARCADORES_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def ler_dimensoes(dados: bytes) -> Optional[tuple[int, int]]:
+    """
+    Lê largura e altura do cabeçalho de um JPEG ou PNG sem decodificar os pixels.
+
+    Returns:
+        tuple: (largura, altura) ou None se o formato não for reconhecido
+    """
+    if dados[:8] == b"\x89PNG\r\n\x1a\n" and len(dados) >= 24:
+        largura, altura = struct.unpack(">II", dados[16:24])
+        return largura, altura
+
+    if dados[:2] != b"\xff\xd8":
+        return None
+
+    posicao = 2
+    while posicao + 9 < len(dados):
+        if dados[posicao] != 0xFF:
+            return None
+        marcador = dados[posicao + 1]
+        if marcador == 0xFF:
+            # Bytes de preenchimento entre segmentos
+            posicao += 1
+            continue
+        tamanho = struct.unpack(">H", dados[posicao + 2:posicao + 4])[0]
+        if marcador in _MARCADORES_SOF:
+            altura, largura = struct.unpack(">HH", dados[posicao + 5:posicao + 9])
+            return largura, altura
+        posicao += 2 + tamanho
+    return None
+
+
+def extensao_imagem(dados: bytes, padrao: str = ".png") -> str:
+    """Extensão de arquivo correspondente ao conteúdo (JPEG ou PNG)."""
+    if dados[:2] == b"\xff\xd8":
+        return ".jpg"
+    if dados[:8] == b"\x89PNG\r\n\x1a\n":
+        return ".png"
+    return padrao
+
+
+def fator_reducao(largura: int, altura: int, lado_minimo: int = LADO_MINIMO_DETECCAO) -> int:
+    """Maior fator (1, 2, 4 ou 8) que mantém o lado maior acima de `lado_minimo`."""
+    lado = max(largura, altura)
+    for fator in (8, 4, 2):
+        if lado / fator >= lado_minimo:
+            return fator
+    return 1
+
+
+class ImagemEntrada:
+    """
+    Imagem recebida pela API, decodificada em escala reduzida para detecção.
+
+    A imagem em resolução cheia é decodificada apenas quando `completa()` é
+    chamado, ou seja, só quando uma placa foi encontrada.
+    """
+
+    def __init__(self, dados: bytes, espelhar: bool = False,
+                 lado_minimo: int = LADO_MINIMO_DETECCAO):
+        """
+        Decodifica a imagem em escala reduzida.
+
+        Args:
+            dados: Bytes do arquivo de imagem (JPEG, PNG, ...)
+            espelhar: Se True, espelha a imagem horizontalmente após decodificar
+            lado_minimo: Lado maior mínimo da imagem reduzida
+
+        Raises:
+            ValueError: Se os dados não puderem ser decodificados
+        """
+        self.dados = dados
+        self.espelhar = espelhar
+        self._completa: Optional[np.ndarray] = None
+
+        dimensoes = ler_dimensoes(dados)
+        self.fator = fator_reducao(*dimensoes, lado_minimo) if dimensoes else 1
+
+        self.reduzida = self._decodificar(self.fator)
+        if self.reduzida is None and self.fator != 1:
+            # Alguns formatos não suportam a decodificação reduzida
+            self.fator = 1
+            self.reduzida = self._decodificar(1)
+        if self.reduzida is None:
+            raise ValueError("Não foi possível decodificar a imagem")
+
+        if self.fator == 1:
+            self._completa = self.reduzida
+            self.escala = 1.0
+        else:
+            # Usa o lado maior: a orientação EXIF pode trocar largura e altura
+            self.escala = max(dimensoes) / max(self.reduzida.shape[:2])
+
+    @classmethod
+    def de_quadro(cls, dados, reduzida: np.ndarray, fator: int, escala: float,
+                  espelhar: bool = False) -> "ImagemEntrada":
+        """
+        Reconstrói uma `ImagemEntrada` já decodificada, sem decodificar de novo.
+
+        Usado pelo servidor de inferência, que recebe a imagem reduzida pronta
+        (em memória compartilhada) e os bytes originais.
+        """
+        entrada = cls.__new__(cls)
+        entrada.dados = dados
+        entrada.espelhar = espelhar
+        entrada.fator = fator
+        entrada.escala = escala
+        entrada.reduzida = reduzida
+        entrada._completa = reduzida if fator == 1 else None
+        return entrada
+
+    def _decodificar(self, fator: int) -> Optional[np.ndarray]:
+        with medir_etapa("decodificacao"):
+            imagem = cv2.imdecode(np.frombuffer(self.dados, np.uint8), _FLAGS_REDUCAO[fator])
+            if imagem is not None and self.espelhar:
+                imagem = cv2.flip(imagem, 1)
+        return imagem
+
+    @property
+    def reduzida_em_escala(self) -> bool:
+        """Indica se a imagem de detecção é menor que a original."""
+        return self.fator != 1
+
+    def completa(self) -> np.ndarray:
+        """Imagem em resolução cheia (decodificada na primeira chamada)."""
+        if self._completa is None:
+            self._completa = self._decodificar(1)
+            if self._completa is None:
+                raise ValueError("Não foi possível decodificar a imagem em resolução cheia")
+        return self._completa
+
+
+def codificar_reduzida(dados: bytes, lado_maximo: int, qualidade: int = 85) -> bytes:
+    """
+    Recodifica uma imagem como JPEG com o lado maior limitado a `lado_maximo`.
+
+    Decodifica só na escala necessária e nunca amplia a imagem.
+
+    Raises:
+        ValueError: Se a imagem não puder ser decodificada ou codificada
+    """
+    imagem = ImagemEntrada(dados, lado_minimo=lado_maximo).reduzida
+    altura, largura = imagem.shape[:2]
+    fator = lado_maximo / max(altura, largura)
+    if fator < 1:
+        imagem = cv2.resize(imagem, (max(1, round(largura * fator)), max(1, round(altura * fator))),
+                            interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+    if not ok:
+        raise ValueError("Não foi possível codificar a imagem reduzida")
+    return buffer.tobytes()
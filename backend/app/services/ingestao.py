@@ -0,0 +1,259 @@
+"""
+Ingestão por dispositivo: identificação, limite de taxa e filas com escalonamento justo.
+
+Cada quadro enviado para reconhecimento pertence a um dispositivo:
+
+- a câmera cadastrada em `CAMERAS_CONFIG` cuja `chave` veio no cabeçalho
+  `INGESTAO_CABECALHO_CHAVE` (o `Authorization` do firmware do ESP32, com ou
+  sem o prefixo "Bearer ");
+- a câmera do `camera_id` enviado, se ela estiver cadastrada sem chave;
+- o dispositivo `anonimo`, compartilhado por todos os demais envios.
+
+Uma chave desconhecida, ou um `camera_id` de câmera que tem chave enviado sem
+ela, é recusado (401). Com `INGESTAO_EXIGIR_CHAVE=1`, os envios anônimos também.
+
+Cada dispositivo tem um limite de taxa opcional (`taxa` quadros/s, com
+`rajada` quadros de folga; token bucket) e uma fila própria de até
+`limite_fila` quadros; acima disso o quadro é recusado (429) sem ocupar a fila
+dos outros. No máximo `workers` quadros são processados ao mesmo tempo; quando
+um termina, a vaga vai para o dispositivo com fila não vazia de menor passada
+(stride scheduling): cada vez recebida avança a passada do dispositivo em
+1/`prioridade`, então dispositivos com fila recebem vagas na proporção das suas
+prioridades e uma câmera que dispara sem parar não atrasa as demais além da sua
+parte. Um dispositivo que volta a enviar depois de ocioso não acumula crédito.
+
+As filas ficam no event loop do processo: com vários workers do uvicorn, cada
+um escalona as suas requisições.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from .cameras import RegistroCameras
+from .metricas import DURACAO_INGESTAO, ESPERA_INGESTAO, FILA_INGESTAO, RECUSAS_INGESTAO
+
+ANONIMO = "anonimo"
+
+
+class IngestaoRecusada(Exception):
+    """Quadro recusado na ingestão."""
+
+    def __init__(self, mensagem: str, status: int = 429, espera: Optional[float] = None):
+        """
+        Args:
+            status: Código HTTP sugerido (401 para chave, 429 para taxa ou fila)
+            espera: Segundos até o dispositivo poder enviar de novo, se conhecidos
+        """
+        super().__init__(mensagem)
+        self.status = status
+        self.espera = espera
+
+
+class LimiteTaxa:
+    """Token bucket: `taxa` quadros por segundo, com até `rajada` quadros acumulados."""
+
+    def __init__(self, taxa: float, rajada: int):
+        self.taxa = taxa
+        self.rajada = max(rajada, 1)
+        self._fichas = float(self.rajada)
+        self._ultimo = time.monotonic()
+
+    def consumir(self) -> float:
+        """Consome uma ficha. Retorna 0 se havia ficha ou os segundos até a próxima."""
+        agora = time.monotonic()
+        self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+        if self._fichas >= 1.0:
+            self._fichas -= 1.0
+            return 0.0
+        return (1.0 - self._fichas) / self.taxa
+
+
+@dataclass(eq=False)
+class _FilaDispositivo:
+    """Quadros de um dispositivo aguardando vaga e o seu estado no escalonamento."""
+    dispositivo: str
+    espera: deque = field(default_factory=deque)
+    passada: float = 0.0
+    limite: Optional[LimiteTaxa] = None
+    # (taxa, rajada) com que o limite foi criado, para recriá-lo se a configuração mudar
+    parametros_limite: Optional[tuple] = None
+
+
+class EscalonadorIngestao:
+    """Filas por dispositivo servidas por `workers` vagas, em proporção às prioridades."""
+
+    def __init__(self, registro: RegistroCameras, workers: int = 8, limite_fila: int = 16,
+                 cabecalho: str = "Authorization", exigir_chave: bool = False,
+                 prioridade_anonimo: float = 1.0, taxa_anonimo: Optional[float] = None):
+        """
+        Args:
+            registro: Câmeras cadastradas (chave, prioridade, taxa e rajada de cada uma)
+            workers: Quadros processados ao mesmo tempo
+            limite_fila: Quadros aguardando por dispositivo
+            cabecalho: Cabeçalho HTTP com a chave do dispositivo
+            exigir_chave: Recusa os envios sem chave
+            prioridade_anonimo, taxa_anonimo: Prioridade e taxa do dispositivo anônimo
+        """
+        self.registro = registro
+        self.workers = max(workers, 1)
+        self.limite_fila = limite_fila
+        self.cabecalho = cabecalho
+        self.exigir_chave = exigir_chave
+        self.prioridade_anonimo = prioridade_anonimo
+        self.taxa_anonimo = taxa_anonimo
+        self._filas: dict[str, _FilaDispositivo] = {}
+        self._ocupadas = 0
+        self._aguardando = 0
+        # Passada do último dispositivo atendido
+        self._passada_global = 0.0
+
+    @classmethod
+    def from_env(cls, registro: RegistroCameras) -> "EscalonadorIngestao":
+        taxa_anonimo = os.getenv('INGESTAO_TAXA_ANONIMO')
+        return cls(
+            registro,
+            workers=int(os.getenv('INGESTAO_WORKERS', '8')),
+            limite_fila=int(os.getenv('INGESTAO_LIMITE_FILA', '16')),
+            cabecalho=os.getenv('INGESTAO_CABECALHO_CHAVE', 'Authorization'),
+            exigir_chave=os.getenv('INGESTAO_EXIGIR_CHAVE', '0') == '1',
+            prioridade_anonimo=float(os.getenv('INGESTAO_PRIORIDADE_ANONIMO', '1')),
+            taxa_anonimo=float(taxa_anonimo) if taxa_anonimo else None,
+        )
+
+    def identificar(self, valor_cabecalho: Optional[str], camera_id: Optional[str]) -> str:
+        """
+        Dispositivo de um envio, pela chave do cabeçalho ou pelo `camera_id`.
+
+        Raises:
+            IngestaoRecusada: Chave desconhecida ou ausente quando exigida (status 401)
+        """
+        chave = (valor_cabecalho or '').strip()
+        if chave.lower().startswith('bearer '):
+            chave = chave[7:].strip()
+        if chave:
+            camera = self.registro.por_chave(chave)
+            if camera is None:
+                RECUSAS_INGESTAO.labels(dispositivo=ANONIMO, motivo='chave').inc()
+                raise IngestaoRecusada("Chave de dispositivo inválida", status=401)
+            return camera.camera_id
+
+        camera = self.registro.obter(camera_id)
+        if camera is not None and camera.chave:
+            RECUSAS_INGESTAO.labels(dispositivo=camera.camera_id, motivo='chave').inc()
+            raise IngestaoRecusada(f"A câmera {camera.camera_id} exige a chave do dispositivo", status=401)
+        if self.exigir_chave:
+            RECUSAS_INGESTAO.labels(dispositivo=ANONIMO, motivo='chave').inc()
+            raise IngestaoRecusada("Envio sem chave de dispositivo", status=401)
+        return camera.camera_id if camera is not None else ANONIMO
+
+    def _parametros(self, dispositivo: str) -> tuple[float, Optional[float], Optional[int]]:
+        """(prioridade, taxa, rajada) atuais do dispositivo."""
+        camera = None if dispositivo == ANONIMO else self.registro.obter(dispositivo)
+        if camera is None:
+            return self.prioridade_anonimo, self.taxa_anonimo, None
+        return camera.prioridade, camera.taxa, camera.rajada
+
+    def _fila(self, dispositivo: str, taxa: Optional[float], rajada: Optional[int]) -> _FilaDispositivo:
+        fila = self._filas.get(dispositivo)
+        if fila is None:
+            fila = self._filas[dispositivo] = _FilaDispositivo(dispositivo)
+        parametros = (taxa, rajada) if taxa else None
+        if parametros != fila.parametros_limite:
+            fila.limite = LimiteTaxa(taxa, rajada or max(int(taxa), 1)) if parametros else None
+            fila.parametros_limite = parametros
+        return fila
+
+    def _avancar(self, fila: _FilaDispositivo) -> None:
+        """Registra uma vaga concedida ao dispositivo."""
+        prioridade = self._parametros(fila.dispositivo)[0]
+        self._passada_global = fila.passada
+        fila.passada += 1.0 / max(prioridade, 1e-3)
+
+    def _despachar(self) -> None:
+        """Entrega as vagas livres aos dispositivos de menor passada."""
+        while self._ocupadas < self.workers and self._aguardando:
+            fila = min((f for f in self._filas.values() if f.espera), key=lambda f: f.passada)
+            futuro, inicio = fila.espera.popleft()
+            self._aguardando -= 1
+            FILA_INGESTAO.labels(dispositivo=fila.dispositivo).set(len(fila.espera))
+            if futuro.done():
+                continue
+            self._ocupadas += 1
+            self._avancar(fila)
+            ESPERA_INGESTAO.labels(dispositivo=fila.dispositivo).observe(time.monotonic() - inicio)
+            futuro.set_result(None)
+
+    def _liberar(self) -> None:
+        self._ocupadas -= 1
+        self._despachar()
+
+    async def _aguardar_vaga(self, fila: _FilaDispositivo) -> None:
+        if self._ocupadas < self.workers and not self._aguardando:
+            # Vaga livre e ninguém esperando: segue direto
+            fila.passada = max(fila.passada, self._passada_global)
+            self._ocupadas += 1
+            self._avancar(fila)
+            ESPERA_INGESTAO.labels(dispositivo=fila.dispositivo).observe(0.0)
+            return
+
+        if len(fila.espera) >= self.limite_fila:
+            RECUSAS_INGESTAO.labels(dispositivo=fila.dispositivo, motivo='fila').inc()
+            raise IngestaoRecusada(f"Fila do dispositivo {fila.dispositivo} cheia", status=429)
+
+        if not fila.espera:
+            # Dispositivo ocioso volta a disputar a partir da passada atual, sem crédito acumulado
+            fila.passada = max(fila.passada, self._passada_global)
+        futuro = asyncio.get_running_loop().create_future()
+        entrada = (futuro, time.monotonic())
+        fila.espera.append(entrada)
+        self._aguardando += 1
+        FILA_INGESTAO.labels(dispositivo=fila.dispositivo).set(len(fila.espera))
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            if futuro.done() and not futuro.cancelled():
+                # A vaga chegou junto com o cancelamento: devolve
+                self._liberar()
+            elif entrada in fila.espera:
+                fila.espera.remove(entrada)
+                self._aguardando -= 1
+                FILA_INGESTAO.labels(dispositivo=fila.dispositivo).set(len(fila.espera))
+            raise
+
+    @asynccontextmanager
+    async def vez(self, dispositivo: str) -> AsyncIterator[None]:
+        """
+        Espera a vez do dispositivo e mantém a vaga durante o bloco.
+
+        Raises:
+            IngestaoRecusada: Taxa do dispositivo excedida ou fila cheia (status 429)
+        """
+        _, taxa, rajada = self._parametros(dispositivo)
+        fila = self._fila(dispositivo, taxa, rajada)
+        if fila.limite is not None:
+            espera = fila.limite.consumir()
+            if espera > 0:
+                RECUSAS_INGESTAO.labels(dispositivo=dispositivo, motivo='taxa').inc()
+                raise IngestaoRecusada(f"Taxa de envio do dispositivo {dispositivo} excedida",
+                                       status=429, espera=espera)
+
+        await self._aguardar_vaga(fila)
+        try:
+            with DURACAO_INGESTAO.labels(dispositivo=dispositivo).time():
+                yield
+        finally:
+            self._liberar()
+
+    def estatisticas(self) -> dict:
+        """Vagas ocupadas e quadros aguardando por dispositivo."""
+        return {
+            'workers': self.workers,
+            'ocupadas': self._ocupadas,
+            'aguardando': {fila.dispositivo: len(fila.espera) for fila in self._filas.values() if fila.espera},
+        }
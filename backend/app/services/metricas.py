@@ -0,0 +1,198 @@
+"""
+Métricas Prometheus do pipeline de reconhecimento.
+
+As métricas são expostas no endpoint `/metrics` da aplicação. Com vários
+workers do uvicorn, defina `PROMETHEUS_MULTIPROC_DIR` para agregar os valores
+de todos os processos.
+"""
+
+import os
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Faixas pensadas para etapas que vão de microssegundos (OCR de um recorte)
+# a alguns segundos (pipeline completo em imagens grandes)
+BUCKETS_ETAPA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DURACAO_ETAPA = Histogram(
+    'anpr_etapa_duracao_segundos',
+    'Duração de cada etapa do pipeline de reconhecimento',
+    ['etapa'],
+    buckets=BUCKETS_ETAPA,
+)
+
+DURACAO_RECONHECIMENTO = Histogram(
+    'anpr_reconhecimento_duracao_segundos',
+    'Duração total do reconhecimento por nível de qualidade',
+    ['nivel'],
+    buckets=BUCKETS_ETAPA,
+)
+
+RECONHECIMENTOS = Counter(
+    'anpr_reconhecimentos_total',
+    'Reconhecimentos executados por resultado e nível de qualidade',
+    ['resultado', 'nivel'],
+)
+
+VITORIAS_ESTRATEGIA = Counter(
+    'anpr_estrategia_vitorias_total',
+    'Quantidade de vezes em que cada estratégia de pré-processamento deu a melhor leitura',
+    ['estrategia'],
+)
+
+ESTRATEGIAS_TENTADAS = Histogram(
+    'anpr_estrategias_tentadas',
+    'Quantidade de estratégias de pré-processamento tentadas por reconhecimento',
+    buckets=(1, 2, 3, 4, 5),
+)
+
+DURACAO_BANCO = Histogram(
+    'db_operacao_duracao_segundos',
+    'Duração das operações do DatabaseService',
+    ['operacao'],
+    buckets=BUCKETS_ETAPA,
+)
+
+PENDENTES_ESCRITA_ADIADA = Gauge(
+    'db_escrita_adiada_pendentes',
+    'Documentos no buffer da escrita adiada, ainda não gravados',
+    multiprocess_mode='livesum',
+)
+
+DURACAO_ESCRITA_ADIADA = Histogram(
+    'db_escrita_adiada_duracao_segundos',
+    'Duração de cada gravação em lote da escrita adiada',
+    buckets=BUCKETS_ETAPA,
+)
+
+DOCUMENTOS_ESCRITA_ADIADA = Counter(
+    'db_escrita_adiada_documentos_total',
+    'Documentos da escrita adiada gravados ou descartados pelo banco',
+    ['resultado'],
+)
+
+REQUISICOES_EM_ANDAMENTO = Gauge(
+    'http_requisicoes_em_andamento',
+    'Requisições HTTP em andamento',
+    multiprocess_mode='livesum',
+)
+
+CASCATA_DETECTOR = Counter(
+    'anpr_cascata_detector_total',
+    'Detecções resolvidas pelo primeiro estágio da cascata ou enviadas ao segundo',
+    ['estagio'],
+)
+
+BLOCOS_DETECCAO = Counter(
+    'anpr_blocos_deteccao_total',
+    'Blocos da detecção em blocos enviados ao detector ou descartados pela verificação de bordas',
+    ['resultado'],
+)
+
+QUADROS_FILTRO_MOVIMENTO = Counter(
+    'anpr_filtro_movimento_quadros_total',
+    'Quadros avaliados pelo filtro de movimento, processados ou ignorados',
+    ['resultado'],
+)
+
+ALERTAS_WATCHLIST = Counter(
+    'anpr_watchlist_alertas_total',
+    'Leituras que corresponderam a uma lista de alerta, por lista e tipo de correspondência',
+    ['lista', 'exata'],
+)
+
+CLIENTES_EVENTOS = Gauge(
+    'eventos_clientes_conectados',
+    'Clientes conectados ao fluxo de eventos (SSE)',
+    multiprocess_mode='livesum',
+)
+
+EVENTOS_DESCARTADOS = Counter(
+    'eventos_clientes_descartados_total',
+    'Clientes do fluxo de eventos desconectados por não acompanhar os eventos (fila cheia)',
+)
+
+FILA_RECONHECIMENTO = Gauge(
+    'anpr_fila_profundidade',
+    'Reconhecimentos em andamento no ANPRService',
+    multiprocess_mode='livesum',
+)
+
+FILA_INGESTAO = Gauge(
+    'anpr_ingestao_fila_profundidade',
+    'Quadros aguardando a vez na fila de ingestão, por dispositivo',
+    ['dispositivo'],
+    multiprocess_mode='livesum',
+)
+
+ESPERA_INGESTAO = Histogram(
+    'anpr_ingestao_espera_segundos',
+    'Tempo de um quadro na fila de ingestão até a vez do dispositivo',
+    ['dispositivo'],
+    buckets=BUCKETS_ETAPA,
+)
+
+DURACAO_INGESTAO = Histogram(
+    'anpr_ingestao_duracao_segundos',
+    'Duração do processamento de um quadro depois de sair da fila, por dispositivo',
+    ['dispositivo'],
+    buckets=BUCKETS_ETAPA,
+)
+
+RECUSAS_INGESTAO = Counter(
+    'anpr_ingestao_recusas_total',
+    'Quadros recusados na ingestão, por dispositivo e motivo (chave, taxa, fila)',
+    ['dispositivo', 'motivo'],
+)
+
+TRABALHOS_FILA = Counter(
+    'anpr_fila_trabalhos_total',
+    'Trabalhos da fila de reconhecimento no MongoDB por resultado (concluido, repetido, falhou)',
+    ['resultado'],
+)
+
+ESPERA_FILA_TRABALHOS = Histogram(
+    'anpr_fila_trabalhos_espera_segundos',
+    'Tempo entre o enfileiramento de um trabalho e a reserva por um trabalhador',
+    buckets=BUCKETS_ETAPA,
+)
+
+
+def medir_etapa(etapa: str):
+    """Context manager que mede a duração de uma etapa do pipeline."""
+    return DURACAO_ETAPA.labels(etapa=etapa).time()
+
+
+def medir_banco(func):
+    """Decorador que mede a duração de um método do DatabaseService."""
+    histograma = DURACAO_BANCO.labels(operacao=func.__name__)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with histograma.time():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def gerar_metricas() -> tuple[bytes, str]:
+    """
+    Gera o payload de métricas no formato de exposição do Prometheus.
+
+    Returns:
+        tuple: (conteúdo, content type)
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,151 @@
+"""
+Miniaturas das imagens originais e metadados para servi-las com cache.
+
+As listagens só precisam de uma prévia pequena, mas a rota de imagens entregava
+sempre o original em resolução cheia. `Miniaturas` gera, na primeira vez que um
+tamanho é pedido, uma versão JPEG reduzida do original (decodificada em escala
+reduzida, ver `imagem.py`) e a guarda em disco ao lado dos uploads. Os
+originais nunca são reescritos (cada upload ganha um nome único), então as
+miniaturas também não mudam e podem ser servidas com cache imutável.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+from functools import lru_cache
+from typing import Sequence
+
+from .armazenamento import PADRAO_NOME, subpastas
+from .imagem import codificar_reduzida, extensao_imagem
+from .metricas import medir_etapa
+
+logger = logging.getLogger(__name__)
+
+# Subpasta de UPLOAD_FOLDER onde as miniaturas ficam, uma pasta por tamanho
+PASTA_MINIATURAS = 'miniaturas'
+
+TIPOS_IMAGEM = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+}
+
+
+def tipo_midia(caminho: str) -> str:
+    """
+    Content type de uma imagem salva, pela extensão ou, sem extensão
+    conhecida, pelo cabeçalho do arquivo.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in TIPOS_IMAGEM:
+        return TIPOS_IMAGEM[extensao]
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.read(8)
+    extensao = extensao_imagem(cabecalho, padrao='')
+    return TIPOS_IMAGEM.get(extensao) or mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+
+
+def etag_arquivo(caminho: str) -> str:
+    """ETag forte (hash do conteúdo) de um arquivo, calculado uma vez por versão do arquivo."""
+    estado = os.stat(caminho)
+    return _etag_conteudo(caminho, estado.st_size, estado.st_mtime_ns)
+
+
+@lru_cache(maxsize=4096)
+def _etag_conteudo(caminho: str, tamanho: int, mtime_ns: int) -> str:
+    # Tamanho e mtime fazem parte da chave do cache: um arquivo reescrito é lido de novo
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return f'"{resumo.hexdigest()[:32]}"'
+
+
+class Miniaturas:
+    """Gera e guarda em disco as miniaturas das imagens originais."""
+
+    def __init__(self, pasta_uploads: str, tamanhos: Sequence[int] = (160, 320, 640),
+                 qualidade: int = 85, niveis: int = 2, largura_nivel: int = 2):
+        """
+        Args:
+            pasta_uploads: Pasta das imagens originais (`UPLOAD_FOLDER`)
+            tamanhos: Lados maiores (px) aceitos no parâmetro `size`
+            qualidade: Qualidade JPEG das miniaturas
+            niveis, largura_nivel: Subpastas do hash, as mesmas do `ArmazenamentoOriginais`
+        """
+        self.pasta_uploads = pasta_uploads
+        self.niveis = niveis
+        self.largura_nivel = largura_nivel
+        self.tamanhos = tuple(sorted(tamanhos))
+        self.qualidade = qualidade
+
+    @classmethod
+    def from_env(cls) -> "Miniaturas":
+        tamanhos = os.getenv('ANPR_MINIATURA_TAMANHOS', '160,320,640')
+        return cls(
+            pasta_uploads=os.getenv('UPLOAD_FOLDER', 'uploads'),
+            tamanhos=[int(tamanho) for tamanho in tamanhos.split(',') if tamanho.strip()],
+            qualidade=int(os.getenv('ANPR_MINIATURA_QUALIDADE', '85')),
+            niveis=int(os.getenv('ANPR_ARMAZENAMENTO_NIVEIS', '2')),
+        )
+
+    @property
+    def tamanho_padrao(self) -> int:
+        """Tamanho usado nas listagens (o do meio dos configurados)."""
+        return self.tamanhos[len(self.tamanhos) // 2]
+
+    def caminho(self, nome: str, tamanho: int) -> str:
+        """Caminho da miniatura de `nome` no `tamanho` dado."""
+        pasta = os.path.join(self.pasta_uploads, PASTA_MINIATURAS, str(tamanho))
+        if PADRAO_NOME.fullmatch(nome):
+            # Originais endereçados pelo conteúdo: mesmas subpastas do hash
+            pasta = os.path.join(pasta, *subpastas(nome, self.niveis, self.largura_nivel))
+        return os.path.join(pasta, f"{nome}.jpg")
+
+    def remover(self, nome: str) -> None:
+        """Remove as miniaturas de um original, em todos os tamanhos."""
+        for tamanho in self.tamanhos:
+            try:
+                os.remove(self.caminho(nome, tamanho))
+            except FileNotFoundError:
+                pass
+
+    def obter(self, caminho_original: str, tamanho: int) -> str:
+        """
+        Caminho da miniatura de um original, gerando-a se ainda não existir.
+
+        Raises:
+            ValueError: Se `tamanho` não estiver entre os configurados ou se o
+                original não puder ser decodificado
+        """
+        if tamanho not in self.tamanhos:
+            raise ValueError(f"Tamanho de miniatura inválido: {tamanho} (aceitos: {list(self.tamanhos)})")
+
+        caminho = self.caminho(os.path.basename(caminho_original), tamanho)
+        if not os.path.exists(caminho):
+            self._gerar(caminho_original, caminho, tamanho)
+        return caminho
+
+    def _gerar(self, caminho_original: str, caminho: str, tamanho: int) -> None:
+        with open(caminho_original, 'rb') as arquivo:
+            dados = arquivo.read()
+
+        with medir_etapa("miniatura"):
+            conteudo = codificar_reduzida(dados, tamanho, self.qualidade)
+
+        # Escrita atômica: requisições simultâneas nunca leem uma miniatura pela metade
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        logger.debug(f"Miniatura gerada: {caminho}")
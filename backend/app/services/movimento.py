@@ -0,0 +1,149 @@
+"""
+Filtro de movimento antes do detector, para câmeras fixas com captura contínua.
+
+Em uma portaria a maior parte dos quadros mostra a faixa vazia. Para cada
+câmera, o filtro guarda uma miniatura em tons de cinza do último quadro
+processado e compara o quadro novo com ela (diferença absoluta). Se a fração
+de pixels alterados dentro da ROI da câmera ficar abaixo da sensibilidade, o
+quadro é ignorado sem passar pelo pré-processamento, detecção e OCR.
+
+A referência só é atualizada quando um quadro é processado, então mudanças
+lentas (um veículo se aproximando devagar) acumulam até passar do limite.
+Depois de `intervalo_maximo` segundos sem processar, o próximo quadro é
+processado de qualquer forma.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .cameras import ConfiguracaoCamera
+from .metricas import QUADROS_FILTRO_MOVIMENTO
+
+logger = logging.getLogger(__name__)
+
+# Largura da miniatura comparada entre quadros
+LARGURA_ANALISE = 160
+
+
+@dataclass
+class _Referencia:
+    """Miniatura do último quadro processado de uma câmera."""
+    miniatura: np.ndarray
+    instante: float
+
+
+class FiltroMovimento:
+    """Decide, por câmera, se um quadro mudou o suficiente para ser reconhecido."""
+
+    def __init__(self, ativo: bool = False, limiar_pixel: int = 25, fracao_minima: float = 0.005,
+                 intervalo_maximo: float = 30.0, largura: int = LARGURA_ANALISE):
+        """
+        Args:
+            ativo: Se False, todos os quadros são processados
+            limiar_pixel: Diferença de intensidade (0-255) para um pixel contar como alterado
+            fracao_minima: Fração dos pixels da ROI que precisa mudar (sensibilidade).
+                Pode ser sobrescrita por câmera com a chave `movimento` em `CAMERAS_CONFIG`.
+            intervalo_maximo: Segundos após os quais um quadro é processado mesmo sem movimento
+            largura: Largura da miniatura comparada
+        """
+        self.ativo = ativo
+        self.limiar_pixel = limiar_pixel
+        self.fracao_minima = fracao_minima
+        self.intervalo_maximo = intervalo_maximo
+        self.largura = largura
+        self._lock = threading.Lock()
+        self._referencias: dict[str, _Referencia] = {}
+        self._processados: Counter = Counter()
+        self._ignorados: Counter = Counter()
+
+    @classmethod
+    def from_env(cls) -> "FiltroMovimento":
+        return cls(
+            ativo=os.getenv('ANPR_FILTRO_MOVIMENTO', '0').lower() in ('1', 'true', 'sim'),
+            limiar_pixel=int(os.getenv('ANPR_MOVIMENTO_LIMIAR_PIXEL', '25')),
+            fracao_minima=float(os.getenv('ANPR_MOVIMENTO_FRACAO', '0.005')),
+            intervalo_maximo=float(os.getenv('ANPR_MOVIMENTO_INTERVALO_MAXIMO', '30')),
+        )
+
+    def _miniatura(self, quadro: np.ndarray) -> np.ndarray:
+        """Miniatura em tons de cinza, suavizada para ignorar ruído do sensor."""
+        altura, largura = quadro.shape[:2]
+        nova_altura = max(1, round(altura * self.largura / largura))
+        miniatura = cv2.resize(quadro, (self.largura, nova_altura), interpolation=cv2.INTER_AREA)
+        if miniatura.ndim == 3:
+            miniatura = cv2.cvtColor(miniatura, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(miniatura, (5, 5), 0)
+
+    def tem_movimento(self, camera_id: str, quadro: np.ndarray,
+                      configuracao: Optional[ConfiguracaoCamera] = None) -> bool:
+        """
+        Compara o quadro com o último quadro processado da câmera.
+
+        Args:
+            camera_id: Câmera de origem
+            quadro: Quadro inteiro (a ROI é aplicada na miniatura)
+            configuracao: Configuração da câmera (ROI, máscaras e sensibilidade)
+
+        Returns:
+            bool: True se o quadro deve ser processado
+        """
+        if not self.ativo or not camera_id:
+            return True
+
+        miniatura = self._miniatura(quadro)
+        fracao_minima = self.fracao_minima
+        retangulo, mascara = None, None
+        if configuracao is not None:
+            if configuracao.fracao_movimento is not None:
+                fracao_minima = configuracao.fracao_movimento
+            if configuracao.tem_roi:
+                retangulo, mascara = configuracao.regiao(*miniatura.shape[:2])
+
+        agora = time.monotonic()
+        with self._lock:
+            referencia = self._referencias.get(camera_id)
+            if (referencia is None or referencia.miniatura.shape != miniatura.shape
+                    or agora - referencia.instante >= self.intervalo_maximo):
+                movimento = True
+            else:
+                alterados = cv2.absdiff(miniatura, referencia.miniatura) > self.limiar_pixel
+                if retangulo is not None:
+                    x0, y0, x1, y1 = retangulo
+                    alterados = alterados[y0:y1, x0:x1]
+                    if mascara is not None:
+                        alterados &= mascara.astype(bool)
+                    area = np.count_nonzero(mascara) if mascara is not None else alterados.size
+                else:
+                    area = alterados.size
+                movimento = area == 0 or np.count_nonzero(alterados) >= fracao_minima * area
+
+            if movimento:
+                self._referencias[camera_id] = _Referencia(miniatura, agora)
+                self._processados[camera_id] += 1
+            else:
+                self._ignorados[camera_id] += 1
+
+        QUADROS_FILTRO_MOVIMENTO.labels(resultado='processado' if movimento else 'ignorado').inc()
+        return movimento
+
+    def estatisticas(self) -> dict:
+        """Quadros processados e ignorados por câmera."""
+        with self._lock:
+            return {
+                'ativo': self.ativo,
+                'cameras': {
+                    camera_id: {
+                        'processados': self._processados[camera_id],
+                        'ignorados': self._ignorados[camera_id],
+                    }
+                    for camera_id in sorted(set(self._processados) | set(self._ignorados))
+                },
+            }
@@ -0,0 +1,141 @@
+"""
+Controle dos níveis de qualidade do reconhecimento conforme a carga do serviço.
+
+Quando muitas câmeras disparam ao mesmo tempo, é preferível uma leitura rápida
+a uma leitura completa que chega depois que o veículo já passou. O controlador
+acompanha a quantidade de reconhecimentos em andamento e a latência recente e
+escolhe o nível de qualidade de cada requisição, com histerese para evitar
+oscilações entre os níveis.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+# Todas as variantes de pré-processamento + imagem anotada
+NIVEL_COMPLETO = "completo"
+# Apenas original + CLAHE
+NIVEL_REDUZIDO = "reduzido"
+# Passada única na original, sem imagem anotada
+NIVEL_MINIMO = "minimo"
+
+NIVEIS = (NIVEL_COMPLETO, NIVEL_REDUZIDO, NIVEL_MINIMO)
+
+
+class ControladorQualidade:
+    """Escolhe o nível de qualidade a partir da fila e da latência recente."""
+
+    def __init__(
+        self,
+        limite_fila_reduzido: int = 4,
+        limite_fila_minimo: int = 8,
+        limite_latencia_reduzido: float = 1.5,
+        limite_latencia_minimo: float = 3.0,
+        histerese: float = 0.6,
+        janela_latencia: int = 20,
+        nivel_fixo: Optional[str] = None,
+    ):
+        """
+        Inicializa o controlador.
+
+        Args:
+            limite_fila_reduzido: Reconhecimentos em andamento a partir dos quais usa o nível reduzido
+            limite_fila_minimo: Reconhecimentos em andamento a partir dos quais usa o nível mínimo
+            limite_latencia_reduzido: Latência média (s) a partir da qual usa o nível reduzido
+            limite_latencia_minimo: Latência média (s) a partir da qual usa o nível mínimo
+            histerese: Fração dos limites abaixo da qual o nível volta a melhorar
+            janela_latencia: Quantidade de reconhecimentos recentes considerados na latência
+            nivel_fixo: Se informado, ignora a carga e usa sempre este nível
+        """
+        if nivel_fixo is not None and nivel_fixo not in NIVEIS:
+            raise ValueError(f"Nível de qualidade inválido: {nivel_fixo}")
+
+        # Limites indexados pelo nível (o nível completo não tem limite de entrada)
+        self.limites_fila = (0, limite_fila_reduzido, limite_fila_minimo)
+        self.limites_latencia = (0.0, limite_latencia_reduzido, limite_latencia_minimo)
+        self.histerese = histerese
+        self.nivel_fixo = nivel_fixo
+
+        self._lock = threading.Lock()
+        self._em_andamento = 0
+        self._latencias: deque = deque(maxlen=janela_latencia)
+        self._indice_nivel = 0
+
+    @classmethod
+    def from_env(cls) -> "ControladorQualidade":
+        """Cria o controlador a partir das variáveis de ambiente."""
+        nivel_fixo = os.getenv('ANPR_NIVEL_QUALIDADE', 'auto')
+        return cls(
+            limite_fila_reduzido=int(os.getenv('ANPR_FILA_REDUZIDO', '4')),
+            limite_fila_minimo=int(os.getenv('ANPR_FILA_MINIMO', '8')),
+            limite_latencia_reduzido=float(os.getenv('ANPR_LATENCIA_REDUZIDO', '1.5')),
+            limite_latencia_minimo=float(os.getenv('ANPR_LATENCIA_MINIMO', '3.0')),
+            histerese=float(os.getenv('ANPR_HISTERESE', '0.6')),
+            nivel_fixo=None if nivel_fixo == 'auto' else nivel_fixo,
+        )
+
+    @property
+    def em_andamento(self) -> int:
+        """Quantidade de reconhecimentos em andamento."""
+        return self._em_andamento
+
+    @property
+    def nivel_atual(self) -> str:
+        """Nível de qualidade em vigor."""
+        return self.nivel_fixo or NIVEIS[self._indice_nivel]
+
+    def latencia_media(self) -> float:
+        """Latência média (s) dos reconhecimentos recentes."""
+        with self._lock:
+            return self._latencia_media()
+
+    def _latencia_media(self) -> float:
+        if not self._latencias:
+            return 0.0
+        return sum(self._latencias) / len(self._latencias)
+
+    def _acima_do_limite(self, indice: int, fila: int, latencia: float, fator: float) -> bool:
+        return (fila >= self.limites_fila[indice] * fator
+                or latencia >= self.limites_latencia[indice] * fator)
+
+    def _reavaliar(self) -> None:
+        """Atualiza o nível atual. Deve ser chamado com o lock adquirido."""
+        fila = self._em_andamento
+        latencia = self._latencia_media()
+        indice = self._indice_nivel
+
+        # Piora imediatamente ao atingir o limite do próximo nível
+        while indice < len(NIVEIS) - 1 and self._acima_do_limite(indice + 1, fila, latencia, 1.0):
+            indice += 1
+
+        # Só melhora quando a carga cai bem abaixo do limite do nível atual
+        while indice > 0 and not self._acima_do_limite(indice, fila, latencia, self.histerese):
+            indice -= 1
+
+        self._indice_nivel = indice
+
+    @contextmanager
+    def requisicao(self) -> Iterator[str]:
+        """
+        Registra um reconhecimento em andamento e fornece o nível a ser usado.
+
+        A latência do bloco é contabilizada ao final para as próximas decisões.
+        """
+        with self._lock:
+            self._em_andamento += 1
+            self._reavaliar()
+            nivel = self.nivel_atual
+
+        inicio = time.perf_counter()
+        try:
+            yield nivel
+        finally:
+            duracao = time.perf_counter() - inicio
+            with self._lock:
+                self._em_andamento -= 1
+                self._latencias.append(duracao)
+                self._reavaliar()
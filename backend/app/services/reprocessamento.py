@@ -0,0 +1,290 @@
+"""
+Reprocessamento em massa das imagens originais (depois de trocar modelo ou limiares).
+
+Percorre os registros de uma placa com `original_path` (ou todas as imagens de
+uma pasta, com `--pasta`) e executa o reconhecimento de novo em um pool de
+processos. Cada processo carrega os modelos uma única vez, ao iniciar, e
+recebe só o caminho da imagem.
+
+Os resultados são gravados em lotes, com upserts, na coleção
+`REPROCESSAMENTO_COLLECTION` (uma entrada por registro, ou por pasta e arquivo,
+com a leitura anterior e a nova), o que permite comparar os modelos antes de mexer
+nos registros. Com `--aplicar`, a `placa` dos registros cuja leitura mudou
+também é trocada (a anterior fica em `placa_anterior`).
+
+A execução pode ser interrompida e retomada: após cada lote gravado, o
+checkpoint guarda o último item concluído. Os itens são percorridos sempre na
+mesma ordem (`_id` dos registros ou caminho dos arquivos) e os resultados são
+gravados nessa ordem, então tudo até o checkpoint já foi gravado.
+
+O filtro de movimento fica desligado e o estado aprendido das estratégias não
+é gravado, para não interferir com a API.
+
+Uso (de `backend/`):
+
+    python -m app.services.reprocessamento --processos 4
+    python -m app.services.reprocessamento --pasta uploads/originals --nivel completo
+    python -m app.services.reprocessamento --aplicar --checkpoint reprocessamento.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from .qualidade import NIVEL_COMPLETO, NIVEL_MINIMO, NIVEL_REDUZIDO
+
+EXTENSOES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Serviço e nível de qualidade de cada processo do pool (definidos em `_inicializar_processo`)
+_servico = None
+_nivel: Optional[str] = None
+
+
+def _inicializar_processo(nivel: str) -> None:
+    """Carrega os modelos no processo do pool."""
+    global _servico, _nivel
+    # Modelos locais, sem filtro de movimento e sem gravar o estado aprendido
+    os.environ.pop('ANPR_SERVIDOR_INFERENCIA', None)
+    os.environ.pop('ANPR_FILA_TRABALHOS', None)
+    os.environ['ANPR_FILTRO_MOVIMENTO'] = '0'
+    os.environ['ANPR_ESTADO_ESTRATEGIAS'] = ''
+
+    from .anpr_service import anpr_service
+    if anpr_service.alpr is None:
+        raise RuntimeError("FastALPR não inicializado")
+    _servico = anpr_service
+    _nivel = nivel
+
+
+def _processar(tarefa: dict) -> dict:
+    """Reconhece uma imagem. Erros vão no resultado, para não interromper o lote."""
+    from .imagem import ImagemEntrada
+
+    resultado = {
+        '_id': tarefa.get('id', tarefa['chave']),
+        'chave': tarefa['chave'],
+        'registro': tarefa.get('registro'),
+        'caminho': tarefa['caminho'],
+        'placa_anterior': tarefa.get('placa'),
+        'placa': None,
+        'erro': None,
+    }
+    try:
+        with open(tarefa['caminho'], 'rb') as arquivo:
+            dados = arquivo.read()
+        entrada = ImagemEntrada(dados, tarefa.get('espelhar', False))
+        reconhecimento = _servico.reconhecer_placa_detalhado(
+            entrada, nivel_qualidade=_nivel, camera_id=tarefa.get('camera_id')
+        )
+        resultado.update(
+            placa=reconhecimento.texto,
+            confianca=float(reconhecimento.confianca),
+            estrategia=reconhecimento.estrategia,
+            nivel_qualidade=reconhecimento.nivel_qualidade,
+        )
+    except Exception as e:
+        resultado['erro'] = repr(e)
+    return resultado
+
+
+def _percorrer(pasta: str, relativo: tuple = ()) -> Iterator[tuple]:
+    """
+    Caminhos relativos (como tuplas de partes) das imagens da pasta, em ordem.
+
+    Arquivos e subpastas são intercalados pelo nome, então a ordem é a mesma
+    da comparação das tuplas (usada na retomada).
+    """
+    with os.scandir(os.path.join(pasta, *relativo)) as entradas:
+        entradas = sorted(entradas, key=lambda entrada: entrada.name)
+    for entrada in entradas:
+        partes = relativo + (entrada.name,)
+        if entrada.is_dir():
+            yield from _percorrer(pasta, partes)
+        elif entrada.name.lower().endswith(EXTENSOES):
+            yield partes
+
+
+def tarefas_pasta(pasta: str, apos: Optional[str] = None) -> Iterator[dict]:
+    """
+    Tarefas das imagens de uma pasta, depois do caminho relativo `apos`.
+
+    A `chave` (checkpoint) é o caminho relativo; o `id` do resultado também
+    leva a pasta, para que arquivos de mesmo nome em pastas diferentes não se
+    sobrescrevam na coleção.
+    """
+    origem = os.path.abspath(pasta)
+    limite = tuple(apos.split('/')) if apos else None
+    for partes in _percorrer(pasta):
+        if limite is not None and partes <= limite:
+            continue
+        relativo = '/'.join(partes)
+        yield {'chave': relativo, 'id': f"{origem}:{relativo}", 'caminho': os.path.join(pasta, *partes)}
+
+
+def tarefas_banco(db, apos: Optional[str] = None, batch_size: int = 1000) -> Iterator[dict]:
+    """Tarefas dos registros com imagem original, depois do registro `apos`."""
+    for documento in db.iterar_originais(apos, batch_size):
+        registro = str(documento['_id'])
+        yield {
+            'chave': registro,
+            'registro': registro,
+            'caminho': documento['original_path'],
+            'placa': documento.get('placa'),
+            'camera_id': documento.get('camera_id'),
+            'espelhar': bool(documento.get('espelhada')),
+        }
+
+
+def executar_em_ordem(executor: ProcessPoolExecutor, tarefas: Iterable[dict],
+                      em_voo: int) -> Iterator[dict]:
+    """
+    Resultados das tarefas na ordem de entrada, com no máximo `em_voo` tarefas
+    submetidas ao mesmo tempo (o `executor.map` submeteria todas de uma vez).
+    """
+    pendentes: deque = deque()
+    for tarefa in tarefas:
+        pendentes.append(executor.submit(_processar, tarefa))
+        if len(pendentes) >= em_voo:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def ler_checkpoint(caminho: str) -> dict:
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def gravar_checkpoint(caminho: str, dados: dict) -> None:
+    """Grava o checkpoint de forma atômica (nunca fica pela metade)."""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+class Progresso:
+    """Contadores da execução e linha de progresso com a vazão."""
+
+    def __init__(self, total: Optional[int], processados: int = 0):
+        self.total = total
+        self.processados = processados
+        self.reconhecidas = 0
+        self.alteradas = 0
+        self.falhas = 0
+        self._nesta_execucao = 0
+        self._inicio = time.monotonic()
+
+    def registrar(self, resultado: dict) -> None:
+        self.processados += 1
+        self._nesta_execucao += 1
+        if resultado['erro']:
+            self.falhas += 1
+        elif resultado['placa']:
+            self.reconhecidas += 1
+            if resultado['placa_anterior'] and resultado['placa'] != resultado['placa_anterior']:
+                self.alteradas += 1
+
+    @property
+    def imagens_por_segundo(self) -> float:
+        return self._nesta_execucao / max(time.monotonic() - self._inicio, 1e-9)
+
+    def linha(self) -> str:
+        if self.total:
+            andamento = f"{self.processados}/{self.total} ({self.processados / self.total:.1%})"
+        else:
+            andamento = str(self.processados)
+        return (f"{andamento} — {self.imagens_por_segundo:.1f} imagens/s — "
+                f"{self.reconhecidas} reconhecidas, {self.alteradas} alteradas, {self.falhas} falhas")
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Reprocessa as imagens originais com o pipeline atual")
+    parser.add_argument("--pasta", help="Reprocessa as imagens desta pasta em vez dos registros do banco")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Processos do pool")
+    parser.add_argument("--nivel", default=NIVEL_COMPLETO, choices=(NIVEL_COMPLETO, NIVEL_REDUZIDO, NIVEL_MINIMO),
+                        help="Nível de qualidade do pipeline (fixo, sem degradar com a carga)")
+    parser.add_argument("--lote", type=int, default=500, help="Resultados por escrita em lote")
+    parser.add_argument("--checkpoint", default="reprocessamento.checkpoint.json",
+                        help="Arquivo de checkpoint para retomar a execução")
+    parser.add_argument("--recomecar", action="store_true", help="Ignora o checkpoint existente")
+    parser.add_argument("--aplicar", action="store_true",
+                        help="Troca a placa dos registros cuja leitura mudou (só com o banco)")
+    args = parser.parse_args()
+    if args.aplicar and args.pasta:
+        parser.error("--aplicar só vale para os registros do banco")
+
+    from .database import db_service
+
+    origem = os.path.abspath(args.pasta) if args.pasta else 'banco'
+    checkpoint = {} if args.recomecar else ler_checkpoint(args.checkpoint)
+    if checkpoint and checkpoint.get('origem') != origem:
+        parser.error(f"O checkpoint {args.checkpoint} é de outra origem ({checkpoint.get('origem')}); "
+                     "use --recomecar ou outro --checkpoint")
+    ultimo = checkpoint.get('ultimo')
+
+    if args.pasta:
+        tarefas = tarefas_pasta(args.pasta, ultimo)
+        total = sum(1 for _ in tarefas_pasta(args.pasta))
+    else:
+        tarefas = tarefas_banco(db_service, ultimo)
+        total = db_service.contar_originais()
+    progresso = Progresso(total, checkpoint.get('processados', 0))
+    if ultimo:
+        print(f"Retomando após {ultimo} ({progresso.processados} já processados)")
+
+    contexto = multiprocessing.get_context('spawn')
+    lote: list[dict] = []
+    atualizados = 0
+
+    def gravar() -> None:
+        nonlocal atualizados, lote
+        if not lote:
+            return
+        atualizados += db_service.salvar_reprocessamento(lote, aplicar=args.aplicar)
+        gravar_checkpoint(args.checkpoint, {
+            'origem': origem,
+            'ultimo': lote[-1]['chave'],
+            'processados': progresso.processados,
+            'atualizado_em': datetime.now().isoformat(timespec='seconds'),
+        })
+        lote = []
+        print(progresso.linha(), flush=True)
+
+    with ProcessPoolExecutor(max_workers=args.processos, mp_context=contexto,
+                             initializer=_inicializar_processo, initargs=(args.nivel,)) as executor:
+        for resultado in executar_em_ordem(executor, tarefas, em_voo=args.processos * 4):
+            resultado['origem'] = origem
+            resultado['processado_em'] = datetime.now()
+            lote.append(resultado)
+            progresso.registrar(resultado)
+            if len(lote) >= args.lote:
+                gravar()
+        gravar()
+
+    print(f"Concluído: {progresso.linha()}")
+    if args.aplicar:
+        print(f"{atualizados} registro(s) atualizado(s)")
+    db_service.close_connection()
+
+
+if __name__ == "__main__":
+    main()
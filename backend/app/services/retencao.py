@@ -0,0 +1,179 @@
+"""
+Retenção das imagens originais.
+
+Originais usados só por registros mais antigos que a idade configurada são
+compactados (recodificados em JPEG menor, gravados pelo novo hash) ou apagados.
+As referências `original_path` no MongoDB são trocadas em uma escrita em lote
+por lote de arquivos, antes de os arquivos antigos serem removidos, então um
+registro nunca aponta para um arquivo que já não existe. Um original que um
+novo upload idêntico reaproveitou depois de ser listado não é removido
+(`ArmazenamentoOriginais.descartar`) e fica para uma próxima execução.
+
+Uso (de `backend/`, por exemplo em um cron diário):
+
+    python -m app.services.retencao --dias 90 --modo compactar
+    python -m app.services.retencao --dias 365 --modo apagar --simular
+"""
+
+import argparse
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from .armazenamento import ArmazenamentoOriginais
+from .imagem import codificar_reduzida
+from .miniaturas import Miniaturas
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("compactar", "apagar")
+
+
+@dataclass
+class ResultadoRetencao:
+    """Resumo de uma execução da retenção."""
+    originais: int = 0
+    registros_atualizados: int = 0
+    bytes_liberados: int = 0
+    falhas: list = field(default_factory=list)
+
+
+class Retencao:
+    """Compacta ou apaga os originais antigos e atualiza os registros que os usam."""
+
+    def __init__(self, db, armazenamento: ArmazenamentoOriginais, miniaturas: Miniaturas,
+                 dias: int = 90, modo: str = "compactar", lado_maximo: int = 1280,
+                 qualidade: int = 70, tamanho_lote: int = 500):
+        """
+        Args:
+            db: `DatabaseService` com os registros
+            armazenamento: Onde os originais compactados são gravados
+            miniaturas: Miniaturas dos originais removidos também são apagadas
+            dias: Idade (pela `hora_entrada` mais recente) a partir da qual um original é tratado
+            modo: "compactar" ou "apagar"
+            lado_maximo: Lado maior dos originais compactados
+            qualidade: Qualidade JPEG dos originais compactados
+            tamanho_lote: Originais tratados por escrita em lote no banco
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de retenção desconhecido: {modo}")
+        self.db = db
+        self.armazenamento = armazenamento
+        self.miniaturas = miniaturas
+        self.dias = dias
+        self.modo = modo
+        self.lado_maximo = lado_maximo
+        self.qualidade = qualidade
+        self.tamanho_lote = tamanho_lote
+
+    @classmethod
+    def from_env(cls, db) -> "Retencao":
+        return cls(
+            db,
+            ArmazenamentoOriginais.from_env(),
+            Miniaturas.from_env(),
+            dias=int(os.getenv('ANPR_RETENCAO_DIAS', '90')),
+            modo=os.getenv('ANPR_RETENCAO_MODO', 'compactar'),
+            lado_maximo=int(os.getenv('ANPR_RETENCAO_LADO_MAXIMO', '1280')),
+            qualidade=int(os.getenv('ANPR_RETENCAO_QUALIDADE', '70')),
+        )
+
+    def executar(self, simular: bool = False) -> ResultadoRetencao:
+        """
+        Trata todos os originais mais antigos que `dias`, em lotes.
+
+        Args:
+            simular: Se True, só conta os originais que seriam tratados
+        """
+        limite_hora = (datetime.now() - timedelta(days=self.dias)).strftime('%Y-%m-%d %H:%M:%S')
+        resultado = ResultadoRetencao()
+        ignorados = set()
+
+        while True:
+            caminhos = [
+                caminho for caminho in self.db.listar_originais_antigos(
+                    limite_hora, self.tamanho_lote + len(ignorados))
+                if caminho not in ignorados
+            ][:self.tamanho_lote]
+            if not caminhos:
+                break
+            if simular:
+                resultado.originais += len(caminhos)
+                ignorados.update(caminhos)
+                continue
+
+            substituicoes = {}
+            marcas = {}
+            for caminho in caminhos:
+                try:
+                    # Antes de tratar: um reaproveitamento a partir daqui impede a remoção
+                    marcas[caminho] = self.armazenamento.marca(caminho)
+                    substituicoes[caminho] = self._tratar(caminho)
+                except Exception as e:
+                    # Falhas não travam a fila: o original fica como está
+                    logger.warning(f"Retenção falhou para {caminho}: {e}")
+                    resultado.falhas.append(caminho)
+                    ignorados.add(caminho)
+
+            # Primeiro o banco, depois os arquivos: nenhum registro aponta para um arquivo removido
+            resultado.registros_atualizados += self.db.substituir_originais(substituicoes)
+            for antigo, novo in substituicoes.items():
+                if antigo == novo:
+                    continue
+                marca = marcas[antigo]
+                if marca is not None:
+                    tamanho = os.path.getsize(antigo) if os.path.exists(antigo) else 0
+                    if not self.armazenamento.descartar(antigo, marca):
+                        logger.info(f"Original reaproveitado durante a retenção, mantido: {antigo}")
+                        continue
+                    resultado.bytes_liberados += tamanho - (os.path.getsize(novo) if novo else 0)
+                self.miniaturas.remover(os.path.basename(antigo))
+            resultado.originais += len(substituicoes)
+
+        logger.info(f"Retenção ({self.modo}, {self.dias} dias): {resultado.originais} original(is), "
+                    f"{resultado.registros_atualizados} registro(s), "
+                    f"{resultado.bytes_liberados / 1e6:.1f} MB liberados")
+        return resultado
+
+    def _tratar(self, caminho: str):
+        """Novo caminho do original (None se apagado)."""
+        if self.modo == "apagar" or not os.path.exists(caminho):
+            return None
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        compactado = codificar_reduzida(dados, self.lado_maximo, self.qualidade)
+        if len(compactado) >= len(dados):
+            # Já é pequeno: mantém o arquivo e só marca como compactado
+            return caminho
+        _, novo, _ = self.armazenamento.salvar(compactado, '.jpg')
+        return novo
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Compacta ou apaga as imagens originais antigas")
+    parser.add_argument("--dias", type=int, default=int(os.getenv('ANPR_RETENCAO_DIAS', '90')),
+                        help="Idade mínima (dias) dos originais tratados")
+    parser.add_argument("--modo", choices=MODOS, default=os.getenv('ANPR_RETENCAO_MODO', 'compactar'))
+    parser.add_argument("--simular", action="store_true", help="Só conta os originais, sem alterar nada")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from .database import db_service
+
+    retencao = Retencao.from_env(db_service)
+    retencao.dias = args.dias
+    retencao.modo = args.modo
+    resultado = retencao.executar(simular=args.simular)
+    if args.simular:
+        print(f"{resultado.originais} original(is) seriam tratados")
+    if resultado.falhas:
+        print(f"{len(resultado.falhas)} original(is) com falha")
+    db_service.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Seleção adaptativa das estratégias de pré-processamento.
+
+Na prática, uma ou duas variantes de `preprocessar_imagem` vencem para cada
+câmera e condição de iluminação. O seletor mantém, por câmera e hora do dia,
+um bandit Beta-Bernoulli sobre as estratégias (sucesso = a estratégia deu a
+leitura de maior confiança) e usa amostragem de Thompson para ordená-las. O
+pipeline tenta as estratégias nessa ordem e para assim que obtém uma leitura
+confiável, deixando de chamar o detector nas demais.
+
+Uma fração das requisições (`exploracao`), e todas enquanto um contexto tem
+poucas observações, ainda executa a varredura completa para manter as
+estatísticas atualizadas.
+
+O estado aprendido é gravado em JSON e sobrevive a reinicializações. Vários
+workers podem compartilhar o mesmo arquivo: cada um grava apenas os
+incrementos acumulados desde a última gravação, sob lock de arquivo.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CAMERA_PADRAO = "padrao"
+
+
+class SeletorEstrategias:
+    """Bandit por câmera e hora do dia sobre as estratégias de pré-processamento."""
+
+    def __init__(
+        self,
+        caminho_estado: Optional[str] = None,
+        exploracao: float = 0.1,
+        minimo_observacoes: int = 20,
+        limiar_parada: float = 0.9,
+        salvar_a_cada: int = 50,
+        limite_contagem: float = 500.0,
+        semente: Optional[int] = None,
+    ):
+        """
+        Inicializa o seletor.
+
+        Args:
+            caminho_estado: Arquivo JSON do estado aprendido. Se None, não persiste.
+            exploracao: Fração das requisições que faz a varredura completa
+            minimo_observacoes: Observações por contexto antes de começar a podar
+            limiar_parada: Confiança do OCR a partir da qual as demais estratégias são puladas
+            salvar_a_cada: Quantidade de atualizações entre gravações do estado
+            limite_contagem: Total por estratégia a partir do qual as contagens são
+                reduzidas à metade, para que o seletor acompanhe mudanças na cena
+            semente: Semente aleatória (testes e benchmarks)
+        """
+        self.caminho_estado = caminho_estado
+        self.exploracao = exploracao
+        self.minimo_observacoes = minimo_observacoes
+        self.limiar_parada = limiar_parada
+        self.salvar_a_cada = salvar_a_cada
+        self.limite_contagem = limite_contagem
+
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+        # contexto -> estratégia -> [vitórias, derrotas]
+        self._contagens: dict = {}
+        self._incrementos: dict = {}
+        self._atualizacoes_pendentes = 0
+
+        if caminho_estado:
+            self._contagens = self._ler_estado()
+
+    @classmethod
+    def from_env(cls) -> "SeletorEstrategias":
+        """Cria o seletor a partir das variáveis de ambiente."""
+        return cls(
+            caminho_estado=os.getenv('ANPR_ESTADO_ESTRATEGIAS', 'estado/estrategias.json') or None,
+            exploracao=float(os.getenv('ANPR_EXPLORACAO', '0.1')),
+            minimo_observacoes=int(os.getenv('ANPR_MINIMO_OBSERVACOES', '20')),
+            limiar_parada=float(os.getenv('ANPR_LIMIAR_PARADA', '0.9')),
+        )
+
+    @staticmethod
+    def contexto(camera_id: Optional[str], momento: Optional[datetime] = None) -> str:
+        """Chave do contexto: câmera e hora do dia."""
+        momento = momento or datetime.now()
+        return f"{camera_id or CAMERA_PADRAO}:{momento.hour:02d}"
+
+    def planejar(self, contexto: str, estrategias: Sequence[str]) -> tuple[list[str], bool]:
+        """
+        Define a ordem em que as estratégias serão tentadas.
+
+        Args:
+            contexto: Chave retornada por `contexto()`
+            estrategias: Estratégias permitidas (ex.: as do nível de qualidade)
+
+        Returns:
+            tuple: (estratégias ordenadas, se a varredura deve ser completa)
+        """
+        if len(estrategias) <= 1:
+            return list(estrategias), True
+
+        with self._lock:
+            contagens = self._contagens.get(contexto, {})
+            observacoes = sum(v + d for v, d in contagens.values()) / len(estrategias)
+
+            if observacoes < self.minimo_observacoes or self._rng.random() < self.exploracao:
+                return list(estrategias), True
+
+            amostras = {}
+            for estrategia in estrategias:
+                vitorias, derrotas = contagens.get(estrategia, (0.0, 0.0))
+                amostras[estrategia] = self._rng.betavariate(vitorias + 1, derrotas + 1)
+
+        ordenadas = sorted(estrategias, key=lambda e: amostras[e], reverse=True)
+        return ordenadas, False
+
+    def deve_parar(self, confianca: float, completo: bool) -> bool:
+        """Indica se as estratégias restantes podem ser puladas."""
+        return not completo and confianca >= self.limiar_parada
+
+    def registrar(self, contexto: str, confiancas: dict, vencedora: Optional[str]) -> None:
+        """
+        Registra o resultado das estratégias tentadas em um reconhecimento.
+
+        Args:
+            contexto: Chave do contexto
+            confiancas: Estratégia -> melhor confiança obtida (0.0 se nada válido)
+            vencedora: Estratégia que deu a leitura final, ou None
+        """
+        if len(confiancas) <= 1 and vencedora is None:
+            return
+
+        with self._lock:
+            for estrategia in confiancas:
+                ganhou = 1.0 if estrategia == vencedora else 0.0
+                for alvo in (self._contagens, self._incrementos):
+                    contagem = alvo.setdefault(contexto, {}).setdefault(estrategia, [0.0, 0.0])
+                    contagem[0] += ganhou
+                    contagem[1] += 1.0 - ganhou
+
+            self._reduzir_contagens(self._contagens[contexto])
+            self._atualizacoes_pendentes += 1
+            salvar = self.caminho_estado and self._atualizacoes_pendentes >= self.salvar_a_cada
+
+        if salvar:
+            self.salvar()
+
+    def _reduzir_contagens(self, contagens: dict) -> None:
+        """Reduz à metade as contagens de um contexto enquanto passarem do limite."""
+        while any(v + d > self.limite_contagem for v, d in contagens.values()):
+            for contagem in contagens.values():
+                contagem[0] /= 2
+                contagem[1] /= 2
+
+    def estatisticas(self) -> dict:
+        """Taxa de vitória estimada por contexto e estratégia."""
+        with self._lock:
+            return {
+                contexto: {
+                    estrategia: round((v + 1) / (v + d + 2), 3)
+                    for estrategia, (v, d) in contagens.items()
+                }
+                for contexto, contagens in self._contagens.items()
+            }
+
+    def _ler_estado(self) -> dict:
+        try:
+            with open(self.caminho_estado, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado das estratégias ignorado ({self.caminho_estado}): {e}")
+            return {}
+
+    def salvar(self) -> None:
+        """Grava os incrementos locais no arquivo de estado, somando aos de outros workers."""
+        if not self.caminho_estado:
+            return
+
+        with self._lock:
+            incrementos, self._incrementos = self._incrementos, {}
+            self._atualizacoes_pendentes = 0
+
+        if not incrementos:
+            return
+
+        diretorio = os.path.dirname(self.caminho_estado) or "."
+        try:
+            os.makedirs(diretorio, exist_ok=True)
+            with open(f"{self.caminho_estado}.lock", "w") as trava:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+                estado = self._ler_estado()
+                for contexto, contagens in incrementos.items():
+                    for estrategia, (vitorias, derrotas) in contagens.items():
+                        atual = estado.setdefault(contexto, {}).setdefault(estrategia, [0.0, 0.0])
+                        atual[0] += vitorias
+                        atual[1] += derrotas
+                    self._reduzir_contagens(estado[contexto])
+
+                temporario = f"{self.caminho_estado}.tmp"
+                with open(temporario, "w", encoding="utf-8") as arquivo:
+                    json.dump(estado, arquivo)
+                os.replace(temporario, self.caminho_estado)
+        except OSError as e:
+            logger.warning(f"Erro ao salvar estado das estratégias: {e}")
+            return
+
+        # Passa a enxergar também o que os outros workers aprenderam
+        with self._lock:
+            for contexto, contagens in self._incrementos.items():
+                for estrategia, (vitorias, derrotas) in contagens.items():
+                    atual = estado.setdefault(contexto, {}).setdefault(estrategia, [0.0, 0.0])
+                    atual[0] += vitorias
+                    atual[1] += derrotas
+            self._contagens = estado
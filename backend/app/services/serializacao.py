@@ -0,0 +1,62 @@
+"""
+Serialização JSON rápida das respostas de leitura (listagem, busca, por ID).
+
+Os documentos lidos do MongoDB já foram validados na gravação. Por isso as
+rotas de leitura não os transformam em modelos Pydantic, que o FastAPI
+validaria de novo e depois converteria em dicionários para o `json.dumps`.
+Cada documento é reduzido aos campos do modelo de resposta (`projetar`) e vai
+direto para o encoder. Com o pacote opcional `orjson`, a codificação é feita em
+C, com `datetime` nativo. O `ObjectId` é convertido em texto pelo encoder, sem
+uma passada extra sobre os documentos. Sem o `orjson`, usa-se o `json` da
+biblioteca padrão com as mesmas conversões.
+
+O `response_model` continua declarado nas rotas, então a documentação OpenAPI
+não muda.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from bson.objectid import ObjectId
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+def _converter(valor: Any) -> Any:
+    """Tipos do MongoDB que o encoder não conhece."""
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def serializar(conteudo: Any) -> bytes:
+    """Codifica o conteúdo em JSON (UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(conteudo, default=_converter)
+    return json.dumps(conteudo, default=_converter, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def campos_modelo(modelo) -> tuple[str, ...]:
+    """Nomes dos campos de um modelo Pydantic como aparecem no JSON (pelo alias)."""
+    return tuple(campo.alias or nome for nome, campo in modelo.model_fields.items())
+
+
+def projetar(documento: dict, campos: Iterable[str]) -> dict:
+    """Documento só com os campos da resposta, na ordem do modelo (ausentes como None)."""
+    return {campo: documento.get(campo) for campo in campos}
+
+
+class RespostaJSON(Response):
+    """Resposta JSON codificada por `serializar`, sem passar pela validação do FastAPI."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return serializar(content)
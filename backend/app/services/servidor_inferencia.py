@@ -0,0 +1,480 @@
+"""
+Servidor de inferência local, compartilhado por todos os workers da API.
+
+Sem o servidor, cada worker do uvicorn carrega sua própria cópia do detector
+YOLO e do OCR: a memória cresce com o número de workers e a capacidade de
+inferência fica presa a cada processo. Com `ANPR_SERVIDOR_INFERENCIA`
+definido, um único processo (`python -m app.services.servidor_inferencia`)
+carrega os modelos e executa o `ANPRService`. Os workers da API passam a usar
+um `ClienteInferencia`, que tem os mesmos métodos de reconhecimento.
+
+Transporte:
+
+- Cada cliente cria um bloco de `multiprocessing.shared_memory` dividido em
+  slots (anel). A imagem reduzida é copiada uma única vez para um slot livre,
+  seguida dos bytes originais do arquivo (usados se a resolução cheia for
+  necessária). O servidor lê os pixels direto da memória compartilhada.
+- Um canal de controle `multiprocessing.connection` leva apenas descritores
+  (slot, forma, tipo) e os resultados. A imagem resultado volta pelo mesmo slot.
+- Imagens que não cabem em um slot seguem pelo canal de controle.
+
+O canal é autenticado com `ANPR_SERVIDOR_CHAVE` (desafio HMAC do
+`multiprocessing`), feito na thread de cada conexão com prazo de
+`TEMPO_AUTENTICACAO` segundos: um cliente com chave errada ou que conecta e
+fica em silêncio não derruba o servidor nem atrasa os demais. Como o canal
+desserializa (pickle) o que recebe, um endereço TCP só é aceito com uma chave
+própria, diferente da padrão.
+
+As métricas do pipeline são registradas no processo do servidor. Com
+`PROMETHEUS_MULTIPROC_DIR` apontando para o mesmo diretório dos workers, elas
+aparecem no `/metrics` da API.
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import queue
+import signal
+import socket
+import struct
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from dataclasses import replace
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import (AuthenticationError, Client, Connection, Listener,
+                                        answer_challenge, deliver_challenge)
+from typing import Optional
+
+import numpy as np
+
+from .anpr_service import ANPRService, ResultadoMultiplasPlacas, ResultadoReconhecimento
+from .imagem import ImagemEntrada
+
+logger = logging.getLogger(__name__)
+
+ENDERECO_PADRAO = '/tmp/placaview-inferencia.sock'
+CHAVE_PADRAO = 'placaview'
+
+# Segundos para um cliente concluir a autenticação e se apresentar
+TEMPO_AUTENTICACAO = 10.0
+
+# Métodos do ANPRService que podem ser chamados pelo cliente
+METODOS_COM_IMAGEM = ('reconhecer_placa_detalhado', 'reconhecer_multiplas_placas_detalhado')
+METODOS_SEM_IMAGEM = ('obter_estatisticas',)
+
+
+def interpretar_endereco(endereco: str):
+    """`host:porta` vira um endereço TCP; qualquer outro valor é um socket Unix."""
+    if '/' not in endereco and ':' in endereco:
+        host, porta = endereco.rsplit(':', 1)
+        return host, int(porta)
+    return endereco
+
+
+def _chave() -> bytes:
+    return os.getenv('ANPR_SERVIDOR_CHAVE', CHAVE_PADRAO).encode()
+
+
+def _prazo_leitura(conexao: Connection, segundos: float) -> None:
+    """Prazo das leituras do socket da conexão (SO_RCVTIMEO); 0 remove o prazo."""
+    with socket.socket(fileno=os.dup(conexao.fileno())) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO,
+                        struct.pack('ll', int(segundos), int(segundos % 1 * 1_000_000)))
+
+
+def _anexar_memoria(nome: str) -> shared_memory.SharedMemory:
+    """Abre um bloco criado pelo cliente sem assumir a responsabilidade de removê-lo."""
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        # Python < 3.13: o resource_tracker removeria o bloco do cliente ao encerrar
+        memoria = shared_memory.SharedMemory(name=nome)
+        resource_tracker.unregister(memoria._name, "shared_memory")
+        return memoria
+
+
+class ServidorInferencia:
+    """Processo dono dos modelos, atendendo os workers da API."""
+
+    def __init__(self, servico: ANPRService, endereco: str = ENDERECO_PADRAO,
+                 threads: Optional[int] = None):
+        """
+        Inicializa o servidor.
+
+        Args:
+            servico: ANPRService com os modelos carregados
+            endereco: Socket Unix ou `host:porta`
+            threads: Reconhecimentos executados em paralelo (padrão: núcleos da CPU)
+        """
+        self.servico = servico
+        self.endereco = endereco
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads or os.cpu_count() or 4,
+            thread_name_prefix="inferencia",
+        )
+
+    def executar(self) -> None:
+        """Aceita conexões até o processo ser encerrado."""
+        endereco = interpretar_endereco(self.endereco)
+        if isinstance(endereco, str) and os.path.exists(endereco):
+            os.unlink(endereco)
+
+        # Sem `authkey` no Listener: a autenticação fica na thread de cada
+        # conexão, para não bloquear o `accept` dos demais clientes
+        with Listener(endereco) as listener:
+            logger.info(f"Servidor de inferência ouvindo em {self.endereco}")
+            while True:
+                try:
+                    conexao = listener.accept()
+                except OSError as e:
+                    logger.warning(f"Falha ao aceitar conexão: {e}")
+                    continue
+                threading.Thread(target=self._atender, args=(conexao,), daemon=True).start()
+
+    def _apresentar(self, conexao: Connection) -> tuple[str, int]:
+        """
+        Autentica o cliente e recebe a sua memória compartilhada.
+
+        Raises:
+            AuthenticationError: Chave errada
+            OSError: Prazo de `TEMPO_AUTENTICACAO` esgotado
+        """
+        chave = _chave()
+        _prazo_leitura(conexao, TEMPO_AUTENTICACAO)
+        deliver_challenge(conexao, chave)
+        answer_challenge(conexao, chave)
+        _, nome_memoria, tamanho_slot = conexao.recv()
+        _prazo_leitura(conexao, 0)
+        return nome_memoria, tamanho_slot
+
+    def _atender(self, conexao: Connection) -> None:
+        """Atende um cliente (um worker da API) até ele desconectar."""
+        try:
+            nome_memoria, tamanho_slot = self._apresentar(conexao)
+        except (AuthenticationError, EOFError, OSError) as e:
+            logger.warning(f"Conexão recusada: {e!r}")
+            conexao.close()
+            return
+
+        memoria = None
+        em_andamento: set = set()
+        try:
+            memoria = _anexar_memoria(nome_memoria)
+            trava_envio = threading.Lock()
+            logger.info(f"Cliente conectado (memória {nome_memoria})")
+
+            while True:
+                mensagem = conexao.recv()
+                futuro = self._executor.submit(
+                    self._processar, conexao, trava_envio, memoria, tamanho_slot, mensagem
+                )
+                em_andamento.add(futuro)
+                futuro.add_done_callback(em_andamento.discard)
+        except (EOFError, OSError):
+            logger.info("Cliente desconectado")
+        finally:
+            # Espera os reconhecimentos que ainda usam a memória deste cliente
+            wait(list(em_andamento))
+            conexao.close()
+            if memoria is not None:
+                try:
+                    memoria.close()
+                except BufferError:
+                    pass
+
+    def _processar(self, conexao: Connection, trava_envio: threading.Lock,
+                   memoria: shared_memory.SharedMemory, tamanho_slot: int, mensagem: tuple) -> None:
+        identificador, metodo, quadro, kwargs = mensagem
+        try:
+            if metodo in METODOS_SEM_IMAGEM:
+                resposta = (identificador, True, getattr(self.servico, metodo)(**kwargs), None)
+            elif metodo in METODOS_COM_IMAGEM:
+                entrada = self._abrir_quadro(memoria, tamanho_slot, quadro)
+                resultado = getattr(self.servico, metodo)(entrada, **kwargs)
+                imagem = self._gravar_imagem(memoria, tamanho_slot, quadro, resultado.imagem)
+                resposta = (identificador, True, replace(resultado, imagem=None), imagem)
+            else:
+                raise ValueError(f"Método desconhecido: {metodo}")
+        except Exception as e:
+            logger.error(f"Erro ao processar {metodo}: {e}", exc_info=True)
+            resposta = (identificador, False, repr(e), None)
+
+        with trava_envio:
+            try:
+                conexao.send(resposta)
+            except (OSError, EOFError):
+                pass
+
+    @staticmethod
+    def _abrir_quadro(memoria: shared_memory.SharedMemory, tamanho_slot: int, quadro: dict):
+        """Monta a imagem de entrada a partir do slot, sem copiar os pixels."""
+        if 'imagem' in quadro:
+            reduzida, dados = quadro['imagem'], quadro['dados']
+        else:
+            inicio = quadro['slot'] * tamanho_slot
+            forma, tipo = quadro['forma'], np.dtype(quadro['dtype'])
+            reduzida = np.ndarray(forma, tipo, buffer=memoria.buf, offset=inicio)
+            dados = None
+            if quadro['tamanho_dados']:
+                inicio_dados = inicio + reduzida.nbytes
+                dados = np.frombuffer(memoria.buf, np.uint8, quadro['tamanho_dados'], inicio_dados)
+
+        if dados is None:
+            return reduzida
+        return ImagemEntrada.de_quadro(dados, reduzida, quadro['fator'], quadro['escala'], quadro['espelhar'])
+
+    @staticmethod
+    def _gravar_imagem(memoria: shared_memory.SharedMemory, tamanho_slot: int,
+                       quadro: dict, imagem: Optional[np.ndarray]):
+        """Devolve a imagem resultado pelo slot do pedido, se couber."""
+        if imagem is None:
+            return None
+        if 'slot' not in quadro or imagem.nbytes > tamanho_slot:
+            return ('inline', imagem)
+
+        destino = np.ndarray(imagem.shape, imagem.dtype, buffer=memoria.buf, offset=quadro['slot'] * tamanho_slot)
+        if not np.shares_memory(destino, imagem):
+            np.copyto(destino, imagem)
+        elif destino.__array_interface__['data'][0] != imagem.__array_interface__['data'][0]:
+            # Sobreposição parcial (não deve ocorrer): evita corromper a cópia
+            return ('inline', np.array(imagem))
+        return ('slot', imagem.shape, imagem.dtype.str)
+
+
+class ClienteInferencia:
+    """
+    Cliente do servidor de inferência, com a mesma interface de reconhecimento
+    do `ANPRService`. Usado pelos workers da API no lugar do serviço local.
+    """
+
+    def __init__(self, endereco: str = ENDERECO_PADRAO, slots: int = 8,
+                 tamanho_slot: int = 8 * 1024 * 1024, timeout: float = 30.0):
+        """
+        Inicializa o cliente. A conexão é aberta no primeiro uso.
+
+        Args:
+            endereco: Socket Unix ou `host:porta` do servidor
+            slots: Quantidade de slots da memória compartilhada (pedidos simultâneos)
+            tamanho_slot: Bytes por slot (imagem reduzida + bytes originais)
+            timeout: Tempo máximo de espera por uma resposta, em segundos
+        """
+        self.endereco = endereco
+        self.slots = slots
+        self.tamanho_slot = tamanho_slot
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._trava_envio = threading.Lock()
+        self._conexao: Optional[Connection] = None
+        self._memoria: Optional[shared_memory.SharedMemory] = None
+        self._pendentes: dict[int, Future] = {}
+        self._contador = itertools.count()
+        self._slots_livres: queue.Queue = queue.Queue()
+        for slot in range(slots):
+            self._slots_livres.put(slot)
+
+    @classmethod
+    def from_env(cls) -> "ClienteInferencia":
+        """Cria o cliente a partir das variáveis de ambiente."""
+        return cls(
+            endereco=os.getenv('ANPR_SERVIDOR_INFERENCIA', ENDERECO_PADRAO),
+            slots=int(os.getenv('ANPR_SERVIDOR_SLOTS', '8')),
+            tamanho_slot=int(float(os.getenv('ANPR_SERVIDOR_SLOT_MB', '8')) * 1024 * 1024),
+            timeout=float(os.getenv('ANPR_SERVIDOR_TIMEOUT', '30')),
+        )
+
+    def _conectar(self) -> Connection:
+        with self._lock:
+            if self._conexao is not None:
+                return self._conexao
+            if self._memoria is None:
+                self._memoria = shared_memory.SharedMemory(create=True, size=self.slots * self.tamanho_slot)
+
+            conexao = Client(interpretar_endereco(self.endereco), authkey=_chave())
+            conexao.send(('ola', self._memoria.name, self.tamanho_slot))
+            self._conexao = conexao
+            threading.Thread(target=self._receber, args=(conexao,), daemon=True).start()
+            logger.info(f"Conectado ao servidor de inferência em {self.endereco}")
+            return conexao
+
+    def _receber(self, conexao: Connection) -> None:
+        """Entrega cada resposta ao pedido correspondente."""
+        try:
+            while True:
+                identificador, sucesso, valor, imagem = conexao.recv()
+                with self._lock:
+                    futuro = self._pendentes.pop(identificador, None)
+                if futuro is not None:
+                    futuro.set_result((sucesso, valor, imagem))
+        except (EOFError, OSError) as e:
+            logger.error(f"Conexão com o servidor de inferência perdida: {e}")
+        finally:
+            with self._lock:
+                if self._conexao is conexao:
+                    self._conexao = None
+                pendentes, self._pendentes = self._pendentes, {}
+            for futuro in pendentes.values():
+                futuro.set_exception(ConnectionError("Servidor de inferência desconectado"))
+            conexao.close()
+
+    def _empacotar(self, imagem, slot: Optional[int]) -> dict:
+        """Copia a imagem para o slot e devolve o descritor enviado ao servidor."""
+        if isinstance(imagem, ImagemEntrada):
+            reduzida = imagem.reduzida
+            dados = imagem.dados
+            quadro = {'fator': imagem.fator, 'escala': imagem.escala, 'espelhar': imagem.espelhar}
+        else:
+            reduzida, dados, quadro = imagem, None, {}
+
+        if slot is None:
+            quadro.update(imagem=reduzida, dados=dados)
+            return quadro
+
+        reduzida = np.ascontiguousarray(reduzida)
+        inicio = slot * self.tamanho_slot
+        destino = np.ndarray(reduzida.shape, reduzida.dtype, buffer=self._memoria.buf, offset=inicio)
+        np.copyto(destino, reduzida)
+        if dados is not None:
+            inicio_dados = inicio + reduzida.nbytes
+            self._memoria.buf[inicio_dados:inicio_dados + len(dados)] = dados
+        quadro.update(
+            slot=slot,
+            forma=reduzida.shape,
+            dtype=reduzida.dtype.str,
+            tamanho_dados=len(dados) if dados is not None else 0,
+        )
+        return quadro
+
+    def _cabe_no_slot(self, imagem) -> bool:
+        if isinstance(imagem, ImagemEntrada):
+            return imagem.reduzida.nbytes + len(imagem.dados) <= self.tamanho_slot
+        return imagem.nbytes <= self.tamanho_slot
+
+    def _liberar_slot(self, slot: Optional[int]) -> None:
+        if slot is not None:
+            self._slots_livres.put(slot)
+
+    def _chamar(self, metodo: str, imagem=None, **kwargs):
+        conexao = self._conectar()
+        slot = None
+        if imagem is not None and self._cabe_no_slot(imagem):
+            try:
+                slot = self._slots_livres.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("Nenhum slot livre para enviar a imagem ao servidor de inferência")
+
+        futuro: Future = Future()
+        slot_devolvido = False
+        try:
+            quadro = self._empacotar(imagem, slot) if imagem is not None else None
+            identificador = next(self._contador)
+            with self._lock:
+                self._pendentes[identificador] = futuro
+            with self._trava_envio:
+                conexao.send((identificador, metodo, quadro, kwargs))
+
+            try:
+                sucesso, valor, imagem_resultado = futuro.result(timeout=self.timeout)
+            except FuturesTimeoutError:
+                # O servidor ainda pode escrever no slot: só o libera quando a resposta chegar
+                futuro.add_done_callback(lambda _: self._liberar_slot(slot))
+                slot_devolvido = True
+                raise TimeoutError(f"Servidor de inferência não respondeu em {self.timeout}s")
+
+            if not sucesso:
+                raise RuntimeError(f"Erro no servidor de inferência: {valor}")
+            if imagem_resultado is not None:
+                valor = replace(valor, imagem=self._ler_imagem(imagem_resultado, slot))
+            return valor
+        finally:
+            if not slot_devolvido:
+                self._liberar_slot(slot)
+
+    def _ler_imagem(self, descritor: tuple, slot: Optional[int]) -> np.ndarray:
+        if descritor[0] == 'inline':
+            return descritor[1]
+        _, forma, tipo = descritor
+        # Copia antes de o slot voltar a ser usado
+        return np.array(np.ndarray(forma, np.dtype(tipo), buffer=self._memoria.buf,
+                                   offset=slot * self.tamanho_slot))
+
+    def reconhecer_placa_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                   nivel_qualidade: Optional[str] = None,
+                                   camera_id: Optional[str] = None) -> ResultadoReconhecimento:
+        """Mesmo que `ANPRService.reconhecer_placa_detalhado`, executado no servidor."""
+        return self._chamar('reconhecer_placa_detalhado', imagem,
+                            nivel_qualidade=nivel_qualidade, camera_id=camera_id)
+
+    def reconhecer_placa_robusto(self, imagem: np.ndarray):
+        """Mesmo que `ANPRService.reconhecer_placa_robusto`, executado no servidor."""
+        resultado = self.reconhecer_placa_detalhado(imagem)
+        return resultado.texto, resultado.imagem
+
+    def reconhecer_multiplas_placas_detalhado(self, imagem: np.ndarray | ImagemEntrada,
+                                              camera_id: Optional[str] = None,
+                                              nivel_qualidade: Optional[str] = None) -> ResultadoMultiplasPlacas:
+        """Mesmo que `ANPRService.reconhecer_multiplas_placas_detalhado`, executado no servidor."""
+        return self._chamar('reconhecer_multiplas_placas_detalhado', imagem,
+                            camera_id=camera_id, nivel_qualidade=nivel_qualidade)
+
+    def reconhecer_multiplas_placas(self, imagem: np.ndarray | ImagemEntrada,
+                                    camera_id: Optional[str] = None) -> list[dict]:
+        """Mesmo que `ANPRService.reconhecer_multiplas_placas`, executado no servidor."""
+        return self.reconhecer_multiplas_placas_detalhado(imagem, camera_id).placas
+
+    def obter_estatisticas(self) -> dict:
+        """Estatísticas do serviço no servidor de inferência."""
+        estatisticas = self._chamar('obter_estatisticas')
+        estatisticas['servidor_inferencia'] = self.endereco
+        return estatisticas
+
+    def encerrar(self) -> None:
+        """Fecha a conexão e remove a memória compartilhada."""
+        with self._lock:
+            conexao, self._conexao = self._conexao, None
+            memoria, self._memoria = self._memoria, None
+        if conexao is not None:
+            conexao.close()
+        if memoria is not None:
+            memoria.close()
+            memoria.unlink()
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Servidor de inferência compartilhado pelos workers da API")
+    parser.add_argument("--endereco", default=os.getenv('ANPR_SERVIDOR_INFERENCIA') or ENDERECO_PADRAO,
+                        help="Socket Unix ou host:porta")
+    parser.add_argument("--threads", type=int, default=int(os.getenv('ANPR_SERVIDOR_THREADS') or 0) or None,
+                        help="Reconhecimentos em paralelo (padrão: núcleos da CPU)")
+    args = parser.parse_args()
+    if not isinstance(interpretar_endereco(args.endereco), str) \
+            and os.getenv('ANPR_SERVIDOR_CHAVE', CHAVE_PADRAO) == CHAVE_PADRAO:
+        sys.exit("Endereço TCP exige ANPR_SERVIDOR_CHAVE definida e diferente da padrão; "
+                 "servidor de inferência não iniciado")
+
+    # Reaproveita a instância global se ela já for o serviço local, para não
+    # carregar os modelos duas vezes
+    from . import anpr_service as modulo_servico
+    servico = modulo_servico.anpr_service
+    if not isinstance(servico, ANPRService):
+        servico = ANPRService()
+    if servico.alpr is None:
+        sys.exit("FastALPR não inicializado; servidor de inferência não iniciado")
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        ServidorInferencia(servico, args.endereco, args.threads).executar()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Listas de alerta (watchlist) de placas roubadas, bloqueadas etc.
+
+As placas da coleção `WATCHLIST_COLLECTION` ficam em um índice em memória
+(dicionários), então verificar uma leitura custa duas consultas de hash e
+nenhuma ida ao MongoDB. Cada placa é indexada:
+
+- pela forma normalizada (só letras e dígitos) e pela forma equivalente no
+  outro padrão (a conversão para Mercosul troca o 5º dígito por uma letra:
+  ABC1234 <-> ABC1C34);
+- pela classe de confusão do OCR, em que caracteres que o OCR troca entre si
+  (O/0, I/1, B/8, ...) viram o mesmo símbolo. Uma leitura que só bate por
+  classe gera uma ocorrência não exata.
+
+O índice é reconstruído a cada mudança na coleção (change stream, quando o
+MongoDB é um replica set) ou a cada `intervalo` segundos. Cada ocorrência é
+registrada em log e métrica e entregue aos assinantes (`assinar`).
+"""
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from pymongo.errors import PyMongoError
+
+from .metricas import ALERTAS_WATCHLIST
+
+logger = logging.getLogger(__name__)
+
+# Caracteres que o OCR confunde, levados a um símbolo comum
+CLASSES_CONFUSAO = {'O': '0', 'Q': '0', 'D': '0', 'I': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'}
+_TABELA_CLASSES = str.maketrans(CLASSES_CONFUSAO)
+
+_NAO_ALFANUMERICO = re.compile(r'[^A-Z0-9]')
+
+
+def normalizar_placa(texto: str) -> str:
+    """Placa em maiúsculas, só com letras e dígitos (ABC-1234 -> ABC1234)."""
+    return _NAO_ALFANUMERICO.sub('', (texto or '').upper())
+
+
+def classe_confusao(placa: str) -> str:
+    """Chave da placa em que caracteres confundíveis pelo OCR são iguais."""
+    return placa.translate(_TABELA_CLASSES)
+
+
+def formas_equivalentes(placa: str) -> set[str]:
+    """A placa e, se for de 7 caracteres, a forma equivalente no outro padrão."""
+    formas = {placa}
+    if len(placa) == 7:
+        quinto = placa[4]
+        if quinto.isdigit():
+            formas.add(placa[:4] + chr(ord('A') + int(quinto)) + placa[5:])
+        elif 'A' <= quinto <= 'J':
+            formas.add(placa[:4] + str(ord(quinto) - ord('A')) + placa[5:])
+    return formas
+
+
+@dataclass(frozen=True)
+class ItemWatchlist:
+    """Placa cadastrada em uma lista de alerta."""
+    placa: str
+    lista: str
+    motivo: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class OcorrenciaWatchlist:
+    """Leitura que corresponde a um item de lista de alerta."""
+    item: ItemWatchlist
+    placa_lida: str
+    # False quando a leitura só bate pela classe de confusão do OCR
+    exata: bool
+
+    def para_dict(self) -> dict:
+        return {
+            'placa': self.item.placa,
+            'lista': self.item.lista,
+            'motivo': self.item.motivo,
+            'placa_lida': self.placa_lida,
+            'exata': self.exata,
+        }
+
+
+class Watchlist:
+    """Índice em memória das listas de alerta, recarregado quando a coleção muda."""
+
+    def __init__(self, collection, intervalo: float = 30.0):
+        """
+        Args:
+            collection: Coleção com os itens ({placa, lista, motivo, ativo})
+            intervalo: Segundos entre recargas quando não há change stream
+        """
+        self.collection = collection
+        self.intervalo = intervalo
+        # (exatos, por classe), trocados juntos a cada recarga
+        self._indice: tuple[dict, dict] = ({}, {})
+        self._assinantes: list[Callable[[OcorrenciaWatchlist, dict], None]] = []
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, db) -> "Watchlist":
+        return cls(
+            db[os.getenv('WATCHLIST_COLLECTION', 'watchlist')],
+            intervalo=float(os.getenv('WATCHLIST_INTERVALO_RECARGA', '30')),
+        )
+
+    def recarregar(self) -> None:
+        """Lê a coleção e troca o índice inteiro de uma vez."""
+        exatos: dict[str, list[ItemWatchlist]] = {}
+        por_classe: dict[str, list[ItemWatchlist]] = {}
+        ignorados: list = []
+        for documento in self.collection.find({'ativo': {'$ne': False}}, {'placa': 1, 'lista': 1, 'motivo': 1}):
+            # A coleção pode ser carregada direto no MongoDB: um documento inválido não derruba a carga
+            valor = documento.get('placa')
+            placa = normalizar_placa(valor) if isinstance(valor, str) else ''
+            if not placa:
+                ignorados.append(documento.get('_id'))
+                continue
+            item = ItemWatchlist(placa, documento.get('lista') or 'padrao', documento.get('motivo'))
+            for forma in formas_equivalentes(placa):
+                exatos.setdefault(forma, []).append(item)
+                por_classe.setdefault(classe_confusao(forma), []).append(item)
+        self._indice = (exatos, por_classe)
+        if ignorados:
+            logger.warning(f"Watchlist: {len(ignorados)} item(ns) sem placa válida ignorado(s) "
+                           f"(_id {', '.join(map(str, ignorados[:10]))}{', ...' if len(ignorados) > 10 else ''})")
+        logger.info(f"Watchlist carregada: {len(exatos)} chave(s)")
+
+    def verificar(self, texto: Optional[str]) -> list[OcorrenciaWatchlist]:
+        """Itens das listas de alerta que correspondem à placa lida."""
+        placa = normalizar_placa(texto)
+        if not placa:
+            return []
+        exatos, por_classe = self._indice
+        itens = exatos.get(placa)
+        if itens:
+            return [OcorrenciaWatchlist(item, placa, exata=True) for item in itens]
+        return [OcorrenciaWatchlist(item, placa, exata=False)
+                for item in por_classe.get(classe_confusao(placa), ())]
+
+    def listar(self) -> list[dict]:
+        """Itens cadastrados (ativos), direto da coleção."""
+        return [
+            {'placa': documento['placa'], 'lista': documento.get('lista'), 'motivo': documento.get('motivo')}
+            for documento in self.collection.find({'ativo': {'$ne': False}}, {'_id': 0})
+            if isinstance(documento.get('placa'), str)
+        ]
+
+    def adicionar(self, placa: str, lista: str, motivo: Optional[str] = None) -> None:
+        """Cadastra (ou reativa) uma placa em uma lista e atualiza o índice deste processo."""
+        self.collection.update_one(
+            {'placa': normalizar_placa(placa), 'lista': lista},
+            {'$set': {'motivo': motivo, 'ativo': True}},
+            upsert=True
+        )
+        self.recarregar()
+
+    def remover(self, placa: str, lista: Optional[str] = None) -> int:
+        """
+        Remove uma placa de uma lista (ou de todas) e atualiza o índice deste processo.
+
+        Returns:
+            Número de itens removidos
+        """
+        filtro = {'placa': normalizar_placa(placa)}
+        if lista:
+            filtro['lista'] = lista
+        removidos = self.collection.delete_many(filtro).deleted_count
+        self.recarregar()
+        return removidos
+
+    def assinar(self, callback: Callable[[OcorrenciaWatchlist, dict], None]) -> None:
+        """Registra uma função chamada com (ocorrência, contexto) a cada alerta."""
+        self._assinantes.append(callback)
+
+    def emitir(self, ocorrencias: list[OcorrenciaWatchlist], contexto: dict) -> None:
+        """
+        Publica as ocorrências de uma leitura.
+
+        Args:
+            contexto: Dados do registro (ex.: id, camera_id, hora_entrada)
+        """
+        for ocorrencia in ocorrencias:
+            ALERTAS_WATCHLIST.labels(lista=ocorrencia.item.lista,
+                                     exata='sim' if ocorrencia.exata else 'nao').inc()
+            logger.warning(f"Placa em lista de alerta '{ocorrencia.item.lista}': {ocorrencia.placa_lida} "
+                           f"(cadastro {ocorrencia.item.placa}, exata={ocorrencia.exata}, "
+                           f"camera={contexto.get('camera_id')})")
+            for callback in list(self._assinantes):
+                try:
+                    callback(ocorrencia, contexto)
+                except Exception as e:
+                    logger.error(f"Erro em assinante da watchlist: {e}")
+
+    def iniciar(self) -> None:
+        """Carrega o índice e inicia a thread de recarga."""
+        try:
+            self.recarregar()
+        except Exception as e:
+            # A API sobe mesmo assim; a thread de recarga tenta de novo
+            logger.error(f"Erro ao carregar a watchlist: {e!r}")
+        self._thread = threading.Thread(target=self._acompanhar, name="watchlist", daemon=True)
+        self._thread.start()
+
+    def encerrar(self) -> None:
+        self._parar.set()
+
+    def _acompanhar(self) -> None:
+        try:
+            # Change streams exigem replica set; sem ele, cai na recarga periódica
+            with self.collection.watch(max_await_time_ms=int(self.intervalo * 1000)) as stream:
+                logger.info("Watchlist acompanhando mudanças por change stream")
+                while not self._parar.is_set() and stream.alive:
+                    if stream.try_next() is not None:
+                        self.recarregar()
+            if self._parar.is_set():
+                return
+            logger.warning(f"Change stream da watchlist encerrado; recarga a cada {self.intervalo}s")
+        except PyMongoError as e:
+            logger.info(f"Change stream indisponível para a watchlist ({e}); recarga a cada {self.intervalo}s")
+        except Exception as e:
+            # Qualquer outra falha também não pode parar a recarga
+            logger.error(f"Erro no change stream da watchlist ({e!r}); recarga a cada {self.intervalo}s",
+                         exc_info=True)
+
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.recarregar()
+            except Exception as e:
+                logger.error(f"Erro ao recarregar a watchlist: {e!r}")
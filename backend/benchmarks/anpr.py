@@ -0,0 +1,232 @@
+"""
+Micro-benchmark do pipeline de reconhecimento (`reconhecer_placa_robusto`).
+
+Executa o pipeline offline (somente CPU, sem MongoDB) sobre um corpus de
+imagens e reporta tempo por etapa, imagens/s, pico de memória (RSS) e taxa de
+reconhecimento. O rótulo de cada imagem é o prefixo do nome do arquivo até o
+primeiro "_" (formato usado por `benchmarks.gerador_placas`).
+
+Uso:
+    python -m benchmarks.gerador_placas --destino corpus
+    python -m benchmarks.anpr --corpus corpus --salvar-baseline benchmarks/baseline.json
+    python -m benchmarks.anpr --corpus corpus --baseline benchmarks/baseline.json
+
+Com `--baseline`, o processo termina com código 1 se alguma métrica piorar
+além das tolerâncias configuradas.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+# Benchmarks rodam sempre em CPU para serem comparáveis entre máquinas
+os.environ.setdefault("ANPR_DISPOSITIVO", "cpu")
+# Mede a inferência no próprio processo, mesmo com o servidor de inferência ou a fila de trabalhos configurados
+os.environ.pop("ANPR_SERVIDOR_INFERENCIA", None)
+os.environ.pop("ANPR_FILA_TRABALHOS", None)
+
+import cv2  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+from app.services.anpr_service import anpr_service  # noqa: E402
+from app.services.metricas import medir_etapa  # noqa: E402
+
+EXTENSOES = (".jpg", ".jpeg", ".png", ".bmp")
+ETAPAS = ("decodificacao", "preprocessamento", "detector", "ocr", "anotacao")
+
+
+def listar_corpus(pasta: str) -> list[str]:
+    """Lista as imagens do corpus em ordem determinística."""
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.lower().endswith(EXTENSOES)
+    )
+
+
+def rotulo_do_arquivo(caminho: str) -> str:
+    """Extrai o texto esperado da placa a partir do nome do arquivo."""
+    return os.path.basename(caminho).split("_", 1)[0].upper()
+
+
+def normalizar_placa(texto: str | None) -> str:
+    return (texto or "").replace("-", "").upper()
+
+
+def amostras_etapas() -> dict:
+    """Lê soma e contagem acumuladas de cada etapa no histograma do Prometheus."""
+    amostras = {}
+    for etapa in ETAPAS:
+        soma = REGISTRY.get_sample_value("anpr_etapa_duracao_segundos_sum", {"etapa": etapa}) or 0.0
+        contagem = REGISTRY.get_sample_value("anpr_etapa_duracao_segundos_count", {"etapa": etapa}) or 0.0
+        amostras[etapa] = (soma, contagem)
+    return amostras
+
+
+def pico_rss_mb() -> float:
+    """Pico de memória residente do processo, em MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def executar_benchmark(caminhos: list[str], repeticoes: int = 1, aquecimento: int = 2,
+                       nivel_qualidade: str = "completo") -> dict:
+    """
+    Executa o pipeline sobre o corpus.
+
+    Args:
+        caminhos: Imagens do corpus
+        repeticoes: Quantas vezes o corpus é percorrido
+        aquecimento: Imagens processadas antes da medição (descartadas)
+        nivel_qualidade: Nível fixo usado em todas as imagens
+
+    Returns:
+        dict com as métricas do benchmark
+    """
+    if anpr_service.alpr is None:
+        raise RuntimeError("FastALPR não inicializado; verifique os modelos")
+
+    for caminho in caminhos[:aquecimento]:
+        anpr_service.reconhecer_placa_detalhado(cv2.imread(caminho), nivel_qualidade)
+
+    antes = amostras_etapas()
+    acertos = 0
+    total = 0
+    inicio = time.perf_counter()
+
+    for _ in range(repeticoes):
+        for caminho in caminhos:
+            with medir_etapa("decodificacao"):
+                imagem = cv2.imread(caminho)
+            resultado = anpr_service.reconhecer_placa_detalhado(imagem, nivel_qualidade)
+            total += 1
+            if normalizar_placa(resultado.texto) == rotulo_do_arquivo(caminho):
+                acertos += 1
+
+    duracao = time.perf_counter() - inicio
+    depois = amostras_etapas()
+
+    etapas = {}
+    for etapa in ETAPAS:
+        soma = depois[etapa][0] - antes[etapa][0]
+        contagem = depois[etapa][1] - antes[etapa][1]
+        etapas[etapa] = {
+            "chamadas": int(contagem),
+            "total_s": round(soma, 4),
+            "media_ms": round(1000 * soma / contagem, 3) if contagem else 0.0,
+            "por_imagem_ms": round(1000 * soma / total, 3) if total else 0.0,
+        }
+
+    return {
+        "imagens": total,
+        "duracao_s": round(duracao, 3),
+        "imagens_por_segundo": round(total / duracao, 3) if duracao else 0.0,
+        "taxa_reconhecimento": round(acertos / total, 4) if total else 0.0,
+        "pico_rss_mb": round(pico_rss_mb(), 1),
+        "nivel_qualidade": nivel_qualidade,
+        "etapas": etapas,
+        "ambiente": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "processador": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+    }
+
+
+def comparar_com_baseline(atual: dict, baseline: dict, tolerancia_tempo: float,
+                          tolerancia_taxa: float) -> list[str]:
+    """
+    Compara o resultado atual com o baseline.
+
+    Args:
+        atual: Resultado do benchmark atual
+        baseline: Resultado de referência
+        tolerancia_tempo: Piora relativa máxima aceita em tempos e vazão (ex.: 0.10 = 10%)
+        tolerancia_taxa: Queda absoluta máxima aceita na taxa de reconhecimento
+
+    Returns:
+        Lista de regressões encontradas (vazia se nenhuma)
+    """
+    regressoes = []
+
+    vazao_minima = baseline["imagens_por_segundo"] * (1 - tolerancia_tempo)
+    if atual["imagens_por_segundo"] < vazao_minima:
+        regressoes.append(
+            f"imagens/s: {atual['imagens_por_segundo']} < {baseline['imagens_por_segundo']} "
+            f"(tolerância {tolerancia_tempo:.0%})"
+        )
+
+    if atual["taxa_reconhecimento"] < baseline["taxa_reconhecimento"] - tolerancia_taxa:
+        regressoes.append(
+            f"taxa de reconhecimento: {atual['taxa_reconhecimento']} < "
+            f"{baseline['taxa_reconhecimento']} (tolerância {tolerancia_taxa})"
+        )
+
+    for etapa, dados in atual["etapas"].items():
+        referencia = baseline.get("etapas", {}).get(etapa)
+        if not referencia or not referencia["por_imagem_ms"]:
+            continue
+        if dados["por_imagem_ms"] > referencia["por_imagem_ms"] * (1 + tolerancia_tempo):
+            regressoes.append(
+                f"etapa {etapa}: {dados['por_imagem_ms']} ms/imagem > "
+                f"{referencia['por_imagem_ms']} ms/imagem (tolerância {tolerancia_tempo:.0%})"
+            )
+
+    return regressoes
+
+
+def imprimir_relatorio(resultado: dict) -> None:
+    print(f"Imagens: {resultado['imagens']} em {resultado['duracao_s']} s "
+          f"({resultado['imagens_por_segundo']} imagens/s)")
+    print(f"Taxa de reconhecimento: {resultado['taxa_reconhecimento']:.2%}")
+    print(f"Pico de RSS: {resultado['pico_rss_mb']} MB")
+    print(f"{'etapa':<18}{'chamadas':>10}{'média (ms)':>14}{'por imagem (ms)':>18}")
+    for etapa, dados in resultado["etapas"].items():
+        print(f"{etapa:<18}{dados['chamadas']:>10}{dados['media_ms']:>14}{dados['por_imagem_ms']:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline ANPR")
+    parser.add_argument("--corpus", required=True, help="Pasta com as imagens rotuladas")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--aquecimento", type=int, default=2)
+    parser.add_argument("--nivel", default="completo", choices=("completo", "reduzido", "minimo"))
+    parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--baseline", help="Baseline JSON para comparação")
+    parser.add_argument("--salvar-baseline", help="Grava o resultado como novo baseline")
+    parser.add_argument("--tolerancia-tempo", type=float, default=0.10)
+    parser.add_argument("--tolerancia-taxa", type=float, default=0.02)
+    args = parser.parse_args()
+
+    caminhos = listar_corpus(args.corpus)
+    if not caminhos:
+        parser.error(f"Nenhuma imagem encontrada em {args.corpus}")
+
+    resultado = executar_benchmark(caminhos, args.repeticoes, args.aquecimento, args.nivel)
+    imprimir_relatorio(resultado)
+
+    for destino in (args.saida, args.salvar_baseline):
+        if destino:
+            with open(destino, "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+        regressoes = comparar_com_baseline(resultado, baseline, args.tolerancia_tempo,
+                                           args.tolerancia_taxa)
+        if regressoes:
+            print("\nRegressões em relação ao baseline:")
+            for regressao in regressoes:
+                print(f"  - {regressao}")
+            sys.exit(1)
+        print("\nSem regressões em relação ao baseline.")
+
+
+if __name__ == "__main__":
+    main()
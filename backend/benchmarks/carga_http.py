@@ -0,0 +1,393 @@
+"""
+Teste de carga HTTP ponta a ponta da API (`app.main:app`).
+
+Gera tráfego concorrente de upload, listagem, busca e saída com mix e taxa de
+chegada configuráveis, em degraus crescentes de concorrência, e reporta
+p50/p95/p99, vazão e taxa de erros por operação.
+
+Uso contra um servidor já em execução:
+    python -m benchmarks.carga_http executar --url http://localhost:8000 --concorrencias 1,4,16
+
+Uso com servidor embutido (subprocesso), MongoDB em memória e detector stub,
+para medir apenas a camada web:
+    python -m benchmarks.carga_http executar --embutido --mongo memoria --detector-stub
+
+Sem `--taxa`, cada worker dispara a próxima requisição assim que a anterior
+termina (carga fechada). Com `--taxa`, as chegadas seguem um processo de
+Poisson e a latência é medida a partir do instante agendado, de modo que o
+tempo de espera na fila do gerador também é contabilizado.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+OPERACOES = ("upload", "listar", "buscar", "saida")
+MIX_PADRAO = "upload=0.4,listar=0.4,buscar=0.15,saida=0.05"
+
+
+# ---------------------------------------------------------------------------
+# Servidor embutido
+# ---------------------------------------------------------------------------
+
+def servir(porta: int, mongo: str, detector_stub: bool) -> None:
+    """Sobe a API no processo atual com as substituições pedidas."""
+    if mongo == "memoria":
+        # Precisa acontecer antes de importar a aplicação, que conecta no import
+        import mongomock
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+
+    import uvicorn
+
+    from app.main import app
+    from app.services.anpr_service import anpr_service
+
+    if detector_stub:
+        from .stubs import criar_alpr_stub
+        anpr_service.alpr = criar_alpr_stub()
+
+    uvicorn.run(app, host="127.0.0.1", port=porta, log_level="warning")
+
+
+def _porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def iniciar_servidor_embutido(mongo: str, detector_stub: bool, timeout: float = 120.0):
+    """
+    Inicia a API em um subprocesso e aguarda o healthcheck.
+
+    Returns:
+        tuple: (processo, url base)
+    """
+    porta = _porta_livre()
+    comando = [sys.executable, "-m", "benchmarks.carga_http", "servir",
+               "--porta", str(porta), "--mongo", mongo]
+    if detector_stub:
+        comando.append("--detector-stub")
+    processo = subprocess.Popen(comando)
+
+    url = f"http://127.0.0.1:{porta}"
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("Servidor embutido encerrou durante a inicialização")
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=2)
+            conexao.request("GET", "/api/v1/health")
+            if conexao.getresponse().status == 200:
+                return processo, url
+        except OSError:
+            pass
+        time.sleep(0.5)
+
+    processo.terminate()
+    raise RuntimeError("Servidor embutido não respondeu ao healthcheck")
+
+
+# ---------------------------------------------------------------------------
+# Cliente
+# ---------------------------------------------------------------------------
+
+def _multipart(nome_campo: str, nome_arquivo: str, conteudo: bytes, content_type: str):
+    fronteira = uuid.uuid4().hex
+    corpo = (
+        f"--{fronteira}\r\n"
+        f'Content-Disposition: form-data; name="{nome_campo}"; filename="{nome_arquivo}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + conteudo + f"\r\n--{fronteira}--\r\n".encode()
+    return corpo, f"multipart/form-data; boundary={fronteira}"
+
+
+class ClienteAPI:
+    """Cliente HTTP com conexão persistente (uma instância por worker)."""
+
+    def __init__(self, url: str, timeout: float):
+        partes = urlparse(url)
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.timeout = timeout
+        self._conexao = None
+
+    def requisicao(self, metodo: str, caminho: str, corpo: bytes | None = None,
+                   cabecalhos: dict | None = None) -> tuple[int, bytes]:
+        for tentativa in range(2):
+            if self._conexao is None:
+                self._conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+            try:
+                self._conexao.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+                resposta = self._conexao.getresponse()
+                return resposta.status, resposta.read()
+            except (http.client.HTTPException, OSError):
+                self._conexao.close()
+                self._conexao = None
+                if tentativa:
+                    raise
+        raise RuntimeError("inalcançável")
+
+
+class EstadoCompartilhado:
+    """Registros criados durante o teste, usados por busca e saída."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registros: deque = deque(maxlen=1000)
+
+    def adicionar(self, placa_id: str, placa: str) -> None:
+        with self._lock:
+            self._registros.append((placa_id, placa))
+
+    def sortear(self, rng: random.Random):
+        with self._lock:
+            if not self._registros:
+                return None
+            return self._registros[rng.randrange(len(self._registros))]
+
+
+def executar_operacao(cliente: ClienteAPI, operacao: str, imagens: list[tuple[str, bytes]],
+                      estado: EstadoCompartilhado, rng: random.Random) -> tuple[str, int]:
+    """
+    Executa uma operação na API.
+
+    Returns:
+        tuple: (operação efetivamente executada, status HTTP)
+    """
+    registro = estado.sortear(rng) if operacao in ("buscar", "saida") else None
+    if operacao in ("buscar", "saida") and registro is None:
+        # Ainda não há registros: faz um upload no lugar
+        operacao = "upload"
+
+    if operacao == "upload":
+        nome, conteudo = imagens[rng.randrange(len(imagens))]
+        corpo, content_type = _multipart("image", nome, conteudo, "image/jpeg")
+        status, resposta = cliente.requisicao(
+            "POST", "/api/v1/placas/upload_image", corpo, {"Content-Type": content_type})
+        if status == 200:
+            dados = json.loads(resposta)
+            estado.adicionar(dados.get("_id") or dados.get("id"), dados["placa"])
+        return operacao, status
+
+    if operacao == "listar":
+        status, _ = cliente.requisicao("GET", "/api/v1/placas/?limit=100")
+        return operacao, status
+
+    placa_id, placa = registro
+    if operacao == "buscar":
+        corpo = json.dumps({"placa": placa}).encode()
+        status, _ = cliente.requisicao(
+            "POST", "/api/v1/placas/search", corpo, {"Content-Type": "application/json"})
+        return operacao, status
+
+    status, _ = cliente.requisicao("POST", f"/api/v1/placas/clear/{placa_id}")
+    return operacao, status
+
+
+# ---------------------------------------------------------------------------
+# Execução de um degrau de carga
+# ---------------------------------------------------------------------------
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def executar_degrau(url: str, concorrencia: int, duracao: float, mix: dict, taxa: float | None,
+                    imagens: list[tuple[str, bytes]], estado: EstadoCompartilhado,
+                    timeout: float, semente: int) -> dict:
+    """Executa um degrau de carga com a concorrência informada."""
+    operacoes = list(mix)
+    pesos = [mix[op] for op in operacoes]
+    latencias: dict = defaultdict(list)
+    status_por_operacao: dict = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+    chegadas: queue.Queue = queue.Queue()
+
+    def agendar():
+        rng = random.Random(semente)
+        proxima = time.monotonic()
+        while proxima < fim:
+            espera = proxima - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            chegadas.put(proxima)
+            proxima += rng.expovariate(taxa)
+        for _ in range(concorrencia):
+            chegadas.put(None)
+
+    def worker(indice: int):
+        rng = random.Random(semente * 1000 + indice)
+        cliente = ClienteAPI(url, timeout)
+        while True:
+            if taxa:
+                agendado = chegadas.get()
+                if agendado is None:
+                    return
+            else:
+                agendado = time.monotonic()
+                if agendado >= fim:
+                    return
+            operacao = rng.choices(operacoes, pesos)[0]
+            try:
+                operacao, status = executar_operacao(cliente, operacao, imagens, estado, rng)
+            except Exception:
+                status = 0  # Erro de conexão/timeout
+            latencia = time.monotonic() - agendado
+            with lock:
+                latencias[operacao].append(latencia)
+                status_por_operacao[operacao][status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concorrencia)]
+    if taxa:
+        threads.append(threading.Thread(target=agendar, daemon=True))
+    inicio = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.monotonic() - inicio
+
+    resumo = {"concorrencia": concorrencia, "duracao_s": round(decorrido, 2), "operacoes": {}}
+    total = erros = 0
+    for operacao, valores in latencias.items():
+        codigos = status_por_operacao[operacao]
+        falhas = sum(q for codigo, q in codigos.items() if not 200 <= codigo < 300)
+        total += len(valores)
+        erros += falhas
+        resumo["operacoes"][operacao] = {
+            "requisicoes": len(valores),
+            "vazao_rps": round(len(valores) / decorrido, 2),
+            "p50_ms": round(1000 * _percentil(valores, 50), 1),
+            "p95_ms": round(1000 * _percentil(valores, 95), 1),
+            "p99_ms": round(1000 * _percentil(valores, 99), 1),
+            "taxa_erro": round(falhas / len(valores), 4),
+            "status": {str(codigo): q for codigo, q in sorted(codigos.items())},
+        }
+    resumo["vazao_rps"] = round(total / decorrido, 2) if decorrido else 0.0
+    resumo["taxa_erro"] = round(erros / total, 4) if total else 0.0
+    return resumo
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _ler_mix(texto: str) -> dict:
+    mix = {}
+    for parte in texto.split(","):
+        operacao, peso = parte.split("=")
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação desconhecida no mix: {operacao}")
+        mix[operacao] = float(peso)
+    return mix
+
+
+def _carregar_imagens(corpus: str | None, quantidade: int) -> list[tuple[str, bytes]]:
+    if corpus:
+        nomes = sorted(n for n in os.listdir(corpus) if n.lower().endswith((".jpg", ".jpeg")))
+        return [(nome, open(os.path.join(corpus, nome), "rb").read()) for nome in nomes[:quantidade]]
+
+    import cv2
+    import numpy as np
+
+    from .gerador_placas import FORMATO_MERCOSUL, compor_cena, fundo_sintetico, renderizar_placa
+
+    rng = np.random.default_rng(1234)
+    imagens = []
+    for indice in range(quantidade):
+        cena = compor_cena(renderizar_placa("ABC1D23", FORMATO_MERCOSUL),
+                           fundo_sintetico(rng, 1280, 720), rng)
+        _, buffer = cv2.imencode(".jpg", cena, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        imagens.append((f"carga_{indice}.jpg", buffer.tobytes()))
+    return imagens
+
+
+def imprimir_degrau(resumo: dict) -> None:
+    print(f"\nConcorrência {resumo['concorrencia']}: {resumo['vazao_rps']} req/s, "
+          f"erros {resumo['taxa_erro']:.2%}")
+    print(f"  {'operação':<10}{'req':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>9}")
+    for operacao, dados in sorted(resumo["operacoes"].items()):
+        print(f"  {operacao:<10}{dados['requisicoes']:>7}{dados['vazao_rps']:>9}{dados['p50_ms']:>10}"
+              f"{dados['p95_ms']:>10}{dados['p99_ms']:>10}{dados['taxa_erro']:>9.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga HTTP da API de placas")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_servir = subparsers.add_parser("servir", help="Sobe a API (usado pelo modo embutido)")
+    p_servir.add_argument("--porta", type=int, default=8000)
+    p_servir.add_argument("--mongo", choices=("local", "memoria"), default="local")
+    p_servir.add_argument("--detector-stub", action="store_true")
+
+    p_exec = subparsers.add_parser("executar", help="Executa o teste de carga")
+    p_exec.add_argument("--url", default="http://localhost:8000")
+    p_exec.add_argument("--embutido", action="store_true",
+                        help="Sobe a API em um subprocesso em vez de usar --url")
+    p_exec.add_argument("--mongo", choices=("local", "memoria"), default="local",
+                        help="Banco usado pelo servidor embutido")
+    p_exec.add_argument("--detector-stub", action="store_true",
+                        help="Servidor embutido usa detector/OCR de custo desprezível")
+    p_exec.add_argument("--concorrencias", default="1,4,16",
+                        help="Degraus de concorrência separados por vírgula")
+    p_exec.add_argument("--duracao", type=float, default=30.0, help="Duração de cada degrau (s)")
+    p_exec.add_argument("--taxa", type=float, default=None,
+                        help="Chegadas por segundo (Poisson). Sem ela, carga fechada")
+    p_exec.add_argument("--mix", default=MIX_PADRAO, help="Pesos das operações")
+    p_exec.add_argument("--corpus", default=None, help="Pasta com JPEGs para upload")
+    p_exec.add_argument("--imagens", type=int, default=8, help="Quantidade de imagens distintas")
+    p_exec.add_argument("--timeout", type=float, default=60.0)
+    p_exec.add_argument("--semente", type=int, default=1234)
+    p_exec.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+
+    args = parser.parse_args()
+
+    if args.comando == "servir":
+        servir(args.porta, args.mongo, args.detector_stub)
+        return
+
+    processo = None
+    url = args.url
+    if args.embutido:
+        processo, url = iniciar_servidor_embutido(args.mongo, args.detector_stub)
+
+    try:
+        mix = _ler_mix(args.mix)
+        imagens = _carregar_imagens(args.corpus, args.imagens)
+        estado = EstadoCompartilhado()
+        resultados = []
+        for concorrencia in (int(c) for c in args.concorrencias.split(",")):
+            resumo = executar_degrau(url, concorrencia, args.duracao, mix, args.taxa,
+                                     imagens, estado, args.timeout, args.semente)
+            imprimir_degrau(resumo)
+            resultados.append(resumo)
+
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as arquivo:
+                json.dump({"url": url, "mix": mix, "taxa": args.taxa, "degraus": resultados},
+                          arquivo, indent=2, ensure_ascii=False)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Gerador de corpus sintético de placas brasileiras para os benchmarks.
+
+Gera placas no padrão antigo (AAA-1234, fundo cinza) e Mercosul (AAA1B23,
+fundo branco com faixa azul) aplicadas sobre fundos em diferentes resoluções.
+O texto da placa é gravado no nome do arquivo (`<PLACA>_<n>_<L>x<A>.jpg`),
+que é usado como rótulo pelos benchmarks.
+
+Uso:
+    python -m benchmarks.gerador_placas --destino corpus --quantidade 60
+"""
+
+import argparse
+import os
+import random
+import string
+from typing import Optional
+
+import cv2
+import numpy as np
+
+FORMATO_ANTIGO = "antigo"
+FORMATO_MERCOSUL = "mercosul"
+
+# Dimensões proporcionais à placa real (400 mm x 130 mm)
+LARGURA_PLACA = 400
+ALTURA_PLACA = 130
+
+RESOLUCOES_PADRAO = ((640, 480), (1280, 720), (1920, 1080), (4000, 3000))
+
+
+def placa_aleatoria(rng: random.Random, formato: str) -> str:
+    """Sorteia um texto de placa válido no formato informado (sem hífen)."""
+    letras = "".join(rng.choice(string.ascii_uppercase) for _ in range(3))
+    if formato == FORMATO_ANTIGO:
+        return letras + "".join(rng.choice(string.digits) for _ in range(4))
+    return (letras + rng.choice(string.digits) + rng.choice(string.ascii_uppercase)
+            + "".join(rng.choice(string.digits) for _ in range(2)))
+
+
+def _escrever_centralizado(img: np.ndarray, texto: str, y_base: int, escala: float,
+                           espessura: int, cor: tuple) -> None:
+    fonte = cv2.FONT_HERSHEY_SIMPLEX
+    (largura, _), _ = cv2.getTextSize(texto, fonte, escala, espessura)
+    x = (img.shape[1] - largura) // 2
+    cv2.putText(img, texto, (x, y_base), fonte, escala, cor, espessura, cv2.LINE_AA)
+
+
+def renderizar_placa(texto: str, formato: str) -> np.ndarray:
+    """
+    Desenha a placa frontal (BGR) com o texto informado.
+
+    Args:
+        texto: Texto da placa sem hífen
+        formato: FORMATO_ANTIGO ou FORMATO_MERCOSUL
+
+    Returns:
+        Imagem da placa com LARGURA_PLACA x ALTURA_PLACA pixels
+    """
+    if formato == FORMATO_ANTIGO:
+        placa = np.full((ALTURA_PLACA, LARGURA_PLACA, 3), (190, 190, 190), np.uint8)
+        cv2.rectangle(placa, (3, 3), (LARGURA_PLACA - 4, ALTURA_PLACA - 4), (20, 20, 20), 4)
+        _escrever_centralizado(placa, f"{texto[:3]}-{texto[3:]}", 105, 2.6, 8, (15, 15, 15))
+        return placa
+
+    placa = np.full((ALTURA_PLACA, LARGURA_PLACA, 3), (245, 245, 245), np.uint8)
+    cv2.rectangle(placa, (0, 0), (LARGURA_PLACA - 1, 28), (150, 60, 0), -1)
+    _escrever_centralizado(placa, "BRASIL", 22, 0.7, 2, (255, 255, 255))
+    cv2.rectangle(placa, (2, 2), (LARGURA_PLACA - 3, ALTURA_PLACA - 3), (20, 20, 20), 3)
+    _escrever_centralizado(placa, texto, 112, 2.6, 8, (15, 15, 15))
+    return placa
+
+
+def fundo_sintetico(rng: np.random.Generator, largura: int, altura: int) -> np.ndarray:
+    """Gera um fundo com gradiente, retângulos (veículo/estrutura) e ruído."""
+    gradiente = np.linspace(rng.integers(40, 120), rng.integers(120, 220), altura, dtype=np.float32)
+    fundo = np.repeat(gradiente[:, None], largura, axis=1)
+    fundo = np.stack([fundo * rng.uniform(0.8, 1.2) for _ in range(3)], axis=-1)
+    fundo = np.clip(fundo, 0, 255).astype(np.uint8)
+
+    for _ in range(int(rng.integers(3, 9))):
+        x1, y1 = int(rng.integers(0, largura)), int(rng.integers(0, altura))
+        x2, y2 = int(rng.integers(x1, largura + 1)), int(rng.integers(y1, altura + 1))
+        cor = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.rectangle(fundo, (x1, y1), (x2, y2), cor, -1)
+
+    ruido = rng.normal(0, 6, fundo.shape).astype(np.int16)
+    return np.clip(fundo.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+
+
+def compor_cena(placa: np.ndarray, fundo: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Aplica a placa sobre o fundo com escala, posição e leve perspectiva aleatórias.
+
+    A placa ocupa entre 12% e 25% da largura do quadro, na metade inferior.
+    """
+    altura, largura = fundo.shape[:2]
+    largura_placa = largura * rng.uniform(0.12, 0.25)
+    altura_placa = largura_placa * ALTURA_PLACA / LARGURA_PLACA
+
+    x0 = rng.uniform(0.05 * largura, largura - largura_placa - 0.05 * largura)
+    y0 = rng.uniform(0.5 * altura, altura - altura_placa - 0.05 * altura)
+    inclinacao = altura_placa * rng.uniform(-0.15, 0.15)
+
+    origem = np.float32([[0, 0], [LARGURA_PLACA, 0], [LARGURA_PLACA, ALTURA_PLACA], [0, ALTURA_PLACA]])
+    destino = np.float32([
+        [x0, y0 + inclinacao],
+        [x0 + largura_placa, y0 - inclinacao],
+        [x0 + largura_placa, y0 + altura_placa - inclinacao],
+        [x0, y0 + altura_placa + inclinacao],
+    ])
+    matriz = cv2.getPerspectiveTransform(origem, destino)
+
+    placa_projetada = cv2.warpPerspective(placa, matriz, (largura, altura))
+    mascara = cv2.warpPerspective(np.full(placa.shape[:2], 255, np.uint8), matriz, (largura, altura))
+
+    cena = fundo.copy()
+    cena[mascara > 0] = placa_projetada[mascara > 0]
+    return cv2.GaussianBlur(cena, (3, 3), 0)
+
+
+def gerar_corpus(destino: str, quantidade: int,
+                 resolucoes: tuple = RESOLUCOES_PADRAO,
+                 semente: int = 1234,
+                 pasta_fundos: Optional[str] = None) -> list[str]:
+    """
+    Gera o corpus sintético.
+
+    Args:
+        destino: Pasta de saída
+        quantidade: Número de imagens
+        resolucoes: Resoluções (largura, altura) usadas em rodízio
+        semente: Semente aleatória (mesma semente gera o mesmo corpus)
+        pasta_fundos: Pasta opcional com fotos reais usadas como fundo
+
+    Returns:
+        Lista de caminhos gerados
+    """
+    os.makedirs(destino, exist_ok=True)
+    rng_texto = random.Random(semente)
+    rng = np.random.default_rng(semente)
+
+    fundos_reais = []
+    if pasta_fundos:
+        fundos_reais = sorted(
+            os.path.join(pasta_fundos, nome) for nome in os.listdir(pasta_fundos)
+            if nome.lower().endswith((".jpg", ".jpeg", ".png"))
+        )
+
+    caminhos = []
+    for indice in range(quantidade):
+        largura, altura = resolucoes[indice % len(resolucoes)]
+        formato = FORMATO_MERCOSUL if indice % 2 else FORMATO_ANTIGO
+        texto = placa_aleatoria(rng_texto, formato)
+
+        fundo = None
+        if fundos_reais:
+            fundo = cv2.imread(fundos_reais[indice % len(fundos_reais)])
+        if fundo is None:
+            fundo = fundo_sintetico(rng, largura, altura)
+        else:
+            fundo = cv2.resize(fundo, (largura, altura))
+
+        cena = compor_cena(renderizar_placa(texto, formato), fundo, rng)
+        caminho = os.path.join(destino, f"{texto}_{indice:04d}_{largura}x{altura}.jpg")
+        cv2.imwrite(caminho, cena, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        caminhos.append(caminho)
+
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera corpus sintético de placas brasileiras")
+    parser.add_argument("--destino", default="corpus", help="Pasta de saída")
+    parser.add_argument("--quantidade", type=int, default=60, help="Número de imagens")
+    parser.add_argument("--semente", type=int, default=1234, help="Semente aleatória")
+    parser.add_argument("--fundos", default=None, help="Pasta com fotos usadas como fundo")
+    args = parser.parse_args()
+
+    caminhos = gerar_corpus(args.destino, args.quantidade, semente=args.semente,
+                            pasta_fundos=args.fundos)
+    print(f"{len(caminhos)} imagem(ns) gerada(s) em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Quantização INT8 dos modelos de detecção e OCR e comparação com os modelos float.
+
+Em servidores de portaria só com CPU, o detector e o OCR dominam o tempo de
+cada requisição. Este utilitário gera versões INT8 dos modelos usados pelo
+`ANPRService` e mede, sobre um corpus local, o ganho de velocidade e a
+variação na taxa de reconhecimento, para decidir o que usar em cada instalação.
+
+- dinâmica: pesos em INT8, ativações quantizadas em tempo de execução; não
+  precisa de calibração (indicada para o OCR, baseado em transformer)
+- estática: pesos e ativações em INT8 (formato QDQ), calibrada com imagens do
+  corpus (indicada para o detector, convolucional)
+
+Uso (requer o pacote `onnx`, usado por `onnxruntime.quantization`):
+    python -m benchmarks.quantizacao quantizar --modelo detector --modo estatico --corpus corpus
+    python -m benchmarks.quantizacao quantizar --modelo ocr --modo dinamico
+    python -m benchmarks.quantizacao comparar --corpus corpus \\
+        --detector modelos/<detector>-int8-estatico.onnx --ocr modelos/<ocr>-int8-dinamico.onnx
+
+Os modelos são gravados como `<nome do modelo float>-int8-<modo>.onnx`.
+
+Para usar os modelos gerados na API, defina `ANPR_CAMINHO_DETECTOR` e
+`ANPR_CAMINHO_OCR`.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# Benchmarks rodam sempre em CPU para serem comparáveis entre máquinas
+os.environ.setdefault("ANPR_DISPOSITIVO", "cpu")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import onnxruntime as ort  # noqa: E402
+
+from app.services.anpr_service import LIMIAR_DETECTOR, MODELO_DETECTOR, MODELO_OCR  # noqa: E402
+
+OPERADORES_PADRAO = {
+    # O modelo end2end tem o NMS dentro do grafo: só as camadas pesadas são quantizadas
+    "detector": ["Conv", "MatMul", "Gemm"],
+    "ocr": ["MatMul", "Gemm"],
+}
+
+
+def caminho_modelo_float(modelo: str) -> str:
+    """Caminho do modelo float no cache local (baixa se necessário)."""
+    if modelo == "detector":
+        from open_image_models.detection.core.hub import download_model
+        return str(download_model(MODELO_DETECTOR))
+
+    from fast_plate_ocr.inference.hub import download_model
+    caminho, _ = download_model(model_name=MODELO_OCR)
+    return str(caminho)
+
+
+class LeitorCalibracao:
+    """Entrega as entradas de calibração para `quantize_static`, uma de cada vez."""
+
+    def __init__(self, entradas: list[dict]):
+        self.entradas = entradas
+        self._posicao = 0
+
+    def get_next(self):
+        if self._posicao >= len(self.entradas):
+            return None
+        entrada = self.entradas[self._posicao]
+        self._posicao += 1
+        return entrada
+
+    def rewind(self):
+        self._posicao = 0
+
+
+def entradas_detector(caminho_modelo: str, imagens: list[str]) -> list[dict]:
+    """Imagens do corpus com o mesmo pré-processamento do detector."""
+    from open_image_models.detection.core.yolo_v9.preprocess import preprocess
+
+    sessao = ort.InferenceSession(caminho_modelo, providers=["CPUExecutionProvider"])
+    entrada = sessao.get_inputs()[0]
+    tamanho = tuple(entrada.shape[2:4])
+
+    entradas = []
+    for caminho in imagens:
+        imagem = cv2.imread(caminho)
+        if imagem is not None:
+            tensor, _, _ = preprocess(imagem, tamanho)
+            entradas.append({entrada.name: tensor})
+    return entradas
+
+
+def entradas_ocr(imagens: list[str]) -> list[dict]:
+    """Recortes das placas do corpus (detectadas pelo detector float) com o pré-processamento do OCR."""
+    from fast_plate_ocr.core.process import preprocess_image, resize_image
+
+    from app.services.alpr.default_detector import DefaultDetector
+    from app.services.alpr.default_ocr import DefaultOCR
+
+    detector = DefaultDetector(MODELO_DETECTOR, LIMIAR_DETECTOR, providers=["CPUExecutionProvider"])
+    config = DefaultOCR(MODELO_OCR, device="cpu").ocr_model.config
+
+    entradas = []
+    for caminho in imagens:
+        imagem = cv2.imread(caminho)
+        if imagem is None:
+            continue
+        for deteccao in detector.predict(imagem):
+            caixa = deteccao.bounding_box
+            recorte = imagem[max(caixa.y1, 0):caixa.y2, max(caixa.x1, 0):caixa.x2]
+            if not recorte.size:
+                continue
+            if config.image_color_mode == "grayscale":
+                recorte = cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY)
+            tensor = resize_image(
+                recorte,
+                config.img_height,
+                config.img_width,
+                image_color_mode=config.image_color_mode,
+                keep_aspect_ratio=config.keep_aspect_ratio,
+                interpolation_method=config.interpolation,
+                padding_color=config.padding_color,
+            )
+            entradas.append({"input": preprocess_image(np.asarray(tensor))})
+    return entradas
+
+
+def quantizar(modelo: str, modo: str, destino: str, corpus: str | None = None,
+              amostras: int = 100, operadores: list[str] | None = None) -> str:
+    """
+    Gera a versão INT8 de um modelo.
+
+    Args:
+        modelo: "detector" ou "ocr"
+        modo: "dinamico" ou "estatico"
+        destino: Pasta onde o modelo quantizado é gravado
+        corpus: Pasta com imagens de calibração (obrigatória no modo estático)
+        amostras: Quantidade máxima de imagens de calibração
+        operadores: Tipos de operador a quantizar (padrão: `OPERADORES_PADRAO`)
+
+    Returns:
+        Caminho do modelo gerado
+    """
+    try:
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError as e:
+        raise RuntimeError("A quantização requer o pacote onnx (pip install onnx)") from e
+
+    origem = caminho_modelo_float(modelo)
+    os.makedirs(destino, exist_ok=True)
+    nome = os.path.splitext(os.path.basename(origem))[0]
+    saida = os.path.join(destino, f"{nome}-int8-{modo}.onnx")
+    operadores = operadores or OPERADORES_PADRAO[modelo]
+
+    with tempfile.TemporaryDirectory() as temporario:
+        # Inferência de formas e otimizações recomendadas antes de quantizar
+        preparado = os.path.join(temporario, "preparado.onnx")
+        try:
+            quant_pre_process(origem, preparado)
+        except Exception as e:
+            print(f"Pré-processamento do modelo ignorado: {e}")
+            preparado = origem
+
+        if modo == "dinamico":
+            quantize_dynamic(preparado, saida, weight_type=QuantType.QInt8,
+                             op_types_to_quantize=operadores)
+        else:
+            if not corpus:
+                raise ValueError("A quantização estática precisa de --corpus para calibração")
+            from .anpr import listar_corpus
+            imagens = listar_corpus(corpus)[:amostras]
+            if modelo == "detector":
+                entradas = entradas_detector(preparado, imagens)
+            else:
+                entradas = entradas_ocr(imagens)
+            if not entradas:
+                raise ValueError(f"Nenhuma entrada de calibração obtida de {corpus}")
+            quantize_static(
+                preparado,
+                saida,
+                LeitorCalibracao(entradas),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+                op_types_to_quantize=operadores,
+            )
+
+    print(f"{modelo}: {origem} ({os.path.getsize(origem) / 1e6:.1f} MB) -> "
+          f"{saida} ({os.path.getsize(saida) / 1e6:.1f} MB)")
+    return saida
+
+
+def comparar(corpus: str, detector: str | None, ocr: str | None,
+             repeticoes: int = 1, aquecimento: int = 2) -> dict:
+    """
+    Executa o pipeline sobre o corpus com os modelos float e com os quantizados.
+
+    O modelo omitido (detector ou OCR) continua float nas duas rodadas.
+
+    Returns:
+        dict com os resultados de cada rodada, speedups e variação da taxa
+    """
+    from app.services.alpr import ALPR
+    from app.services.selecao_estrategias import SeletorEstrategias
+
+    from .anpr import anpr_service, executar_benchmark, listar_corpus
+
+    caminhos = listar_corpus(corpus)
+    if not caminhos:
+        raise ValueError(f"Nenhuma imagem encontrada em {corpus}")
+
+    # Varredura completa em todas as imagens: sem poda aprendida entre as rodadas
+    anpr_service.seletor_estrategias = SeletorEstrategias(caminho_estado=None, minimo_observacoes=10**9)
+
+    modelos_float = anpr_service.alpr
+    modelos_int8 = ALPR(
+        detector_model=MODELO_DETECTOR,
+        detector_conf_thresh=LIMIAR_DETECTOR,
+        detector_providers=["CPUExecutionProvider"],
+        detector_model_path=detector,
+        ocr_model=MODELO_OCR,
+        ocr_device="cpu",
+        ocr_model_path=ocr,
+    )
+
+    resultado_float = executar_benchmark(caminhos, repeticoes, aquecimento)
+    anpr_service.alpr = modelos_int8
+    try:
+        resultado_int8 = executar_benchmark(caminhos, repeticoes, aquecimento)
+    finally:
+        anpr_service.alpr = modelos_float
+
+    def speedup(chave_float: float, chave_int8: float) -> float:
+        return round(chave_float / chave_int8, 3) if chave_int8 else 0.0
+
+    return {
+        "modelos": {"detector": detector or "float", "ocr": ocr or "float"},
+        "float": resultado_float,
+        "int8": resultado_int8,
+        "speedup": {
+            "imagens_por_segundo": speedup(resultado_int8["imagens_por_segundo"],
+                                           resultado_float["imagens_por_segundo"]),
+            **{
+                etapa: speedup(resultado_float["etapas"][etapa]["por_imagem_ms"],
+                               resultado_int8["etapas"][etapa]["por_imagem_ms"])
+                for etapa in ("detector", "ocr")
+            },
+        },
+        "variacao_taxa_reconhecimento": round(
+            resultado_int8["taxa_reconhecimento"] - resultado_float["taxa_reconhecimento"], 4
+        ),
+    }
+
+
+def imprimir_comparacao(comparacao: dict) -> None:
+    float_, int8 = comparacao["float"], comparacao["int8"]
+    print(f"Modelos INT8: detector={comparacao['modelos']['detector']} ocr={comparacao['modelos']['ocr']}")
+    print(f"{'':<24}{'float':>12}{'int8':>12}{'speedup':>10}")
+    print(f"{'imagens/s':<24}{float_['imagens_por_segundo']:>12}{int8['imagens_por_segundo']:>12}"
+          f"{comparacao['speedup']['imagens_por_segundo']:>10}")
+    for etapa in ("detector", "ocr"):
+        print(f"{etapa + ' (ms/imagem)':<24}{float_['etapas'][etapa]['por_imagem_ms']:>12}"
+              f"{int8['etapas'][etapa]['por_imagem_ms']:>12}{comparacao['speedup'][etapa]:>10}")
+    print(f"{'taxa de reconhecimento':<24}{float_['taxa_reconhecimento']:>12.2%}"
+          f"{int8['taxa_reconhecimento']:>12.2%}")
+    print(f"Variação da taxa: {comparacao['variacao_taxa_reconhecimento'] * 100:+.2f} p.p.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantização INT8 dos modelos do ANPR")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_quantizar = subparsers.add_parser("quantizar", help="Gera a versão INT8 de um modelo")
+    parser_quantizar.add_argument("--modelo", required=True, choices=("detector", "ocr"))
+    parser_quantizar.add_argument("--modo", default="dinamico", choices=("dinamico", "estatico"))
+    parser_quantizar.add_argument("--corpus", help="Imagens de calibração (modo estático)")
+    parser_quantizar.add_argument("--amostras", type=int, default=100)
+    parser_quantizar.add_argument("--destino", default="modelos")
+    parser_quantizar.add_argument("--operadores", nargs="+", help="Tipos de operador a quantizar")
+
+    parser_comparar = subparsers.add_parser("comparar", help="Compara modelos float e INT8 no corpus")
+    parser_comparar.add_argument("--corpus", required=True)
+    parser_comparar.add_argument("--detector", help="Detector INT8 (omitido: float)")
+    parser_comparar.add_argument("--ocr", help="OCR INT8 (omitido: float)")
+    parser_comparar.add_argument("--repeticoes", type=int, default=1)
+    parser_comparar.add_argument("--aquecimento", type=int, default=2)
+    parser_comparar.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+
+    args = parser.parse_args()
+
+    if args.comando == "quantizar":
+        try:
+            quantizar(args.modelo, args.modo, args.destino, args.corpus, args.amostras, args.operadores)
+        except (RuntimeError, ValueError) as e:
+            sys.exit(str(e))
+        return
+
+    if not args.detector and not args.ocr:
+        parser_comparar.error("informe --detector e/ou --ocr")
+    comparacao = comparar(args.corpus, args.detector, args.ocr, args.repeticoes, args.aquecimento)
+    imprimir_comparacao(comparacao)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(comparacao, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
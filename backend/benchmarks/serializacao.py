@@ -0,0 +1,152 @@
+"""
+Micro-benchmark da serialização das respostas de leitura (`GET /placas`).
+
+Compara, sobre documentos sintéticos no formato gravado no MongoDB, o custo
+por registro de transformar a lista em bytes JSON:
+
+- pydantic: caminho anterior das rotas. Converte o `_id`, monta um
+  `PlacaResponse` por documento e passa pela validação e serialização do
+  `response_model` do FastAPI (`serialize_response`) e pelo `JSONResponse`.
+- rapido: caminho atual (`app.services.serializacao`). Projeta os campos do
+  modelo e codifica com `RespostaJSON` (orjson, se instalado).
+
+As URLs da imagem (`_com_urls`) têm o mesmo custo nos dois caminhos e já vêm
+nos documentos. Os dois corpos são comparados antes da medição.
+
+Uso (de `backend/`):
+    python -m benchmarks.serializacao
+    python -m benchmarks.serializacao --registros 100 --tamanho-imagem 60000 --saida serializacao.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import string
+import time
+from typing import List
+
+from bson.objectid import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.placa import PlacaResponse
+from app.services import serializacao
+from app.services.serializacao import RespostaJSON, campos_modelo, projetar
+
+CAMPOS_PLACA = campos_modelo(PlacaResponse)
+
+
+def gerar_documentos(quantidade: int, tamanho_imagem: int, semente: int = 0) -> list[dict]:
+    """Documentos como os de `create_placa`, com `image_base64` de `tamanho_imagem` bytes decodificados."""
+    aleatorio = random.Random(semente)
+    imagem = base64.b64encode(aleatorio.randbytes(tamanho_imagem)).decode('ascii')
+    documentos = []
+    for indice in range(quantidade):
+        placa = (''.join(aleatorio.choices(string.ascii_uppercase, k=3)) + str(aleatorio.randint(0, 9))
+                 + aleatorio.choice(string.ascii_uppercase) + f"{aleatorio.randint(0, 99):02d}")
+        nome = f"{aleatorio.getrandbits(256):064x}.jpg"
+        documentos.append({
+            '_id': ObjectId(),
+            'placa': placa,
+            'filename': f"captura_{indice}.jpg",
+            'image_base64': imagem,
+            'hora_entrada': f"2026-10-{1 + indice % 28:02d} 08:{indice % 60:02d}:00",
+            'hora_saida': None if indice % 3 else f"2026-10-{1 + indice % 28:02d} 18:00:00",
+            'nivel_qualidade': 'completo',
+            'camera_id': f"portaria-{indice % 4}",
+            'espelhada': False,
+            'confianca': round(aleatorio.uniform(0.5, 1.0), 4),
+            'bbox': {'x1': 120, 'y1': 340, 'x2': 260, 'y2': 390},
+            'original_path': f"uploads/originals/{nome[:2]}/{nome[2:4]}/{nome}",
+            'image_url': f"/api/v1/placas/images/{nome}",
+            'miniatura_url': f"/api/v1/placas/images/{nome}?size=320",
+        })
+    return documentos
+
+
+async def corpo_pydantic(documentos: list[dict], campo) -> bytes:
+    modelos = [PlacaResponse(**{**documento, '_id': str(documento['_id'])}) for documento in documentos]
+    conteudo = await serialize_response(field=campo, response_content=modelos, is_coroutine=True)
+    return JSONResponse(conteudo).body
+
+
+async def corpo_rapido(documentos: list[dict]) -> bytes:
+    return RespostaJSON([projetar(documento, CAMPOS_PLACA) for documento in documentos]).body
+
+
+async def medir(gerar, repeticoes: int, aquecimento: int) -> float:
+    """Tempo médio (s) de uma chamada de `gerar`."""
+    for _ in range(aquecimento):
+        await gerar()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        await gerar()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+async def executar_benchmark(registros: int, tamanho_imagem: int, repeticoes: int,
+                             aquecimento: int) -> dict:
+    documentos = gerar_documentos(registros, tamanho_imagem)
+    campo = create_response_field(name="Response_get_all_placas", type_=List[PlacaResponse])
+
+    antes = await corpo_pydantic(documentos, campo)
+    depois = await corpo_rapido(documentos)
+    if json.loads(antes) != json.loads(depois):
+        raise SystemExit("Os dois caminhos geraram JSON diferente")
+
+    tempos = {
+        'pydantic': await medir(lambda: corpo_pydantic(documentos, campo), repeticoes, aquecimento),
+        'rapido': await medir(lambda: corpo_rapido(documentos), repeticoes, aquecimento),
+    }
+    return {
+        'registros': registros,
+        'tamanho_imagem': tamanho_imagem,
+        'repeticoes': repeticoes,
+        'encoder': 'orjson' if serializacao.orjson is not None else 'json',
+        'bytes_resposta': len(depois),
+        'caminhos': {
+            nome: {
+                'por_resposta_ms': round(tempo * 1000, 3),
+                'por_registro_us': round(tempo / registros * 1e6, 2),
+                'registros_por_segundo': round(registros / tempo, 1),
+            }
+            for nome, tempo in tempos.items()
+        },
+        'aceleracao': round(tempos['pydantic'] / tempos['rapido'], 2),
+    }
+
+
+def imprimir_relatorio(resultado: dict) -> None:
+    print(f"{resultado['registros']} registros por resposta, imagem de {resultado['tamanho_imagem']} bytes, "
+          f"resposta de {resultado['bytes_resposta']} bytes, encoder {resultado['encoder']}")
+    print(f"{'caminho':<12}{'por resposta (ms)':>20}{'por registro (µs)':>20}{'registros/s':>14}")
+    for nome, dados in resultado['caminhos'].items():
+        print(f"{nome:<12}{dados['por_resposta_ms']:>20}{dados['por_registro_us']:>20}"
+              f"{dados['registros_por_segundo']:>14}")
+    print(f"Aceleração: {resultado['aceleracao']}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das respostas de leitura")
+    parser.add_argument("--registros", type=int, default=100, help="Registros por resposta")
+    parser.add_argument("--tamanho-imagem", type=int, default=0,
+                        help="Bytes da imagem anotada de cada registro (0 mede só os demais campos)")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--aquecimento", type=int, default=10)
+    parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(executar_benchmark(args.registros, args.tamanho_imagem,
+                                               args.repeticoes, args.aquecimento))
+    imprimir_relatorio(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
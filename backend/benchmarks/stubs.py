@@ -0,0 +1,55 @@
+"""
+Detector e OCR de custo desprezível para medir a aplicação sem a inferência.
+
+Com eles o pipeline completo (pré-processamento, seleção de resultado, banco,
+serialização) continua sendo exercitado, mas o tempo dos modelos ONNX deixa de
+dominar as medições.
+"""
+
+import random
+import string
+import threading
+
+import numpy as np
+
+from app.services.alpr import ALPR, BaseDetector, BaseOCR, DetectionResult, OcrResult
+from app.services.alpr.base import BoundingBox
+
+
+class DetectorFixo(BaseDetector):
+    """Retorna sempre uma placa no centro inferior do quadro."""
+
+    def predict(self, frame: np.ndarray) -> list[DetectionResult]:
+        altura, largura = frame.shape[:2]
+        return [
+            DetectionResult(
+                label="License Plate",
+                confidence=0.9,
+                bounding_box=BoundingBox(
+                    x1=int(largura * 0.40),
+                    y1=int(altura * 0.60),
+                    x2=int(largura * 0.60),
+                    y2=int(altura * 0.66),
+                ),
+            )
+        ]
+
+
+class OCRAleatorio(BaseOCR):
+    """Retorna placas Mercosul aleatórias com confiança fixa."""
+
+    def __init__(self, semente: int = 1234):
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+
+    def predict(self, cropped_plate: np.ndarray) -> OcrResult | None:
+        with self._lock:
+            letras = "".join(self._rng.choice(string.ascii_uppercase) for _ in range(4))
+            digitos = "".join(self._rng.choice(string.digits) for _ in range(3))
+        texto = letras[:3] + digitos[0] + letras[3] + digitos[1:]
+        return OcrResult(text=texto, confidence=0.95)
+
+
+def criar_alpr_stub() -> ALPR:
+    """Cria um ALPR com o detector e o OCR de custo desprezível."""
+    return ALPR(detector=DetectorFixo(), ocr=OCRAleatorio())
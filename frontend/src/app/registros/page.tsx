@@ -1,31 +1,67 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Link from 'next/link';
 import { PlacaService } from '@/lib/api';
-import { Placa } from '@/types/placa';
+import { Placa, PlacaEvento } from '@/types/placa';
 import Image from 'next/image';
 
+// Aplica um evento do backend à lista. Reaplicar um evento já refletido na lista não a altera.
+function aplicarEvento(atuais: Placa[], tipo: string, evento: PlacaEvento): Placa[] {
+  if (tipo === 'placa_removida') {
+    return atuais.filter((placa) => placa._id !== evento._id);
+  }
+  const existente = atuais.find((placa) => placa._id === evento._id);
+  if (existente) {
+    return atuais.map((placa) => (placa._id === evento._id ? { ...placa, ...evento } : placa));
+  }
+  if (tipo === 'placa_criada') {
+    return [{ ...evento, placa: evento.placa ?? '', hora_entrada: evento.hora_entrada ?? '' }, ...atuais];
+  }
+  return atuais;
+}
+
 export default function RegistrosPage() {
   const [placas, setPlacas] = useState<Placa[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [deletingId, setDeletingId] = useState<string | null>(null);
+  // Eventos recebidos enquanto a lista é buscada, reaplicados sobre o resultado da busca
+  const eventosDuranteBusca = useRef<[string, PlacaEvento][] | null>(null);
 
   useEffect(() => {
     loadPlacas();
   }, []);
 
-  const loadPlacas = async () => {
+  // Atualiza a lista pelos eventos do backend, sem buscar todos os registros de novo
+  useEffect(() => {
+    return PlacaService.subscribeEvents(
+      (tipo, evento) => {
+        eventosDuranteBusca.current?.push([tipo, evento]);
+        setPlacas((atuais) => aplicarEvento(atuais, tipo, evento));
+      },
+      // Eventos perdidos que o backend não conseguiu reenviar: busca a lista de novo
+      () => loadPlacas(false)
+    );
+  }, []);
+
+  const loadPlacas = async (mostrarCarregando = true) => {
+    const recebidos: [string, PlacaEvento][] = [];
+    eventosDuranteBusca.current = recebidos;
     try {
-      setLoading(true);
+      if (mostrarCarregando) {
+        setLoading(true);
+      }
       const data = await PlacaService.getAllPlacas();
-      setPlacas(data);
+      setPlacas(recebidos.reduce((lista, [tipo, evento]) => aplicarEvento(lista, tipo, evento), data));
       setError(null);
     } catch (error: any) {
       setError('Erro ao carregar registros');
       console.error('Erro ao carregar placas:', error);
     } finally {
+      if (eventosDuranteBusca.current === recebidos) {
+        eventosDuranteBusca.current = null;
+      }
       setLoading(false);
     }
   };
@@ -117,13 +153,25 @@ export default function RegistrosPage() {
 
                   {/* Imagem */}
                   <div className="space-y-3">
-                    <Image
-                      src={`data:image/png;base64,${placa.image_base64}`}
-                      alt="Imagem da placa"
-                      width={400}
-                      height={300}
-                      className="w-full rounded-lg border border-gray-600"
-                    />
+                    {placa.image_base64 ? (
+                      <Image
+                        src={`data:image/png;base64,${placa.image_base64}`}
+                        alt="Imagem da placa"
+                        width={400}
+                        height={300}
+                        className="w-full rounded-lg border border-gray-600"
+                      />
+                    ) : placa.miniatura_url ? (
+                      // Registro recebido pelo fluxo de eventos: mostra a miniatura do original
+                      <Image
+                        src={PlacaService.url(placa.miniatura_url)}
+                        alt="Imagem da placa"
+                        width={400}
+                        height={300}
+                        unoptimized
+                        className="w-full rounded-lg border border-gray-600"
+                      />
+                    ) : null}
                   </div>
                 </div>
 
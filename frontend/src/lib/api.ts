@@ -3,7 +3,7 @@
  */
 
 import axios from 'axios';
-import { Placa, PlacaUpdate, PlacaSearchRequest, ImageUploadResponse } from '@/types/placa';
+import { Placa, PlacaEvento, PlacaUpdate, PlacaSearchRequest, ImageUploadResponse } from '@/types/placa';
 
 // Configuração base da API
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://172.18.0.3:8001';
@@ -88,6 +88,35 @@ export class PlacaService {
     const response = await api.delete(`/api/v1/placas/${id}`);
     return response.data;
   }
+
+  /**
+   * Assina o fluxo de eventos (SSE) com as mudanças nos registros.
+   * Ao reconectar, o navegador envia o último id recebido e o backend reenvia
+   * os eventos perdidos; quando não consegue, chama `onReload` para que a
+   * lista seja buscada de novo.
+   * Retorna a função que encerra a assinatura.
+   */
+  static subscribeEvents(
+    onEvent: (tipo: string, evento: PlacaEvento) => void,
+    onReload: () => void
+  ): () => void {
+    const source = new EventSource(`${API_BASE_URL}/api/v1/placas/eventos`);
+    const tipos = ['placa_criada', 'placa_saida', 'placa_atualizada', 'placa_removida'];
+    tipos.forEach((tipo) => {
+      source.addEventListener(tipo, (event) => {
+        onEvent(tipo, JSON.parse((event as MessageEvent).data));
+      });
+    });
+    source.addEventListener('recarregar', () => onReload());
+    return () => source.close();
+  }
+
+  /**
+   * URL absoluta de um caminho da API (ex.: miniaturas).
+   */
+  static url(path: string): string {
+    return `${API_BASE_URL}${path}`;
+  }
 }
 
 export default api;
@@ -5,10 +5,26 @@
 export interface Placa {
   _id: string;
   placa: string;
-  filename: string;
-  image_base64: string;
+  filename?: string;
+  image_base64?: string;
   hora_entrada: string;
   hora_saida: string | null | undefined;
+  camera_id?: string | null;
+  image_url?: string | null;
+  miniatura_url?: string | null;
+}
+
+/**
+ * Resumo de um registro enviado pelo fluxo de eventos (sem a imagem em base64).
+ */
+export interface PlacaEvento {
+  _id: string;
+  placa?: string;
+  hora_entrada?: string;
+  hora_saida?: string | null;
+  camera_id?: string | null;
+  image_url?: string | null;
+  miniatura_url?: string | null;
 }
 
 export interface PlacaUpdate {
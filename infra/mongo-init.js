@@ -9,7 +9,8 @@ db.createCollection('placas');
 
 // Cria índices para melhor performance
 db.placas.createIndex({ "placa": 1 });
-db.placas.createIndex({ "hora_entrada": 1 });
+// Também atende a exportação por intervalo, que ordena por hora_entrada e _id
+db.placas.createIndex({ "hora_entrada": 1, "_id": 1 });
 db.placas.createIndex({ "hora_saida": 1 });
 
 // Cria usuário para a aplicação (opcional)